@@ -377,12 +377,14 @@ function MainStatCard({ label, value, color, icon }: MainStatCardProps) {
                             <th className="p-2">Replay Buffer</th>
                             <th className="p-2">Best Avg Score</th>
                             <th className="p-2">Elapsed Time (min)</th>
+                            <th className="p-2">Greedy Win %</th>
+                            <th className="p-2">Opponent</th>
                         </tr>
                     </thead>
                     <tbody>
                         {history.length === 0 ? (
                             <tr>
-                                <td colSpan={10} className="p-4 text-center text-gray-400">No training data yet...</td>
+                                <td colSpan={12} className="p-4 text-center text-gray-400">No training data yet...</td>
                             </tr>
                         ) : (
                             last5.map((h, idx) => (
@@ -397,6 +399,8 @@ function MainStatCard({ label, value, color, icon }: MainStatCardProps) {
                                     <td className="p-2 text-white">{h.memory ?? '-'}</td>
                                     <td className="p-2 text-white">{h.best_score ? h.best_score.toFixed(2) : '-'}</td>
                                     <td className="p-2 text-white">{h.elapsed_time ? (h.elapsed_time/60).toFixed(1) : '-'}</td>
+                                    <td className="p-2 text-white">{typeof h.eval_win_rate === 'number' ? (h.eval_win_rate * 100).toFixed(1) : '-'}</td>
+                                    <td className="p-2 text-white">{h.opponent ?? '-'}</td>
                                 </tr>
                             ))
                         )}
@@ -408,6 +412,17 @@ function MainStatCard({ label, value, color, icon }: MainStatCardProps) {
                 <MainStatCard label="Reward" value={typeof lastStat?.reward === 'number' ? lastStat.reward.toFixed(2) : '-'} color="from-retro-yellow to-retro-green" icon="💸" />
                 <MainStatCard label="Loss" value={lastStat?.loss ?? '-'} color="from-retro-red to-retro-yellow" icon="🔥" />
             </div>
+            {/* League opponent mix (pong_ai_train.py --league) */}
+            {lastStat?.opponent_mix && (
+                <div className="mb-8 flex flex-wrap gap-3 justify-center text-sm">
+                    <span className="font-bold text-retro-green">🏟️ Opponent mix (last 100 episodes):</span>
+                    {Object.entries(lastStat.opponent_mix).map(([kind, share]) => (
+                        <span key={kind} className="bg-gray-800 px-3 py-1 rounded font-mono">
+                            {kind} {((share as number) * 100).toFixed(0)}%
+                        </span>
+                    ))}
+                </div>
+            )}
             {/* Action buttons */}
             <div className="flex flex-wrap gap-3 mb-8 justify-center">
                 <button className="px-4 py-2 bg-retro-red text-white rounded-lg shadow hover:bg-retro-red-dark transition-all text-sm font-bold" onClick={clearCache}>Clear Stats Cache</button>
@@ -5,12 +5,18 @@
 
 import { useEffect, useRef, useState, useCallback } from 'react';
 
+// Must match the AIMode enum in src/wasm/pong.c
 const AIMode = {
   NEURAL: 0,
-  PREDICTIVE: 1,
-  SIMPLE: 2
+  LOOKUP: 1,
+  PREDICTIVE: 2,
+  SIMPLE: 3
 };
 
+// Written by scripts/export_web_model.py: the manifest names the current
+// content-hashed bundle, which never changes and can be cached immutably
+const AI_BUNDLE_MANIFEST = '/models/ai_bundle.json';
+
 export { AIMode };
 
 export const usePongGame = () => {
@@ -29,6 +35,7 @@ export const usePongGame = () => {
 
   // Wrapped WASM functions
   const [wasmFunctions, setWasmFunctions] = useState(null);
+  const [bundleHash, setBundleHash] = useState(null);
 
   // Initialize WebAssembly module
   useEffect(() => {
@@ -122,6 +129,48 @@ export const usePongGame = () => {
     initWasm();
   }, []);
 
+  // SHA-256 of the whole bundle, hex encoded (the manifest's sha256 and the file name)
+  const bundleDigest = async (data) => {
+    const digest = await crypto.subtle.digest('SHA-256', data);
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+  };
+
+  // Load the integer weights and packed LUT into the engine (AIMode.NEURAL / AIMode.LOOKUP)
+  const loadAIBundle = useCallback(async (manifestUrl = AI_BUNDLE_MANIFEST) => {
+    const module = moduleRef.current;
+    if (!module || typeof module._load_ai_bundle !== 'function') {
+      console.warn('AI bundle not loaded: this pong.wasm has no load_ai_bundle (rebuild src/wasm)');
+      return false;
+    }
+    try {
+      // The manifest changes with every export, so always revalidate it
+      const manifest = await (await fetch(manifestUrl, { cache: 'no-cache' })).json();
+      const response = await fetch(new URL(manifest.file, new URL(manifestUrl, window.location.href)));
+      if (!response.ok) throw new Error(`HTTP ${response.status} for ${manifest.file}`);
+      const data = new Uint8Array(await response.arrayBuffer());
+      if (crypto.subtle && await bundleDigest(data) !== manifest.sha256) {
+        throw new Error(`content hash mismatch for ${manifest.file}`);
+      }
+
+      const ptr = module._malloc(data.length);
+      module.HEAPU8.set(data, ptr);
+      const status = module._load_ai_bundle(ptr, data.length);
+      module._free(ptr);
+      if (status !== 0) throw new Error(`load_ai_bundle returned ${status}`);
+
+      setBundleHash(manifest.sha256);
+      return true;
+    } catch (err) {
+      console.warn('AI bundle not loaded:', err);
+      return false;
+    }
+  }, []);
+
+  // Fetch the exported bundle once the engine is up
+  useEffect(() => {
+    if (wasmFunctions) loadAIBundle();
+  }, [wasmFunctions, loadAIBundle]);
+
   // Game loop
   const startGameLoop = useCallback(() => {
     if (!wasmFunctions || gameLoopRef.current) return;
@@ -239,6 +288,8 @@ export const usePongGame = () => {
     stopGameLoop,
     setAIMode,
     resetGame,
-    updateNeuralNetwork
+    updateNeuralNetwork,
+    loadAIBundle,
+    bundleHash
   };
 };
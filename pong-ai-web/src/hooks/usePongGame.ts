@@ -18,16 +18,24 @@ interface PongModule {
   ccall: (name: string, returnType: string | null, argTypes: string[], args: any[]) => any;
   cwrap: (name: string, returnType: string | null, argTypes: string[]) => (...args: any[]) => any;
   HEAPF32: Float32Array;
+  HEAPU8: Uint8Array;
+  _load_ai_bundle?: (ptr: number, size: number) => number;
   _malloc: (size: number) => number;
   _free: (ptr: number) => void;
 }
 
+// Must match the AIMode enum in src/wasm/pong.c
 export enum AIMode {
   NEURAL = 0,
-  PREDICTIVE = 1,
-  SIMPLE = 2
+  LOOKUP = 1,
+  PREDICTIVE = 2,
+  SIMPLE = 3
 }
 
+// Written by scripts/export_web_model.py: the manifest names the current
+// content-hashed bundle, which never changes and can be cached immutably
+const AI_BUNDLE_MANIFEST = '/models/ai_bundle.json';
+
 export const usePongGame = () => {
   const moduleRef = useRef<PongModule | null>(null);
   const gameLoopRef = useRef<number | null>(null);
@@ -57,6 +65,7 @@ export const usePongGame = () => {
     resetGame: () => void;
     updateNNWeights: (w1: number, b1: number, w2: number, b2: number) => void;
   } | null>(null);
+  const [bundleHash, setBundleHash] = useState<string | null>(null);
 
   // Initialize WebAssembly module
   useEffect(() => {
@@ -100,6 +109,48 @@ export const usePongGame = () => {
     initWasm();
   }, []);
 
+  // SHA-256 of the whole bundle, hex encoded (the manifest's sha256 and the file name)
+  const bundleDigest = async (data: Uint8Array): Promise<string> => {
+    const digest = await crypto.subtle.digest('SHA-256', data);
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+  };
+
+  // Load the integer weights and packed LUT into the engine (AIMode.NEURAL / AIMode.LOOKUP)
+  const loadAIBundle = useCallback(async (manifestUrl: string = AI_BUNDLE_MANIFEST): Promise<boolean> => {
+    const module = moduleRef.current;
+    if (!module || typeof module._load_ai_bundle !== 'function') {
+      console.warn('AI bundle not loaded: this pong.wasm has no load_ai_bundle (rebuild src/wasm)');
+      return false;
+    }
+    try {
+      // The manifest changes with every export, so always revalidate it
+      const manifest = await (await fetch(manifestUrl, { cache: 'no-cache' })).json();
+      const response = await fetch(new URL(manifest.file, new URL(manifestUrl, window.location.href)));
+      if (!response.ok) throw new Error(`HTTP ${response.status} for ${manifest.file}`);
+      const data = new Uint8Array(await response.arrayBuffer());
+      if (crypto.subtle && await bundleDigest(data) !== manifest.sha256) {
+        throw new Error(`content hash mismatch for ${manifest.file}`);
+      }
+
+      const ptr = module._malloc(data.length);
+      module.HEAPU8.set(data, ptr);
+      const status = module._load_ai_bundle(ptr, data.length);
+      module._free(ptr);
+      if (status !== 0) throw new Error(`load_ai_bundle returned ${status}`);
+
+      setBundleHash(manifest.sha256);
+      return true;
+    } catch (err) {
+      console.warn('AI bundle not loaded:', err);
+      return false;
+    }
+  }, []);
+
+  // Fetch the exported bundle once the engine is up
+  useEffect(() => {
+    if (wasmFunctions) loadAIBundle();
+  }, [wasmFunctions, loadAIBundle]);
+
   // Game loop
   const startGameLoop = useCallback(() => {
     if (!wasmFunctions || gameLoopRef.current) return;
@@ -222,6 +273,8 @@ export const usePongGame = () => {
     stopGameLoop,
     setAIMode,
     resetGame,
-    updateNeuralNetwork
+    updateNeuralNetwork,
+    loadAIBundle,
+    bundleHash
   };
 };
@@ -95,6 +95,7 @@ const GamePage = () => {
     ctx.fillStyle = '#ffff00';
     let modeText = 'SIMPLE';
     if (currentAiMode === AIMode.NEURAL) modeText = 'NEURAL';
+    else if (currentAiMode === AIMode.LOOKUP) modeText = 'LOOKUP';
     else if (currentAiMode === AIMode.PREDICTIVE) modeText = 'PREDICTIVE';
     ctx.fillText(`AI: ${modeText}`, 10, CANVAS_HEIGHT - 20);
 
@@ -231,7 +232,8 @@ const GamePage = () => {
               {[
                 { mode: AIMode.SIMPLE, label: 'Simple', desc: 'Basic ball following' },
                 { mode: AIMode.PREDICTIVE, label: 'Predictive', desc: 'Ball trajectory prediction' },
-                { mode: AIMode.NEURAL, label: 'Neural Network', desc: 'ML-based decision making' }
+                { mode: AIMode.NEURAL, label: 'Neural Network', desc: 'ML-based decision making' },
+                { mode: AIMode.LOOKUP, label: 'Lookup Table', desc: 'Console LUT from the exported AI bundle' }
               ].map(({ mode, label, desc }) => (
                 <button
                   key={mode}
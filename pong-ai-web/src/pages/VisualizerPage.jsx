@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { motion } from 'framer-motion';
+import { decodeReplay } from '../utils/pongReplay';
 
 const VisualizerPage = () => {
   const canvasRef = useRef(null);
@@ -14,6 +15,9 @@ const VisualizerPage = () => {
     aiY: 88
   });
   const [isLoading, setIsLoading] = useState(false);
+  const [replay, setReplay] = useState(null);
+  const [replayFrame, setReplayFrame] = useState(0);
+  const [replayPlaying, setReplayPlaying] = useState(false);
 
   // Generate sample lookup table data
   const generateLookupTable = useCallback(() => {
@@ -96,6 +100,29 @@ const VisualizerPage = () => {
     ctx.fillStyle = '#000';
     ctx.fillRect(0, 0, canvasWidth, canvasHeight);
 
+    if (visualizationMode === 'replay') {
+      // Draw recorded training episode frame
+      if (replay) {
+        const frame = replay.frames[Math.min(replayFrame, replay.frames.length - 1)];
+        ctx.fillStyle = '#ffffff';
+        ctx.fillRect((frame.ballX - 4) * scale, (frame.ballY - 4) * scale, 8 * scale, 8 * scale);
+        ctx.fillStyle = '#ff4444';
+        ctx.fillRect(16 * scale, frame.playerY * scale, 8 * scale, 48 * scale);
+        ctx.fillStyle = '#00ff00';
+        ctx.fillRect((320 - 24) * scale, frame.aiY * scale, 8 * scale, 48 * scale);
+      }
+
+      ctx.strokeStyle = '#333';
+      ctx.lineWidth = 1;
+      ctx.setLineDash([5, 5]);
+      ctx.beginPath();
+      ctx.moveTo(canvasWidth / 2, 0);
+      ctx.lineTo(canvasWidth / 2, canvasHeight);
+      ctx.stroke();
+      ctx.setLineDash([]);
+      return;
+    }
+
     if (visualizationMode === 'heatmap') {
       // Draw action heatmap
       const relevantEntries = lookupTable.filter(entry => 
@@ -199,7 +226,34 @@ const VisualizerPage = () => {
     ctx.stroke();
     ctx.setLineDash([]);
 
-  }, [lookupTable, visualizationMode, params]);
+  }, [lookupTable, visualizationMode, params, replay, replayFrame]);
+
+  // Replay playback at 60 frames per second (one recorded frame per game frame)
+  useEffect(() => {
+    if (!replayPlaying || !replay) return;
+    const timer = setInterval(() => {
+      setReplayFrame(prev => {
+        if (prev >= replay.frames.length - 1) {
+          setReplayPlaying(false);
+          return prev;
+        }
+        return prev + 1;
+      });
+    }, 1000 / 60);
+    return () => clearInterval(timer);
+  }, [replayPlaying, replay]);
+
+  const loadReplayFile = useCallback(async (file) => {
+    try {
+      const decoded = decodeReplay(await file.arrayBuffer());
+      setReplay(decoded);
+      setReplayFrame(0);
+      setReplayPlaying(true);
+    } catch (err) {
+      console.error('Failed to load replay:', err);
+      setReplay(null);
+    }
+  }, []);
 
   // Find closest lookup table entry
   const findClosestEntry = useCallback(() => {
@@ -255,7 +309,7 @@ const VisualizerPage = () => {
               <div className="flex justify-between items-center mb-4">
                 <h2 className="text-xl font-bold">Game State Visualization</h2>
                 <div className="flex space-x-2">
-                  {['heatmap', 'trajectory', 'decision'].map(mode => (
+                  {['heatmap', 'trajectory', 'decision', 'replay'].map(mode => (
                     <button
                       key={mode}
                       onClick={() => setVisualizationMode(mode)}
@@ -298,6 +352,55 @@ const VisualizerPage = () => {
 
           {/* Controls */}
           <div className="space-y-6">
+            {/* Replay Controls */}
+            {visualizationMode === 'replay' && (
+              <div className="retro-panel p-6">
+                <h3 className="text-lg font-bold mb-4">Training Replay</h3>
+
+                <input
+                  type="file"
+                  accept=".pgr"
+                  onChange={(e) => {
+                    const file = e.target.files?.[0];
+                    if (file) loadReplayFile(file);
+                  }}
+                  className="w-full text-sm mb-4"
+                />
+
+                {replay && (
+                  <div className="space-y-3 text-sm">
+                    <div className="flex justify-between">
+                      <span>Episode:</span>
+                      <span className="font-mono">{replay.meta.episode}</span>
+                    </div>
+                    <div className="flex justify-between">
+                      <span>Reward:</span>
+                      <span className="font-mono">{replay.meta.reward.toFixed(2)}</span>
+                    </div>
+                    <div>
+                      <label className="block text-sm font-bold mb-1">
+                        Frame: {replayFrame} / {replay.frames.length - 1}
+                      </label>
+                      <input
+                        type="range"
+                        min="0"
+                        max={replay.frames.length - 1}
+                        value={replayFrame}
+                        onChange={(e) => setReplayFrame(Number(e.target.value))}
+                        className="w-full"
+                      />
+                    </div>
+                    <button
+                      onClick={() => setReplayPlaying(prev => !prev)}
+                      className="w-full py-2 px-4 bg-blue-600 hover:bg-blue-700 text-white rounded transition-colors"
+                    >
+                      {replayPlaying ? 'Pause' : 'Play'}
+                    </button>
+                  </div>
+                )}
+              </div>
+            )}
+
             {/* Parameter Controls */}
             <div className="retro-panel p-6">
               <h3 className="text-lg font-bold mb-4">Game State Parameters</h3>
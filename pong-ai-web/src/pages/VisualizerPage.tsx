@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { motion } from 'framer-motion';
+import { decodeReplay } from '../utils/pongReplay';
 
 interface LookupTableEntry {
   ballX: number;
@@ -19,11 +20,26 @@ interface VisualizationParams {
   aiY: number;
 }
 
+interface ReplayFrame {
+  ballX: number;
+  ballY: number;
+  ballVx: number;
+  ballVy: number;
+  playerY: number;
+  aiY: number;
+  action: number | null;
+}
+
+interface Replay {
+  meta: { version: number; episode: number; reward: number; frames: number };
+  frames: ReplayFrame[];
+}
+
 const VisualizerPage: React.FC = () => {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const [lookupTable, setLookupTable] = useState<LookupTableEntry[]>([]);
   const [selectedEntry, setSelectedEntry] = useState<LookupTableEntry | null>(null);
-  const [visualizationMode, setVisualizationMode] = useState<'heatmap' | 'trajectory' | 'decision'>('heatmap');
+  const [visualizationMode, setVisualizationMode] = useState<'heatmap' | 'trajectory' | 'decision' | 'replay'>('heatmap');
   const [params, setParams] = useState<VisualizationParams>({
     ballX: 160,
     ballY: 112,
@@ -32,6 +48,9 @@ const VisualizerPage: React.FC = () => {
     aiY: 88
   });
   const [isLoading, setIsLoading] = useState(false);
+  const [replay, setReplay] = useState<Replay | null>(null);
+  const [replayFrame, setReplayFrame] = useState(0);
+  const [replayPlaying, setReplayPlaying] = useState(false);
 
   // Generate sample lookup table data
   const generateLookupTable = useCallback(() => {
@@ -114,6 +133,29 @@ const VisualizerPage: React.FC = () => {
     ctx.fillStyle = '#000';
     ctx.fillRect(0, 0, canvasWidth, canvasHeight);
 
+    if (visualizationMode === 'replay') {
+      // Draw recorded training episode frame
+      if (replay) {
+        const frame = replay.frames[Math.min(replayFrame, replay.frames.length - 1)];
+        ctx.fillStyle = '#ffffff';
+        ctx.fillRect((frame.ballX - 4) * scale, (frame.ballY - 4) * scale, 8 * scale, 8 * scale);
+        ctx.fillStyle = '#ff4444';
+        ctx.fillRect(16 * scale, frame.playerY * scale, 8 * scale, 48 * scale);
+        ctx.fillStyle = '#00ff00';
+        ctx.fillRect((320 - 24) * scale, frame.aiY * scale, 8 * scale, 48 * scale);
+      }
+
+      ctx.strokeStyle = '#333';
+      ctx.lineWidth = 1;
+      ctx.setLineDash([5, 5]);
+      ctx.beginPath();
+      ctx.moveTo(canvasWidth / 2, 0);
+      ctx.lineTo(canvasWidth / 2, canvasHeight);
+      ctx.stroke();
+      ctx.setLineDash([]);
+      return;
+    }
+
     if (visualizationMode === 'heatmap') {
       // Draw action heatmap
       const relevantEntries = lookupTable.filter(entry => 
@@ -217,7 +259,34 @@ const VisualizerPage: React.FC = () => {
     ctx.stroke();
     ctx.setLineDash([]);
 
-  }, [lookupTable, visualizationMode, params]);
+  }, [lookupTable, visualizationMode, params, replay, replayFrame]);
+
+  // Replay playback at 60 frames per second (one recorded frame per game frame)
+  useEffect(() => {
+    if (!replayPlaying || !replay) return;
+    const timer = setInterval(() => {
+      setReplayFrame(prev => {
+        if (prev >= replay.frames.length - 1) {
+          setReplayPlaying(false);
+          return prev;
+        }
+        return prev + 1;
+      });
+    }, 1000 / 60);
+    return () => clearInterval(timer);
+  }, [replayPlaying, replay]);
+
+  const loadReplayFile = useCallback(async (file: File) => {
+    try {
+      const decoded = decodeReplay(await file.arrayBuffer());
+      setReplay(decoded);
+      setReplayFrame(0);
+      setReplayPlaying(true);
+    } catch (err) {
+      console.error('Failed to load replay:', err);
+      setReplay(null);
+    }
+  }, []);
 
   // Find closest lookup table entry
   const findClosestEntry = useCallback(() => {
@@ -273,7 +342,7 @@ const VisualizerPage: React.FC = () => {
               <div className="flex justify-between items-center mb-4">
                 <h2 className="text-xl font-bold">Game State Visualization</h2>
                 <div className="flex space-x-2">
-                  {['heatmap', 'trajectory', 'decision'].map(mode => (
+                  {['heatmap', 'trajectory', 'decision', 'replay'].map(mode => (
                     <button
                       key={mode}
                       onClick={() => setVisualizationMode(mode as any)}
@@ -316,6 +385,55 @@ const VisualizerPage: React.FC = () => {
 
           {/* Controls */}
           <div className="space-y-6">
+            {/* Replay Controls */}
+            {visualizationMode === 'replay' && (
+              <div className="retro-panel p-6">
+                <h3 className="text-lg font-bold mb-4">Training Replay</h3>
+
+                <input
+                  type="file"
+                  accept=".pgr"
+                  onChange={(e) => {
+                    const file = e.target.files?.[0];
+                    if (file) loadReplayFile(file);
+                  }}
+                  className="w-full text-sm mb-4"
+                />
+
+                {replay && (
+                  <div className="space-y-3 text-sm">
+                    <div className="flex justify-between">
+                      <span>Episode:</span>
+                      <span className="font-mono">{replay.meta.episode}</span>
+                    </div>
+                    <div className="flex justify-between">
+                      <span>Reward:</span>
+                      <span className="font-mono">{replay.meta.reward.toFixed(2)}</span>
+                    </div>
+                    <div>
+                      <label className="block text-sm font-bold mb-1">
+                        Frame: {replayFrame} / {replay.frames.length - 1}
+                      </label>
+                      <input
+                        type="range"
+                        min="0"
+                        max={replay.frames.length - 1}
+                        value={replayFrame}
+                        onChange={(e) => setReplayFrame(Number(e.target.value))}
+                        className="w-full"
+                      />
+                    </div>
+                    <button
+                      onClick={() => setReplayPlaying(prev => !prev)}
+                      className="w-full py-2 px-4 bg-blue-600 hover:bg-blue-700 text-white rounded transition-colors"
+                    >
+                      {replayPlaying ? 'Pause' : 'Play'}
+                    </button>
+                  </div>
+                )}
+              </div>
+            )}
+
             {/* Parameter Controls */}
             <div className="retro-panel p-6">
               <h3 className="text-lg font-bold mb-4">Game State Parameters</h3>
@@ -0,0 +1,58 @@
+/**
+ * Decoder for compact training replays (.pgr) written by scripts/replay_recorder.py
+ *
+ * Version 1 layout (little-endian):
+ *   header: magic 'PGRP', u8 version, u8 flags, u16 header_size, u32 n_frames,
+ *           s16 ball_x, s16 ball_y, s8 ball_vx, s8 ball_vy, s16 player_y, s16 ai_y,
+ *           u32 episode, f32 reward
+ *   frames: u8 action|flags, s8 dbx, s8 dby, s8 dpy, s8 day [, s8 dvx, s8 dvy if flags & 0x80]
+ */
+
+export const REPLAY_VERSION = 1;
+
+const FRAME_ACTION_MASK = 0x03;
+const FRAME_VEL_CHANGED = 0x80;
+
+export const decodeReplay = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(
+    view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+  );
+  if (magic !== 'PGRP') {
+    throw new Error('Not a Pong replay file (bad magic)');
+  }
+  const version = view.getUint8(4);
+  if (version !== REPLAY_VERSION) {
+    throw new Error(`Unsupported replay version ${version}`);
+  }
+  const headerSize = view.getUint16(6, true);
+  const frameCount = view.getUint32(8, true);
+
+  let ballX = view.getInt16(12, true);
+  let ballY = view.getInt16(14, true);
+  let ballVx = view.getInt8(16);
+  let ballVy = view.getInt8(17);
+  let playerY = view.getInt16(18, true);
+  let aiY = view.getInt16(20, true);
+  const episode = view.getUint32(22, true);
+  const reward = view.getFloat32(26, true);
+
+  const frames = [{ ballX, ballY, ballVx, ballVy, playerY, aiY, action: null }];
+  let pos = headerSize;
+  for (let i = 0; i < frameCount; i++) {
+    const head = view.getUint8(pos);
+    ballX += view.getInt8(pos + 1);
+    ballY += view.getInt8(pos + 2);
+    playerY += view.getInt8(pos + 3);
+    aiY += view.getInt8(pos + 4);
+    pos += 5;
+    if (head & FRAME_VEL_CHANGED) {
+      ballVx += view.getInt8(pos);
+      ballVy += view.getInt8(pos + 1);
+      pos += 2;
+    }
+    frames.push({ ballX, ballY, ballVx, ballVy, playerY, aiY, action: head & FRAME_ACTION_MASK });
+  }
+
+  return { meta: { version, episode, reward, frames: frameCount }, frames };
+};
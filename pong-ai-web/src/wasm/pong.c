@@ -5,6 +5,7 @@
 
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <math.h>
 #include <emscripten.h>
 
@@ -67,6 +68,34 @@ float nn_weights2[8][3] = {
 
 float nn_bias2[3] = {0.1, -0.2, 0.1};
 
+// AI bundle (export_web_model.py): exact x1024 integer weights and the packed
+// LUT. The LUT is read like pong_ai_lookup in ai.c. The network uses the tile
+// divisors from the bundle header: the training ones (/39, /27) by default,
+// which agree with the LUT but not with pong_ai_NN (/17, /25). Actions in the bundle are
+// 0=stay, 1=up, 2=down; bundle_to_web maps them to this file's 0=up, 1=stay, 2=down.
+#define BUNDLE_HEADER_SIZE 80
+#define BUNDLE_VERSION 1
+#define BUNDLE_MAX_INPUTS 5
+#define BUNDLE_MAX_HIDDEN 32
+#define BUNDLE_MAX_OUTPUTS 3
+
+static const int bundle_to_web[4] = {1, 0, 2, 1};
+
+int nn_int_loaded = 0; // integer weights in use by AI_MODE_NEURAL
+int nn_int_inputs, nn_int_hidden, nn_int_outputs, nn_int_shift;
+int nn_int_div[3]; // ball_x, ball_y, ai_y tile divisors
+int nn_int_w1[BUNDLE_MAX_INPUTS][BUNDLE_MAX_HIDDEN];
+int nn_int_b1[BUNDLE_MAX_HIDDEN];
+int nn_int_w2[BUNDLE_MAX_HIDDEN][BUNDLE_MAX_OUTPUTS];
+int nn_int_b2[BUNDLE_MAX_OUTPUTS];
+
+unsigned char* ai_lut = NULL;
+int lut_shape[5];          // ball_x, ball_y, vx, vy, ai_y
+int lut_bits;              // 2 (packed, 4 per byte MSB-first) or 8
+int lut_tile_offset[3];    // tile of index 0 on ball_x, ball_y, ai_y
+int lut_vx0, lut_vy0;      // first vx / vy value
+int lut_active_x[2];       // ball_x pixel range that uses the table
+
 // Utility functions
 float relu(float x) {
     return x > 0 ? x : 0;
@@ -139,6 +168,73 @@ int ai_predictive(float ball_x, float ball_y, float ball_vx, float ball_vy, floa
     return 1; // Stay
 }
 
+static int read_u16(const unsigned char* p) { return p[0] | (p[1] << 8); }
+static int read_s16(const unsigned char* p) { return (short)read_u16(p); }
+static unsigned int read_u32(const unsigned char* p) {
+    return p[0] | (p[1] << 8) | (p[2] << 16) | ((unsigned int)p[3] << 24);
+}
+
+static int clamp_index(int value, int size) {
+    return value < 0 ? 0 : (value >= size ? size - 1 : value);
+}
+
+// Integer forward pass of the bundled weights (lut_builder.nn_forward_int)
+int ai_neural_network_int(int ball_x, int ball_y, int ball_vx, int ball_vy, int ai_y) {
+    int inputs[BUNDLE_MAX_INPUTS] = {
+        ((ball_x >> 3) << nn_int_shift) / nn_int_div[0],
+        ((ball_y >> 3) << nn_int_shift) / nn_int_div[1],
+        ((ball_vx + 4) << nn_int_shift) >> 3,
+        ((ball_vy + 4) << nn_int_shift) >> 3,
+        ((ai_y >> 3) << nn_int_shift) / nn_int_div[2]
+    };
+
+    int hidden[BUNDLE_MAX_HIDDEN];
+    for (int h = 0; h < nn_int_hidden; h++) {
+        int sum = nn_int_b1[h];
+        for (int i = 0; i < nn_int_inputs; i++) {
+            sum += (inputs[i] * nn_int_w1[i][h]) >> nn_int_shift;
+        }
+        hidden[h] = sum > 0 ? sum : 0;
+    }
+
+    int best_action = 0, best_value = 0;
+    for (int o = 0; o < nn_int_outputs; o++) {
+        int sum = nn_int_b2[o];
+        for (int h = 0; h < nn_int_hidden; h++) {
+            sum += (hidden[h] * nn_int_w2[h][o]) >> nn_int_shift;
+        }
+        if (o == 0 || sum > best_value) {
+            best_action = o;
+            best_value = sum;
+        }
+    }
+    return bundle_to_web[best_action];
+}
+
+// O(1) table lookup with the index math and out-of-range centering of pong_ai_lookup
+int ai_lookup(int ball_x, int ball_y, int ball_vx, int ball_vy, int ai_y) {
+    if (ball_x < lut_active_x[0] || ball_x > lut_active_x[1] || ball_vx <= 0) {
+        if (ai_y + PADDLE_HEIGHT / 2 < SCREEN_HEIGHT / 2) return 2; // Move down
+        if (ai_y + PADDLE_HEIGHT / 2 > SCREEN_HEIGHT / 2) return 0; // Move up
+        return 1; // Stay
+    }
+
+    int bx = clamp_index((ball_x >> 3) - lut_tile_offset[0], lut_shape[0]);
+    int by = clamp_index((ball_y >> 3) - lut_tile_offset[1], lut_shape[1]);
+    int vx = clamp_index(ball_vx - lut_vx0, lut_shape[2]);
+    int vy = clamp_index(ball_vy - lut_vy0, lut_shape[3]);
+    int ay = clamp_index((ai_y >> 3) - lut_tile_offset[2], lut_shape[4]);
+    int index = (((bx * lut_shape[1] + by) * lut_shape[2] + vx) * lut_shape[3] + vy) * lut_shape[4] + ay;
+
+    int action;
+    if (lut_bits == 2) {
+        action = (ai_lut[index >> 2] >> (6 - 2 * (index & 3))) & 0x3;
+    } else {
+        action = ai_lut[index];
+    }
+    return bundle_to_web[action & 0x3];
+}
+
 int ai_simple(float ball_x, float ball_y, float ball_vx, float ball_vy, float ai_y) {
     (void)ball_x; (void)ball_vx; (void)ball_vy; // Unused parameters
     
@@ -192,7 +288,19 @@ void update_game() {
     int ai_action;
     switch (aiMode) {
         case AI_MODE_NEURAL:
-            ai_action = ai_neural_network(ball.x, ball.y, ball.dx, ball.dy, player2.y);
+            if (nn_int_loaded) {
+                ai_action = ai_neural_network_int((int)ball.x, (int)ball.y, (int)ball.dx, (int)ball.dy,
+                                                  (int)player2.y);
+            } else {
+                ai_action = ai_neural_network(ball.x, ball.y, ball.dx, ball.dy, player2.y);
+            }
+            break;
+        case AI_MODE_LOOKUP:
+            if (ai_lut) {
+                ai_action = ai_lookup((int)ball.x, (int)ball.y, (int)ball.dx, (int)ball.dy, (int)player2.y);
+            } else {
+                ai_action = ai_predictive(ball.x, ball.y, ball.dx, ball.dy, player2.y);
+            }
             break;
         case AI_MODE_PREDICTIVE:
             ai_action = ai_predictive(ball.x, ball.y, ball.dx, ball.dy, player2.y);
@@ -325,4 +433,72 @@ void update_nn_weights(float* weights1_data, float* bias1_data, float* weights2_
     for (int i = 0; i < 3; i++) {
         nn_bias2[i] = bias2_data[i];
     }
+
+    // Float weights pushed from the page replace the bundled integer network
+    nn_int_loaded = 0;
+}
+
+// Load an AI bundle written by export_web_model.py. Returns 0 on success or a
+// negative error: -1 bad header, -2 unsupported network size, -3 size mismatch.
+EMSCRIPTEN_KEEPALIVE
+int load_ai_bundle(const unsigned char* data, int size) {
+    if (size < BUNDLE_HEADER_SIZE || memcmp(data, "PAIB", 4) != 0 ||
+        read_u16(data + 4) != BUNDLE_VERSION || read_u16(data + 6) != BUNDLE_HEADER_SIZE) {
+        return -1;
+    }
+    int inputs = data[8], hidden = data[9], outputs = data[10];
+    if (inputs != BUNDLE_MAX_INPUTS || hidden < 1 || hidden > BUNDLE_MAX_HIDDEN || outputs != BUNDLE_MAX_OUTPUTS) {
+        return -2;
+    }
+    unsigned int weights_bytes = read_u32(data + 34);
+    unsigned int lut_bytes = read_u32(data + 38);
+    unsigned int weight_count = inputs * hidden + hidden + hidden * outputs + outputs;
+    int entries = 1;
+    for (int i = 0; i < 5; i++) {
+        entries *= data[18 + i];
+    }
+    int bits = data[23];
+    if (weights_bytes != weight_count * 2 || (bits != 2 && bits != 8) ||
+        lut_bytes != (unsigned int)(entries * bits + 7) / 8 ||
+        (unsigned int)size != BUNDLE_HEADER_SIZE + weights_bytes + lut_bytes) {
+        return -3;
+    }
+
+    nn_int_inputs = inputs;
+    nn_int_hidden = hidden;
+    nn_int_outputs = outputs;
+    nn_int_shift = data[11];
+    for (int i = 0; i < 3; i++) {
+        nn_int_div[i] = read_u16(data + 12 + 2 * i);
+    }
+    const unsigned char* w = data + BUNDLE_HEADER_SIZE;
+    for (int i = 0; i < inputs; i++) {
+        for (int h = 0; h < hidden; h++, w += 2) nn_int_w1[i][h] = read_s16(w);
+    }
+    for (int h = 0; h < hidden; h++, w += 2) nn_int_b1[h] = read_s16(w);
+    for (int h = 0; h < hidden; h++) {
+        for (int o = 0; o < outputs; o++, w += 2) nn_int_w2[h][o] = read_s16(w);
+    }
+    for (int o = 0; o < outputs; o++, w += 2) nn_int_b2[o] = read_s16(w);
+    nn_int_loaded = 1;
+
+    for (int i = 0; i < 5; i++) {
+        lut_shape[i] = data[18 + i];
+    }
+    lut_bits = bits;
+    for (int i = 0; i < 3; i++) {
+        lut_tile_offset[i] = data[24 + i];
+    }
+    lut_vx0 = (signed char)data[27];
+    lut_vy0 = (signed char)data[28];
+    lut_active_x[0] = read_u16(data + 30);
+    lut_active_x[1] = read_u16(data + 32);
+
+    free(ai_lut);
+    ai_lut = (unsigned char*)malloc(lut_bytes);
+    if (!ai_lut) {
+        return -3;
+    }
+    memcpy(ai_lut, w, lut_bytes);
+    return 0;
 }
@@ -0,0 +1,15 @@
+// Auto-generated by gen_intercept_table.py - layout of ai_intercept_bin
+#ifndef AI_INTERCEPT_H
+#define AI_INTERCEPT_H
+
+// time_table: s16[INTERCEPT_VX_MAX][INTERCEPT_X_COUNT] = (290 - x) / vx
+// fold_table: u8[INTERCEPT_FOLD_COUNT] = wall-reflected y for projected y - INTERCEPT_FOLD_MIN
+#define INTERCEPT_X_COUNT 320
+#define INTERCEPT_Y_COUNT 224
+#define INTERCEPT_VX_MAX 4
+#define INTERCEPT_VY_MAX 4
+#define INTERCEPT_FOLD_OFFSET 2560 // byte offset of fold_table
+#define INTERCEPT_FOLD_MIN (-1160)
+#define INTERCEPT_FOLD_COUNT 2544
+
+#endif // AI_INTERCEPT_H
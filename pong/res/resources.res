@@ -15,4 +15,5 @@ WAV select "audio/ok-1.wav" XGM2
 WAV score "audio/blip-1.wav" XGM2
 WAV pause "audio/coin-5.wav" XGM2
 
-BIN ai_lut_bin "ai_lut.bin" ALIGN 4
\ No newline at end of file
+BIN ai_lut_bin "ai_lut.bin" ALIGN 4
+BIN ai_intercept_bin "ai_intercept.bin" ALIGN 4
\ No newline at end of file
@@ -2,6 +2,7 @@
 #include "ai.h"
 #include "resources.h"
 #include "weights.h"
+#include "ai_intercept.h"
 
 static u8 lut_ram[sizeof(ai_lut_bin)];
 
@@ -83,7 +84,15 @@ u16 pong_ai_predict(s16 ball_x, s16 ball_y, s16 ball_vx, s16 ball_vy, s16 ai_y)
 
     // Predict where ball will be when it reaches paddle
     s16 ball_future_y = by;
-    if (bvx > 0)
+    if (bvx > 0 && bvx <= INTERCEPT_VX_MAX && bvy >= -INTERCEPT_VY_MAX && bvy <= INTERCEPT_VY_MAX &&
+        bx >= 0 && bx < INTERCEPT_X_COUNT && by >= 0 && by < INTERCEPT_Y_COUNT)
+    { // O(1) table lookup (gen_intercept_table.py), same result as the loop below
+        const s16 *time_table = (const s16 *)ai_intercept_bin;
+        const u8 *fold_table = ai_intercept_bin + INTERCEPT_FOLD_OFFSET;
+        s16 time_to_paddle = time_table[(bvx - 1) * INTERCEPT_X_COUNT + bx];
+        ball_future_y = fold_table[by + bvy * time_to_paddle - INTERCEPT_FOLD_MIN];
+    }
+    else if (bvx > 0)
     { // Ball moving toward AI
         s16 time_to_paddle = (290 - bx) / bvx;
         ball_future_y = by + (bvy * time_to_paddle);
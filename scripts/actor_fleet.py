@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Multi-host actor fleet for Pong DQN rollouts over plain TCP
+
+Actors play VecPongEnv games with the latest published weights and push the
+transitions to a learner-side FleetServer, which stands in for a parameter
+server: it holds the current weight blob and a bounded ingest queue.
+
+Protocol (little-endian, one frame per message, one request/response at a time):
+    frame    = magic b'PNGF' | type u8 | payload length u32 | payload
+    HELLO    actor id u32                        -> WELCOME  weights version u32 | action repeat u16
+    PULL     version the actor holds u32         -> WEIGHTS  version u32 [| 75 float32 when newer]
+    PUSH     count u32 | zlib(transitions)       -> ACK count u32, or BUSY retry ms u16 when the queue is full
+Transitions are pong_env int8 state codes: states (n, 5) int8 | next_states
+(n, 5) int8 | actions int8 | rewards float32 | dones u8, i.e. 16 bytes each
+before compression. Each actor orders its batch env by env, so consecutive
+transitions stay consecutive in time for the replay buffer's n-step returns.
+The learner's action repeat K comes with WELCOME: actors then hold each
+decision for K frames and push one transition per decision with the summed
+reward, like pong_ai_train.py --action-repeat, so every transition in the
+replay buffer covers the same span.
+
+Backpressure: a full ingest queue answers BUSY and the actor holds its batch
+and retries after the given delay, so slow learners slow the actors instead
+of dropping data. A lost connection is retried with exponential backoff; the
+pending batch is resent after reconnecting.
+
+pong_ai_train.py runs a FleetServer with --fleet-port. For a single-box test,
+'local' starts a stand-in server (weights from a model file, transitions into
+a ReplayBuffer) and launches the actors as local processes against localhost.
+
+Usage:
+    python actor_fleet.py local --actors 4 --seconds 30              # everything on this box
+    python actor_fleet.py serve --port 5555 --model ../models/pong_ai_model.h5
+    python actor_fleet.py actor --host learner.local --port 5555 --actor-id 3
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from pong_env import decode_states
+from pong_native import make_vec_env
+from replay_buffer import ReplayBuffer
+from keras_weights import load_weights, dense_forward
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(SCRIPT_DIR, '..', 'models', 'pong_ai_model.h5')
+
+MAGIC = b'PNGF'
+HEADER = struct.Struct('<4sBI')
+HELLO, WELCOME, PULL, WEIGHTS, PUSH, ACK, BUSY = range(1, 8)
+MAX_PAYLOAD = 64 << 20
+WEIGHT_SHAPES = ((5, 8), (8,), (8, 3), (3,))
+NUM_WEIGHTS = sum(int(np.prod(shape)) for shape in WEIGHT_SHAPES)  # 75
+
+
+def send_frame(sock, kind, payload=b''):
+    sock.sendall(HEADER.pack(MAGIC, kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock):
+    """-> (type, payload); ConnectionError on EOF or a malformed header"""
+    magic, kind, size = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if magic != MAGIC or size > MAX_PAYLOAD:
+        raise ConnectionError("bad frame header")
+    return kind, _recv_exact(sock, size)
+
+
+def pack_weights(weights, version):
+    flat = np.concatenate([np.asarray(w, dtype=np.float32).ravel() for w in weights])
+    if len(flat) != NUM_WEIGHTS:
+        raise ValueError(f"Expected a 5-8-3 network ({NUM_WEIGHTS} values), got {len(flat)}")
+    return struct.pack('<I', version) + flat.astype('<f4').tobytes()
+
+
+def unpack_weights(payload):
+    """-> (version, [w1, b1, w2, b2] or None when the blob carries no weights)"""
+    version = struct.unpack_from('<I', payload)[0]
+    if len(payload) == 4:
+        return version, None
+    flat = np.frombuffer(payload, dtype='<f4', offset=4).astype(np.float32)
+    weights, start = [], 0
+    for shape in WEIGHT_SHAPES:
+        size = int(np.prod(shape))
+        weights.append(flat[start:start + size].reshape(shape))
+        start += size
+    return version, weights
+
+
+def pack_transitions(states, actions, rewards, next_states, dones):
+    body = b''.join([np.asarray(states, dtype=np.int8).tobytes(), np.asarray(next_states, dtype=np.int8).tobytes(),
+                     np.asarray(actions, dtype=np.int8).tobytes(), np.asarray(rewards, dtype='<f4').tobytes(),
+                     np.asarray(dones, dtype=np.uint8).tobytes()])
+    return struct.pack('<I', len(actions)) + zlib.compress(body, 1)
+
+
+def unpack_transitions(payload):
+    """-> dict of states, actions, rewards, next_states, dones (ReplayBuffer.add_batch order)"""
+    n = struct.unpack_from('<I', payload)[0]
+    if n * 16 > MAX_PAYLOAD:
+        raise ValueError(f"Transition batch of {n} exceeds {MAX_PAYLOAD} bytes")
+    # Inflate at most the n * 16 bytes the count promises, so a push cannot be a decompression bomb
+    # (max_length 0 would mean unlimited, hence at least 1: an empty batch must inflate to nothing)
+    inflater = zlib.decompressobj()
+    body = inflater.decompress(payload[4:], max(n * 16, 1))
+    if len(body) != n * 16 or inflater.unconsumed_tail or not inflater.eof:
+        raise ValueError(f"Transition batch of {n} does not inflate to {n * 16} bytes")
+    offsets = np.cumsum([0, 5 * n, 5 * n, n, 4 * n, n])
+    return {
+        'states': np.frombuffer(body[offsets[0]:offsets[1]], dtype=np.int8).reshape(n, 5),
+        'actions': np.frombuffer(body[offsets[2]:offsets[3]], dtype=np.int8),
+        'rewards': np.frombuffer(body[offsets[3]:offsets[4]], dtype='<f4').astype(np.float32),
+        'next_states': np.frombuffer(body[offsets[1]:offsets[2]], dtype=np.int8).reshape(n, 5),
+        'dones': np.frombuffer(body[offsets[4]:offsets[5]], dtype=np.uint8).astype(bool),
+    }
+
+
+class FleetServer:
+    """Learner-side weight store and bounded transition ingest queue, served over TCP"""
+
+    def __init__(self, host='127.0.0.1', port=5555, max_batches=64, retry_ms=50, action_repeat=1):
+        self.host = host
+        self.port = port
+        self.retry_ms = retry_ms
+        self.action_repeat = action_repeat
+        self.ingest = queue.Queue(maxsize=max_batches)
+        self._blob = struct.pack('<I', 0)  # version 0: no weights yet, actors play randomly
+        self._version = 0
+        self._lock = threading.Lock()
+        self.stats = {'actors': 0, 'connections': 0, 'batches': 0, 'transitions': 0, 'busy': 0, 'bad_frames': 0}
+        self._server = None
+        self._thread = None
+        self._connections = set()
+
+    def start(self):
+        fleet = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                fleet._serve_connection(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]  # resolves port 0
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fleet-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _serve_connection(self, sock):
+        with self._lock:
+            self._connections.add(sock)
+            self.stats['connections'] += 1
+            self.stats['actors'] += 1
+        try:
+            while True:
+                kind, payload = recv_frame(sock)
+                if kind == HELLO:
+                    send_frame(sock, WELCOME, struct.pack('<IH', self._version, self.action_repeat))
+                elif kind == PULL:
+                    held = struct.unpack('<I', payload)[0]
+                    with self._lock:
+                        blob, version = self._blob, self._version
+                    send_frame(sock, WEIGHTS, blob if held != version else blob[:4])
+                elif kind == PUSH:
+                    try:
+                        batch = unpack_transitions(payload)
+                    except (ValueError, zlib.error, struct.error):
+                        self._count('bad_frames')
+                        raise ConnectionError("bad transition batch")
+                    try:
+                        self.ingest.put_nowait(batch)
+                    except queue.Full:
+                        self._count('busy')
+                        send_frame(sock, BUSY, struct.pack('<H', self.retry_ms))
+                        continue
+                    self._count('batches')
+                    self._count('transitions', len(batch['actions']))
+                    send_frame(sock, ACK, struct.pack('<I', len(batch['actions'])))
+                else:
+                    self._count('bad_frames')
+                    break
+        except (ConnectionError, OSError, struct.error):
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(sock)
+                self.stats['actors'] -= 1
+
+    def publish(self, weights):
+        """Make a new weight set available to the actors -> its version"""
+        with self._lock:
+            self._version += 1
+            self._blob = pack_weights(weights, self._version)
+            return self._version
+
+    @property
+    def version(self):
+        return self._version
+
+    def drain(self, max_batches=None):
+        """Queued transition batches, oldest first, without blocking"""
+        batches = []
+        while max_batches is None or len(batches) < max_batches:
+            try:
+                batches.append(self.ingest.get_nowait())
+            except queue.Empty:
+                break
+        return batches
+
+    def drain_into(self, buffer, max_batches=None):
+        """Move queued transitions into a ReplayBuffer -> transitions added"""
+        added = 0
+        for batch in self.drain(max_batches):
+            buffer.add_batch(**batch)
+            added += len(batch['actions'])
+        return added
+
+    def close(self):
+        """Stop accepting and drop every open actor connection (actors reconnect with backoff)"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def actor_epsilon(actor_id, num_actors, base=0.4, alpha=7.0):
+    """Fixed per-actor exploration, spread from 0.4 down to 0.4 ** 8 (Ape-X schedule)"""
+    return base ** (1 + alpha * actor_id / max(num_actors - 1, 1))
+
+
+class Actor:
+    """Plays VecPongEnv batches with the latest weights and pushes them to a FleetServer"""
+
+    def __init__(self, host, port, actor_id=0, num_actors=1, num_envs=64, batch_frames=32, pull_every=4,
+                 epsilon=None, seed=None, timeout=10.0):
+        self.address = (host, port)
+        self.actor_id = actor_id
+        self.num_envs = num_envs
+        self.batch_frames = batch_frames
+        self.pull_every = pull_every
+        self.epsilon = actor_epsilon(actor_id, num_actors) if epsilon is None else epsilon
+        self.timeout = timeout
+        self.env = make_vec_env(num_envs, seed=seed)
+        self.rng = np.random.default_rng(seed)
+        self.action_repeat = 1  # set by the server's WELCOME
+        self.version = 0
+        self.weights = None
+        self.pushed = 0
+        self.reconnects = 0
+
+    def act(self, codes):
+        actions = self.rng.integers(0, 3, self.num_envs)
+        if self.weights is not None:
+            greedy = np.argmax(dense_forward(self.weights, decode_states(codes)), axis=1)
+            actions = np.where(self.rng.random(self.num_envs) < self.epsilon, actions, greedy)
+        return actions
+
+    def step(self, actions):
+        """Hold actions for action_repeat frames -> (summed rewards, next state codes, dones)
+
+        A game that ends during the repeat keeps the reward and state of its final
+        frame; the frames it is stepped afterwards are discarded (reset follows).
+        """
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        next_codes = None
+        for _ in range(self.action_repeat):
+            _, frame_rewards, frame_dones = self.env.step(actions)
+            codes = self.env.get_state_codes()
+            live = ~dones
+            rewards[live] += frame_rewards[live]
+            next_codes = codes if next_codes is None else np.where(live[:, None], codes, next_codes)
+            dones |= live & frame_dones
+            if dones.all():
+                break
+        return rewards, next_codes, dones
+
+    def collect(self):
+        """batch_frames decisions of every env -> packed PUSH payload, ordered env by env"""
+        n, t = self.num_envs, self.batch_frames
+        states = np.empty((t, n, 5), dtype=np.int8)
+        next_states = np.empty((t, n, 5), dtype=np.int8)
+        actions = np.empty((t, n), dtype=np.int8)
+        rewards = np.empty((t, n), dtype=np.float32)
+        dones = np.empty((t, n), dtype=bool)
+        codes = self.env.get_state_codes()
+        for frame in range(t):
+            states[frame] = codes
+            actions[frame] = self.act(codes)
+            rewards[frame], next_states[frame], dones[frame] = self.step(actions[frame])
+            self.env.reset(dones[frame])
+            codes = self.env.get_state_codes()
+        swap = (1, 0)
+        return pack_transitions(states.transpose(1, 0, 2).reshape(-1, 5), actions.transpose(swap).ravel(),
+                                rewards.transpose(swap).ravel(), next_states.transpose(1, 0, 2).reshape(-1, 5),
+                                dones.transpose(swap).ravel())
+
+    def _pull(self, sock):
+        send_frame(sock, PULL, struct.pack('<I', self.version))
+        kind, payload = recv_frame(sock)
+        if kind != WEIGHTS:
+            raise ConnectionError(f"expected WEIGHTS, got {kind}")
+        version, weights = unpack_weights(payload)
+        if weights is not None:
+            self.version, self.weights = version, weights
+
+    def _push(self, sock, payload, stop):
+        """Send one batch, waiting out BUSY replies"""
+        while not stop.is_set():
+            send_frame(sock, PUSH, payload)
+            kind, reply = recv_frame(sock)
+            if kind == ACK:
+                self.pushed += struct.unpack('<I', reply)[0]
+                return True
+            if kind != BUSY:
+                raise ConnectionError(f"expected ACK or BUSY, got {kind}")
+            time.sleep(struct.unpack('<H', reply)[0] / 1000)
+        return False
+
+    def run(self, stop=None, max_batches=None):
+        """Collect and push until stop is set (or max_batches pushed); reconnects with backoff"""
+        stop = stop or threading.Event()
+        pending, batches, backoff = None, 0, 0.25
+        while not stop.is_set() and (max_batches is None or batches < max_batches):
+            try:
+                with socket.create_connection(self.address, timeout=self.timeout) as sock:
+                    send_frame(sock, HELLO, struct.pack('<I', self.actor_id))
+                    kind, welcome = recv_frame(sock)
+                    if kind != WELCOME:
+                        raise ConnectionError(f"expected WELCOME, got {kind}")
+                    self.action_repeat = max(1, struct.unpack_from('<IH', welcome)[1])
+                    backoff = 0.25
+                    while not stop.is_set() and (max_batches is None or batches < max_batches):
+                        if batches % self.pull_every == 0:
+                            self._pull(sock)
+                        if pending is None:
+                            pending = self.collect()
+                        if self._push(sock, pending, stop):
+                            pending = None
+                            batches += 1
+            except (ConnectionError, OSError, struct.error):
+                self.reconnects += 1
+                stop.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+        return self.pushed
+
+
+def _actor_process(host, port, actor_id, num_actors, num_envs, batch_frames, seed, stop):
+    actor = Actor(host, port, actor_id, num_actors, num_envs, batch_frames, seed=seed + actor_id)
+    actor.run(stop)
+
+
+def serve(server, model_path, buffer, seconds=None, report_every=5.0):
+    """Parameter-server stand-in: republish model_path when it changes, ingest into buffer, report rates"""
+    mtime, start, last_report, last_count = None, time.time(), time.time(), 0
+    while seconds is None or time.time() - start < seconds:
+        if model_path and os.path.exists(model_path) and os.path.getmtime(model_path) != mtime:
+            mtime = os.path.getmtime(model_path)
+            version = server.publish(load_weights(model_path))
+            print(f"📤 Published {os.path.basename(model_path)} as weights v{version}", flush=True)
+        server.drain_into(buffer)
+        now = time.time()
+        if now - last_report >= report_every:
+            stats = dict(server.stats)
+            rate = (stats['transitions'] - last_count) / (now - last_report)
+            print(f"   {stats['actors']} actors | {stats['transitions']:,} transitions ({rate:,.0f}/s) | "
+                  f"queue {server.ingest.qsize()}/{server.ingest.maxsize} | busy {stats['busy']} | "
+                  f"replay {len(buffer):,}", flush=True)
+            last_report, last_count = now, stats['transitions']
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pong DQN actor fleet over TCP")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('local', 'serve', 'actor'):
+        p = sub.add_parser(name)
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=5555)
+        p.add_argument('--envs', type=int, default=64, help="Games per actor")
+        p.add_argument('--batch-frames', type=int, default=32, help="Frames per pushed batch")
+        p.add_argument('--seed', type=int, default=0)
+        if name in ('local', 'serve'):
+            p.add_argument('--model', default=DEFAULT_MODEL, help="Weights to publish (reloaded when the file changes)")
+            p.add_argument('--queue', type=int, default=64, help="Ingest queue size in batches")
+            p.add_argument('--replay', type=int, default=200000, help="Replay capacity of the stand-in learner")
+            p.add_argument('--seconds', type=float, default=None)
+            p.add_argument('--action-repeat', type=int, default=1, metavar='K',
+                           help="Frames each actor holds a decision for (default: 1)")
+        if name == 'local':
+            p.add_argument('--actors', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+        if name == 'actor':
+            p.add_argument('--actor-id', type=int, default=0)
+            p.add_argument('--num-actors', type=int, default=1, help="Fleet size, for the epsilon schedule")
+    args = parser.parse_args()
+
+    if args.command == 'actor':
+        actor = Actor(args.host, args.port, args.actor_id, args.num_actors, args.envs, args.batch_frames,
+                      seed=args.seed + args.actor_id)
+        print(f"🎮 Actor {args.actor_id} -> {args.host}:{args.port} (epsilon {actor.epsilon:.4f})")
+        try:
+            actor.run()
+        except KeyboardInterrupt:
+            pass
+        print(f"   Pushed {actor.pushed:,} transitions, {actor.reconnects} reconnects")
+        return 0
+
+    server = FleetServer(args.host, args.port, args.queue, action_repeat=args.action_repeat).start()
+    buffer = ReplayBuffer(args.replay, seed=args.seed)
+    print(f"📡 Fleet server on {server.host}:{server.port} (queue {args.queue} batches, "
+          f"{args.action_repeat} frame(s) per decision)")
+    processes, stop = [], multiprocessing.Event()
+    if args.command == 'local':
+        for actor_id in range(args.actors):
+            process = multiprocessing.Process(
+                target=_actor_process, daemon=True,
+                args=(server.host, server.port, actor_id, args.actors, args.envs, args.batch_frames, args.seed, stop))
+            process.start()
+            processes.append(process)
+        print(f"🚀 Launched {args.actors} local actor processes")
+    try:
+        serve(server, args.model, buffer, args.seconds)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for process in processes:
+        process.join(timeout=5)
+    server.drain_into(buffer)
+    server.close()
+    print(f"✅ {server.stats['transitions']:,} transitions from {server.stats['connections']} connections, "
+          f"{server.stats['busy']} busy replies; replay holds {len(buffer):,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
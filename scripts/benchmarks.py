@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Pong AI toolchain
+
+Repeatable, seeded, CPU-only workloads for every stage we care about:
+- env_step_scalar / env_step_batched: PongEnv and VecPongEnv step throughput
+- env_step_native: the same batch stepped by pong_step.c (skipped without a C compiler)
+- replay_sample: replay memory sampling into training batches
+- teacher_labels: vectorized pong_ai_predict labels for imitation pretraining
+- agent_replay: DQNAgent.replay() (one Double-DQN update) per second (needs TensorFlow)
+- lut_full / lut_packed: full LUT generation for the 40x28x9x9x28 and packed 2-bit layouts
+- weight_extraction: load ../models/pong_ai_model.h5 and quantize its weights
+- c_header_write: weights header + packed LUT C array writers
+
+Results are appended to a JSON history file; `compare` flags throughput
+regressions between two runs.
+
+Usage:
+    python benchmarks.py run [--only lut_full,env_step_batched] [--repeat 5] [--label my-change]
+    python benchmarks.py compare [--baseline -2] [--threshold 0.10]
+    python benchmarks.py list
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Keep TensorFlow (when a benchmark needs it) on CPU and quiet
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(SCRIPT_DIR, '..', 'models', 'benchmarks', 'history.json')
+DEFAULT_MODEL = os.path.join(SCRIPT_DIR, '..', 'models', 'pong_ai_model.h5')
+
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark whose optional dependency or input is unavailable"""
+
+
+def benchmark(name, unit):
+    """Register fn(seed): does setup, returns run() which does the timed work and returns units done"""
+    def decorator(fn):
+        BENCHMARKS[name] = (fn, unit)
+        return fn
+    return decorator
+
+
+def _seeded_float_weights(seed):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(0, 1.0, (5, 8)), rng.normal(0, 0.3, 8),
+            rng.normal(0, 1.0, (8, 3)), rng.normal(0, 0.1, 3)]
+
+
+@benchmark('env_step_scalar', 'steps')
+def bench_env_step_scalar(seed):
+    from pong_env import PongEnv
+    num_steps = 20000
+
+    def run():
+        random.seed(seed)
+        rng = np.random.default_rng(seed)
+        actions = rng.integers(0, 3, num_steps).tolist()
+        env = PongEnv()
+        for action in actions:
+            _, _, done = env.step(action)
+            if done:
+                env.reset()
+        return num_steps
+    return run
+
+
+@benchmark('env_step_scalar_encoded', 'steps')
+def bench_env_step_scalar_encoded(seed):
+    from pong_env import PongEnv
+    num_steps = 20000
+
+    def run():
+        random.seed(seed)
+        rng = np.random.default_rng(seed)
+        actions = rng.integers(0, 3, num_steps).tolist()
+        env = PongEnv(encoded=True)
+        for action in actions:
+            _, _, done = env.step(action)
+            if done:
+                env.reset()
+        return num_steps
+    return run
+
+
+@benchmark('env_step_batched', 'steps')
+def bench_env_step_batched(seed):
+    from pong_env import VecPongEnv
+    num_envs, num_steps = 1024, 200
+
+    def run():
+        env = VecPongEnv(num_envs, seed=seed)
+        rng = np.random.default_rng(seed)
+        for _ in range(num_steps):
+            _, _, dones = env.step(rng.integers(0, 3, num_envs))
+            env.reset(dones)
+        return num_envs * num_steps
+    return run
+
+
+@benchmark('env_step_native', 'steps')
+def bench_env_step_native(seed):
+    from pong_native import NativeVecPongEnv, available
+    if not available():
+        raise SkipBenchmark("pong_step.c could not be compiled")
+    num_envs, num_steps = 1024, 200
+
+    def run():
+        env = NativeVecPongEnv(num_envs, seed=seed)
+        rng = np.random.default_rng(seed)
+        for _ in range(num_steps):
+            _, _, dones = env.step(rng.integers(0, 3, num_envs))
+            env.reset(dones)
+        return num_envs * num_steps
+    return run
+
+
+@benchmark('replay_sample', 'batches')
+def bench_replay_sample(seed):
+    from replay_buffer import ReplayBuffer
+    rng = np.random.default_rng(seed)
+    memory = ReplayBuffer(10000, 5, seed=seed)
+    for _ in range(10000):
+        memory.add(rng.integers(0, 28, 5), int(rng.integers(0, 3)), float(rng.normal()), rng.integers(0, 28, 5), False)
+    num_batches = 500
+
+    def run():
+        for _ in range(num_batches):
+            memory.sample(64)
+        return num_batches
+    return run
+
+
+@benchmark('replay_sample_mirror', 'transitions')
+def bench_replay_sample_mirror(seed):
+    from replay_buffer import ReplayBuffer
+    rng = np.random.default_rng(seed)
+    memory = ReplayBuffer(10000, 5, seed=seed)
+    for _ in range(10000):
+        memory.add(rng.integers(0, 28, 5), int(rng.integers(0, 3)), float(rng.normal()), rng.integers(0, 28, 5), False)
+    num_batches = 500
+
+    def run():
+        for _ in range(num_batches):
+            memory.sample(64, mirror=True)
+        return num_batches * 128
+    return run
+
+
+@benchmark('teacher_labels', 'states')
+def bench_teacher_labels(seed):
+    from teacher_policy import teacher_actions
+    rng = np.random.default_rng(seed)
+    n = 1_000_000
+    inputs = (rng.integers(0, 320, n), rng.integers(16, 208, n), rng.integers(-4, 5, n),
+              rng.integers(-4, 5, n), rng.integers(8, 160, n))
+
+    def run():
+        teacher_actions(*inputs)
+        return n
+    return run
+
+
+@benchmark('agent_replay', 'updates')
+def bench_agent_replay(seed):
+    try:
+        import tensorflow as tf
+        from dqn_agent import DQNAgent
+    except ImportError as e:
+        raise SkipBenchmark(f"TensorFlow unavailable ({e})")
+    tf.random.set_seed(seed)
+    agent = DQNAgent()
+    rng = np.random.default_rng(seed)
+    for _ in range(2000):
+        agent.remember(rng.integers(0, 28, 5), int(rng.integers(0, 3)), float(rng.normal()), rng.integers(0, 28, 5),
+                       False)
+    agent.replay()  # warm up tracing / first-call overhead
+    num_updates = 20
+
+    def run():
+        random.seed(seed)
+        for _ in range(num_updates):
+            agent.replay()
+        return num_updates
+    return run
+
+
+def _bench_lut(seed, layout):
+    from lut_builder import build_lut, quantize_weights
+    qweights = quantize_weights(_seeded_float_weights(seed))
+
+    def run():
+        build_lut(qweights, layout)
+        return layout.num_entries
+    return run
+
+
+@benchmark('lut_full', 'cells')
+def bench_lut_full(seed):
+    from lut_builder import FULL_LAYOUT
+    return _bench_lut(seed, FULL_LAYOUT)
+
+
+@benchmark('lut_full_symmetric', 'cells')
+def bench_lut_full_symmetric(seed):
+    from lut_builder import build_lut, quantize_weights, FULL_LAYOUT
+    qweights = quantize_weights(_seeded_float_weights(seed))
+
+    def run():
+        build_lut(qweights, FULL_LAYOUT, symmetric=True)
+        return FULL_LAYOUT.num_entries
+    return run
+
+
+@benchmark('lut_packed', 'cells')
+def bench_lut_packed(seed):
+    from lut_builder import PACKED_LAYOUT
+    return _bench_lut(seed, PACKED_LAYOUT)
+
+
+@benchmark('lut_tiers', 'cells')
+def bench_lut_tiers(seed):
+    from lut_builder import build_luts, quantize_weights, FULL_LAYOUT
+    qweights = [quantize_weights(_seeded_float_weights(seed + i)) for i in range(3)]
+
+    def run():
+        build_luts(qweights, FULL_LAYOUT)
+        return len(qweights) * FULL_LAYOUT.num_entries
+    return run
+
+
+@benchmark('weight_extraction', 'models')
+def bench_weight_extraction(seed):
+    if not os.path.exists(DEFAULT_MODEL):
+        raise SkipBenchmark(f"{DEFAULT_MODEL} not found")
+    from keras_weights import load_weights
+    from lut_builder import quantize_weights
+
+    def run():
+        quantize_weights(load_weights(DEFAULT_MODEL))
+        return 1
+    return run
+
+
+@benchmark('c_header_write', 'files')
+def bench_c_header_write(seed):
+    from lut_builder import (build_lut, quantize_weights, lut_to_bytes, write_weights_header,
+                             write_lut_c_array, PACKED_LAYOUT)
+    qweights = quantize_weights(_seeded_float_weights(seed))
+    lut_bytes = lut_to_bytes(build_lut(qweights, PACKED_LAYOUT), PACKED_LAYOUT)
+    out_dir = tempfile.mkdtemp(prefix='pong_bench_')
+
+    def run():
+        write_weights_header(os.path.join(out_dir, 'weights_generated.h'), qweights)
+        write_lut_c_array(os.path.join(out_dir, 'ai_lut_generated.h'), lut_bytes)
+        return 2
+    return run
+
+
+def run_benchmarks(names, repeat, seed):
+    results = {}
+    for name in names:
+        fn, unit = BENCHMARKS[name]
+        try:
+            run = fn(seed)
+        except SkipBenchmark as e:
+            print(f"  {name:<20} skipped: {e}")
+            results[name] = {'skipped': str(e)}
+            continue
+        run()  # warm-up
+        timings = []
+        units = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            units = run()
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        results[name] = {
+            'unit': unit,
+            'work': units,
+            'median_s': median,
+            'best_s': min(timings),
+            'throughput': units / median,
+        }
+        print(f"  {name:<20} {units / median:14,.1f} {unit}/s  (median {median * 1e3:8.2f} ms, best {min(timings) * 1e3:8.2f} ms)")
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _select_run(runs, ref):
+    """Pick a run by negative/positive index or by label"""
+    try:
+        return runs[int(ref)]
+    except ValueError:
+        for run in reversed(runs):
+            if run.get('label') == ref:
+                return run
+    raise SystemExit(f"❌ No benchmark run matching '{ref}'")
+
+
+def compare_runs(baseline, current, threshold):
+    """Print per-benchmark throughput change; return names that regressed beyond threshold"""
+    regressions = []
+    print(f"Baseline: {baseline['timestamp']} {baseline.get('label') or ''} ({baseline.get('git') or '?'})")
+    print(f"Current:  {current['timestamp']} {current.get('label') or ''} ({current.get('git') or '?'})")
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or 'throughput' not in base or 'throughput' not in cur:
+            print(f"  {name:<20} (not comparable)")
+            continue
+        change = cur['throughput'] / base['throughput'] - 1.0
+        flag = ""
+        if change < -threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        elif change > threshold:
+            flag = "  (faster)"
+        print(f"  {name:<20} {base['throughput']:14,.1f} -> {cur['throughput']:14,.1f} {cur['unit']}/s ({change * 100:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pong AI benchmark suite")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help="Run benchmarks and append results to the history")
+    run_p.add_argument('--only', help="Comma-separated benchmark names")
+    run_p.add_argument('--repeat', type=int, default=5)
+    run_p.add_argument('--seed', type=int, default=1234)
+    run_p.add_argument('--label', help="Label stored with this run (e.g. branch or change name)")
+    run_p.add_argument('--no-save', action='store_true', help="Do not write the history file")
+
+    cmp_p = sub.add_parser('compare', help="Compare two runs from the history")
+    cmp_p.add_argument('--baseline', default='-2', help="Run index or label (default: previous run)")
+    cmp_p.add_argument('--current', default='-1', help="Run index or label (default: latest run)")
+    cmp_p.add_argument('--threshold', type=float, default=0.10, help="Allowed slowdown fraction (default 0.10)")
+
+    sub.add_parser('list', help="List available benchmarks")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, (_, unit) in BENCHMARKS.items():
+            print(f"  {name:<20} ({unit}/s)")
+        return 0
+
+    if args.command == 'compare':
+        runs = load_history(args.history)['runs']
+        if len(runs) < 2:
+            print("Need at least two runs in the history to compare")
+            return 1
+        regressions = compare_runs(_select_run(runs, args.baseline), _select_run(runs, args.current), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+        return 0
+
+    names = list(BENCHMARKS) if not args.only else [n.strip() for n in args.only.split(',')]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmark(s): {', '.join(unknown)}")
+        return 1
+
+    print(f"⏱️  Running {len(names)} benchmark(s), {args.repeat} repeats, seed {args.seed}")
+    results = run_benchmarks(names, args.repeat, args.seed)
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'git': _git_revision(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        'results': results,
+    }
+    if not args.no_save:
+        history = load_history(args.history)
+        history['runs'].append(record)
+        save_history(args.history, history)
+        print(f"📁 Results appended to {os.path.abspath(args.history)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, SCRIPT_DIR)
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Asynchronous, atomic model checkpointing for Pong DQN training
+
+The training thread only snapshots the weights (67 floats) and returns; a
+background thread copies them into a private clone of the model and writes
+the .h5 via temp-file-then-rename, so a crash mid-write can never leave a
+truncated pong_ai_model.h5 behind.
+
+Peak-reward checkpoints are debounced (only the latest peak within the
+window is written) and pruned with a retention policy: keep the top-K peaks
+by reward plus the N most recent, delete the rest.
+
+Other slow writes (e.g. the full training state) can be queued with
+run_async() so they happen on the same thread, in order.
+"""
+
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+PEAK_PATTERN = re.compile(r'^pong_ai_model_peak_(-?[0-9.]+)_ep(\d+)_(\d{8}_\d{6})\.h5$')
+
+
+def atomic_tmp_path(path):
+    """Temp path in the same directory that keeps the extension (Keras picks the format from it)"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.tmp{ext}"
+
+
+class CheckpointManager:
+    def __init__(self, model, models_dir='../models', peak_debounce_s=30.0, keep_top_k=5, keep_last_n=3):
+        from tensorflow import keras
+
+        self.models_dir = models_dir
+        self.peak_debounce_s = peak_debounce_s
+        self.keep_top_k = keep_top_k
+        self.keep_last_n = keep_last_n
+        os.makedirs(models_dir, exist_ok=True)
+
+        # Private copy of the architecture, only ever touched by the writer thread
+        self._writer_model = keras.models.clone_model(model)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_peak = None
+        self._last_peak_write = 0.0
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def save(self, model, path):
+        """Snapshot weights now, write to path in the background"""
+        self._queue.put((path, model.get_weights()))
+        return path
+
+    def save_weights(self, weights, path):
+        """Write an already-snapshotted weight list to path in the background"""
+        self._queue.put((path, weights))
+        return path
+
+    def save_peak(self, model, reward, episode):
+        """Debounced peak save: only the latest peak inside the debounce window is written"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.models_dir, f'pong_ai_model_peak_{reward:.2f}_ep{episode}_{timestamp}.h5')
+        weights = model.get_weights()  # outside the lock: only plain assignments run while holding it
+        with self._lock:
+            self._pending_peak = (path, weights)
+            due = self._last_peak_write + self.peak_debounce_s
+        if time.time() >= due:
+            self._queue.put('peak')
+        return path
+
+    def run_async(self, fn, *args):
+        """Run fn(*args) on the writer thread, in order with the checkpoint writes"""
+        self._queue.put(('job', fn, args))
+
+    def flush(self):
+        """Queue any debounced peak immediately and wait for all pending writes"""
+        self._queue.put('peak')
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # Write a debounced peak once its window has passed
+                with self._lock:
+                    overdue = (self._pending_peak is not None and
+                               time.time() >= self._last_peak_write + self.peak_debounce_s)
+                if overdue:
+                    self._write_pending_peak()
+                continue
+            try:
+                if item is None:
+                    return
+                if item == 'peak':
+                    self._write_pending_peak()
+                elif item[0] == 'job':
+                    self._run_job(item[1], item[2])
+                else:
+                    self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write_pending_peak(self):
+        with self._lock:
+            pending = self._pending_peak
+            self._pending_peak = None
+            if pending is not None:
+                self._last_peak_write = time.time()
+        if pending is None:
+            return
+        if self._write(*pending):
+            print(f"           >>> PEAK REWARD MODEL SAVED: {pending[0]} <<<", flush=True)
+        self.apply_retention()
+
+    def _run_job(self, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"           >>> Error in background job {getattr(fn, '__name__', fn)}: {e}", flush=True)
+
+    def _write(self, path, weights):
+        tmp_path = atomic_tmp_path(path)
+        try:
+            self._writer_model.set_weights(weights)
+            self._writer_model.save(tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"           >>> Error saving checkpoint {path}: {e}", flush=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def apply_retention(self):
+        """Keep the top-K peak checkpoints by reward plus the last N written; delete the rest"""
+        peaks = []
+        for fname in os.listdir(self.models_dir):
+            match = PEAK_PATTERN.match(fname)
+            if match:
+                peaks.append((float(match.group(1)), match.group(3), fname))
+        if len(peaks) <= self.keep_top_k + self.keep_last_n:
+            return []
+        keep = {p[2] for p in sorted(peaks, key=lambda p: p[0], reverse=True)[:self.keep_top_k]}
+        keep |= {p[2] for p in sorted(peaks, key=lambda p: p[1], reverse=True)[:self.keep_last_n]}
+        removed = []
+        for _, _, fname in peaks:
+            if fname not in keep:
+                try:
+                    os.remove(os.path.join(self.models_dir, fname))
+                    removed.append(fname)
+                except OSError as e:
+                    print(f"[Checkpoint] Could not remove {fname}: {e}", flush=True)
+        return removed
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Double-DQN agent for Genesis Pong (5 inputs -> 8 hidden -> 3 outputs, matches ai.c)
+
+Imports TensorFlow at module level: import this only after the thread/BLAS
+environment variables are configured (see pong_ai_train.py).
+"""
+
+import time
+
+import numpy as np
+from tensorflow import keras
+from keras import layers
+
+from train_profiler import PhaseProfiler
+from replay_buffer import ReplayBuffer
+from pong_env import decode_states
+from qat import build_qat_model
+
+
+# DQN Agent for learning
+class DQNAgent:
+    def __init__(self, state_size=5, action_size=3, profiler=None, quantization_aware=False, mirror_augment=False,
+                 n_step=1):
+        self.state_size = state_size
+        self.action_size = action_size
+        self.quantization_aware = quantization_aware  # train through the Genesis fixed-point forward pass (qat.py)
+        self.mirror_augment = mirror_augment  # replay batches also carry their vertical mirror (replay_buffer.py)
+        self.n_step = n_step  # n-step returns from consecutive replay transitions
+        self.gamma = 0.95  # discount per decision
+        self.memory = ReplayBuffer(10000, state_size, seed=42)  # Optimized for M1 Pro 16GB - good balance of memory and diversity
+        
+        # Improved epsilon scheduling (linear decay like reference implementation)
+        self.epsilon = 1.0  # Start with full exploration
+        self.epsilon_start = 1.0  # Lowered after imitation pretraining
+        self.epsilon_min = 0.01  # Lower minimum for better final performance
+        self.epsilon_decay_steps = 3000  # Linear decay over first 3000 episodes
+        self.learning_rate = 1e-4  # Lower, more stable learning rate
+        self.initial_learning_rate = 1e-4
+        
+        # Training schedule parameters (modern practices with Adam)
+        self.learning_starts = 1000  # Wait longer before training starts
+        self.learning_freq = 4  # Train every 4 steps for stability
+        self.target_update_freq = 2000  # Update target model every 2000 steps
+        self.batch_size = 64  # Larger batch for more stable gradients
+        
+        self.step_count = 0
+        self.episode_count = 0
+        self.rng = np.random.default_rng(42)  # Reproducible random seed
+        self.first_replay_done = False  # Track first replay completion
+        self.profiler = profiler if profiler is not None else PhaseProfiler()
+        
+        # Build neural network models
+        self.model = self._build_model()
+        self.target_model = self._build_model()
+        self.update_target_model()
+
+    def _build_model(self):
+        if self.quantization_aware:
+            model = build_qat_model(self.state_size, 8, self.action_size)
+            self.compile_model(model)
+            return model
+        # Match the exact architecture used in ai.c: 5 inputs -> 8 hidden -> 3 outputs
+        # Optimized for M1 Pro with explicit dtype and modern Keras syntax
+        model = keras.Sequential([
+            layers.Input(shape=(self.state_size,)),  # Modern Keras input layer
+            layers.Dense(8, activation='relu', dtype='float32'),  # 8 hidden neurons to match ai.c
+            layers.Dense(self.action_size, activation='linear', dtype='float32')              # 3 output actions (up, stay, down)
+        ])
+        self.compile_model(model)
+        return model
+
+    def compile_model(self, model):
+        """Compile with the training loss/optimizer (also used for models loaded from disk)"""
+        # Use Adam optimizer (modern best practice - better than RMSprop with experience replay)
+        # Google Brain showed Adam significantly improves DQN performance
+        optimizer = keras.optimizers.Adam(learning_rate=self.learning_rate, epsilon=1e-4, clipnorm=1.0)
+        # Use Huber loss (Smooth L1) which is more stable for Q-learning
+        model.compile(loss='huber', optimizer=optimizer, jit_compile=False)
+
+    def pretrain_imitation(self, states, actions, epochs=3, batch_size=4096, learning_rate=3e-3,
+                           validation_split=0.05):
+        """Fit the Q-network as a classifier of teacher actions (outputs used as logits)
+
+        Large batches keep this fast even with eager execution. The model is
+        recompiled with the RL loss/optimizer afterwards and the target network synced.
+        Returns the final validation accuracy (agreement with the teacher).
+        """
+        self.model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                           loss=keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+                           metrics=['accuracy'])
+        history = self.model.fit(states, actions.astype(np.int32), epochs=epochs, batch_size=batch_size,
+                                 validation_split=validation_split, shuffle=True, verbose=2)
+        self.compile_model(self.model)
+        self.update_target_model()
+        return history.history.get('val_accuracy', [0.0])[-1]
+
+    def update_target_model(self):
+        self.target_model.set_weights(self.model.get_weights())
+
+    def remember(self, state, action, reward, next_state, done):
+        self.memory.add(state, action, reward, next_state, done)
+
+    def act(self, state):
+        """Epsilon-greedy action for a state code (PongEnv.get_state_code)"""
+        self.step_count += 1
+        
+        # Update target model periodically
+        if self.step_count % self.target_update_freq == 0:
+            with self.profiler.phase('target_sync'):
+                self.update_target_model()
+        
+        # Linear epsilon decay (like reference implementation)
+        if self.episode_count < self.epsilon_decay_steps:
+            self.epsilon = self.epsilon_start - (self.episode_count / self.epsilon_decay_steps) * (self.epsilon_start - self.epsilon_min)
+        else:
+            self.epsilon = self.epsilon_min
+            
+        if self.rng.random() <= self.epsilon:
+            return self.rng.integers(0, self.action_size)
+        with self.profiler.phase('act_predict'):
+            q_values = self.model.predict(decode_states(state).reshape(1, -1), verbose=0)
+        return np.argmax(q_values[0])
+
+    def replay(self, batch_size=None):  # Use agent's batch_size if not specified
+        if batch_size is None:
+            batch_size = self.batch_size
+        if len(self.memory) < batch_size:
+            return
+        
+        replay_start = time.time()  # Track replay timing for first run
+        
+        with self.profiler.phase('replay_sample'):
+            states, actions, rewards, next_states, dones, discounts = self.memory.sample(
+                batch_size, mirror=self.mirror_augment, n_step=self.n_step, gamma=self.gamma)
+
+        with self.profiler.phase('target_compute'):
+            # Double DQN: Use main model to select action, target model to evaluate
+            current_q_values = self.model.predict(states, verbose=0)
+            next_q_values_main = self.model.predict(next_states, verbose=0)
+            next_q_values_target = self.target_model.predict(next_states, verbose=0)
+
+            target_q_values = current_q_values.copy()
+            
+            for i in range(len(actions)):
+                if dones[i]:
+                    target_q_values[i][actions[i]] = rewards[i]
+                else:
+                    # Double DQN update
+                    best_action = np.argmax(next_q_values_main[i])
+                    target_q_values[i][actions[i]] = rewards[i] + discounts[i] * next_q_values_target[i][best_action]
+
+        with self.profiler.phase('fit'):
+            history = self.model.fit(states, target_q_values, epochs=1, verbose=0)
+        # Save last loss for stats
+        self.last_loss = history.history['loss'][0] if 'loss' in history.history else 0.0
+
+        if not self.first_replay_done:
+            replay_time = time.time() - replay_start
+            print(f"[INFO] First replay completed in {replay_time:.2f}s", flush=True)
+            self.first_replay_done = True
+    
+    def update_model(self):
+        # Final update of target model
+        self.update_target_model()
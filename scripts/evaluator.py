@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Background greedy evaluation for Pong DQN training
+
+Training reward mixes epsilon exploration with the shaping terms, so it is a
+noisy way to pick the best model. The evaluator plays a weight snapshot
+greedily against the scripted opponent in VecPongEnv and reports the
+unshaped result: the share of points won, with one point per game.
+
+Each snapshot is played twice from the same seeded serves:
+- float: the Keras network (keras_weights.dense_forward on get_state inputs)
+- lut: the quantized network's full-layout LUT, i.e. what the ROM plays
+
+BackgroundEvaluator runs this on a worker thread, so the training thread only
+pays for get_weights() (the games are NumPy batch ops, which release the GIL
+for most of their time). A worker process is not an option: pong_ai_train.py
+trains at import time, so a spawned child would start a second training run.
+A snapshot submitted while the previous one is still being played is
+skipped, so evaluations never queue up.
+
+Usage:
+    python evaluator.py ../models/pong_ai_model.h5 --games 4096
+"""
+
+import argparse
+import concurrent.futures
+import sys
+import time
+
+import numpy as np
+
+from pong_native import make_vec_env
+from lut_builder import FULL_LAYOUT, build_lut, quantize_weights
+from keras_weights import load_weights, dense_forward
+
+
+def play_greedy(policy, num_games, max_frames=3000, seed=0):
+    """Points won by policy(env) -> actions, one point per game -> (won, lost, unfinished)"""
+    env = make_vec_env(num_games, seed=seed)
+    playing = np.ones(num_games, dtype=bool)
+    won = lost = 0
+    for _ in range(max_frames):
+        _, _, dones = env.step(policy(env))
+        finished = dones & playing
+        won += int((finished & (env.ball_x <= 0)).sum())
+        lost += int((finished & (env.ball_x > 0)).sum())
+        playing &= ~dones
+        if not playing.any():
+            break
+        env.reset(dones)
+    return won, lost, int(playing.sum())
+
+
+def evaluate_weights(weights, num_games=2048, max_frames=3000, seed=0, symmetric=False):
+    """Greedy win rates of float weights [w1, b1, w2, b2], as float network and as full LUT"""
+    start = time.time()
+    lut = build_lut(quantize_weights(weights), FULL_LAYOUT, symmetric=symmetric).ravel()
+
+    def float_policy(env):
+        return np.argmax(dense_forward(weights, env.get_state()), axis=1)
+
+    def lut_policy(env):
+        index, _ = FULL_LAYOUT.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        return lut[index]
+
+    result = {'games': num_games}
+    for name, policy in (('float', float_policy), ('lut', lut_policy)):
+        won, lost, unfinished = play_greedy(policy, num_games, max_frames, seed)
+        result[f'{name}_win_rate'] = won / max(won + lost, 1)
+        result[f'{name}_unfinished'] = unfinished
+    result['seconds'] = time.time() - start
+    return result
+
+
+class BackgroundEvaluator:
+    """Evaluates weight snapshots on a worker thread without blocking the caller"""
+
+    def __init__(self, num_games=2048, max_frames=3000, seed=0, symmetric=False):
+        self.num_games = num_games
+        self.max_frames = max_frames
+        self.seed = seed
+        self.symmetric = symmetric
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='greedy-eval')
+        self._pending = None
+
+    @property
+    def busy(self):
+        return self._pending is not None and not self._pending[2].done()
+
+    def submit(self, episode, weights):
+        """Queue a snapshot; returns False (and drops it) if the previous one is still running"""
+        if self.busy:
+            return False
+        weights = [np.array(w) for w in weights]
+        future = self._executor.submit(evaluate_weights, weights, self.num_games, self.max_frames, self.seed,
+                                       self.symmetric)
+        self._pending = (episode, weights, future)
+        return True
+
+    def poll(self):
+        """(episode, weights, result) of a finished evaluation, or None; never blocks"""
+        if self._pending is None or not self._pending[2].done():
+            return None
+        episode, weights, future = self._pending
+        self._pending = None
+        try:
+            return episode, weights, future.result()
+        except Exception as e:
+            print(f"           >>> Evaluation of episode {episode} failed: {e}", flush=True)
+            return None
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy float and LUT win rate of a saved model")
+    parser.add_argument('model', help="Keras .h5/.keras model")
+    parser.add_argument('--games', type=int, default=2048)
+    parser.add_argument('--max-frames', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--symmetric', action='store_true', help="Evaluate the mirror-symmetric LUT")
+    args = parser.parse_args()
+
+    result = evaluate_weights(load_weights(args.model), args.games, args.max_frames, args.seed, args.symmetric)
+    print(f"🎯 {args.model}: float {result['float_win_rate'] * 100:.1f}%, LUT {result['lut_win_rate'] * 100:.1f}% "
+          f"of the decided games vs the scripted opponent ({result['seconds']:.1f}s)")
+    print(f"   {args.games} games, still rallying after {args.max_frames} frames: "
+          f"float {result['float_unfinished']}, LUT {result['lut_unfinished']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,185 @@
 #!/usr/bin/env python3
 """
 Export trained model for web pong game
-Converts the trained Keras model to TensorFlow.js format and provides weight extraction
+Writes the weights as JSON (read directly from the .h5, no TensorFlow needed) and,
+when tensorflowjs is installed, also converts the model to TensorFlow.js format
+
+It also writes the AI bundle for the WebAssembly engine (pong.c load_ai_bundle):
+one binary file with the exact x1024 integer weights and the 2-bit packed LUT,
+so the browser runs the integer network and the console's O(1) lookup without TF.js.
+The file is named by the hash of its bytes (ai_bundle.<sha256[:16]>.bin) and can be
+served with Cache-Control: immutable; the small ai_bundle.json manifest names
+the current file and must be revalidated.
+
+Bundle layout (little-endian, BUNDLE_HEADER_SIZE-byte header, then the payload):
+- magic b'PAIB', format version, header size
+- network: input/hidden/output sizes, product shift (10), tile divisors of the
+  ball_x/ball_y/ai_y inputs (NN_DIVISORS)
+- LUT: axis lengths, bits per entry, tile offsets of index 0, first vx and vy
+  value, active ball_x pixel range
+- payload sizes and the SHA-256 of the payload
+- payload: s16 weights (w1 [in][hidden], b1, w2 [hidden][out], b2), then the LUT
+  bytes exactly as in pong/res (actions 0=stay, 1=up, 2=down)
+
+The web network normalizes tiles with the divisors in the header. The default
+'training' set (/39, /27, /27) is PongEnv.get_state's, which the weights were
+trained with and the LUT encodes, so the network agrees with the bundled LUT
+cell for cell. It does not reproduce pong_ai_NN in ai.c, which divides by /17
+and /25. 'console' exports those instead to play like pong_ai_NN (apart from
+its s16 wraparound of hidden sums).
+
+Usage:
+    python export_web_model.py
+    python export_web_model.py --model ../models/pong_ai_model_best.h5 --symmetric-lut
+    python export_web_model.py --nn-divisors console     # web network plays like pong_ai_NN
 """
 
+import argparse
+import hashlib
+import json
 import os
+import struct
 import sys
-import tensorflow as tf
-import tensorflowjs as tfjs
+import time
 import numpy as np
 
-def export_model_for_web():
+from keras_weights import load_weights
+from lut_builder import (FULL_LAYOUT, LAYOUTS, PACKED_LAYOUT, SCALE_FACTOR, build_lut, lut_to_bytes,
+                         quantize_weights)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WEB_EXPORT_DIR = os.path.join(SCRIPT_DIR, '..', 'pong-ai-web', 'public', 'models')
+
+BUNDLE_MAGIC = b'PAIB'
+BUNDLE_VERSION = 1
+BUNDLE_MANIFEST = 'ai_bundle.json'
+# magic, version, header size | in, hidden, out, shift, bx/by/ay divisors |
+# LUT axis lengths (5), bits, tile offsets (3), vx0, vy0, pad, active_x lo/hi |
+# weights bytes, LUT bytes, payload sha256, reserved
+BUNDLE_HEADER = struct.Struct('<4sHH BBBBHHH 5BB3Bbbx HH II32s6x')
+BUNDLE_HEADER_SIZE = BUNDLE_HEADER.size  # 80
+NN_DIVISORS = {
+    'training': (FULL_LAYOUT.bx_div, FULL_LAYOUT.by_div, FULL_LAYOUT.ay_div),  # 39, 27, 27
+    'console': (17, 25, 25),  # pong_ai_NN in ai.c
+}
+
+
+def pack_ai_bundle(qweights, layout=PACKED_LAYOUT, symmetric=False, nn_divisors='training'):
+    """Quantized weights -> (bundle bytes, sha256 hex of the whole bundle); the LUT is built from the same weights
+
+    The file hash covers the header too, so bundles that differ only in header
+    fields (e.g. nn_divisors) get different names.
+    """
+    for w in qweights:
+        if np.abs(w).max(initial=0) > 32767:
+            raise ValueError("Quantized weights do not fit s16; the engines cannot run this model")
+    weights_blob = b''.join(np.asarray(w, dtype='<i2').tobytes() for w in qweights)
+    lut_blob = lut_to_bytes(build_lut(qweights, layout, symmetric=symmetric), layout)
+    payload = weights_blob + lut_blob
+    digest = hashlib.sha256(payload).digest()
+    active_x = layout.active_x or (0, 0xFFFF)
+    header = BUNDLE_HEADER.pack(
+        BUNDLE_MAGIC, BUNDLE_VERSION, BUNDLE_HEADER_SIZE,
+        qweights[0].shape[0], qweights[0].shape[1], qweights[3].shape[0], SCALE_FACTOR.bit_length() - 1,
+        *NN_DIVISORS[nn_divisors],
+        *layout.shape, layout.bits_per_entry, *layout.tile_offsets,
+        int(layout.vx_values[0]), int(layout.vy_values[0]), *active_x,
+        len(weights_blob), len(lut_blob), digest)
+    bundle = header + payload
+    return bundle, hashlib.sha256(bundle).hexdigest()
+
+
+def read_ai_bundle(data):
+    """Parse and verify a bundle -> dict with 'qweights', 'lut_bytes', 'layout' (a LAYOUTS name or None),
+    'nn_divisors', 'sha256' (of the whole bundle)"""
+    if len(data) < BUNDLE_HEADER_SIZE:
+        raise ValueError("Truncated AI bundle header")
+    fields = BUNDLE_HEADER.unpack_from(data)
+    magic, version, header_size, n_in, n_hidden, n_out = fields[:6]
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION or header_size != BUNDLE_HEADER_SIZE:
+        raise ValueError(f"Not a version {BUNDLE_VERSION} AI bundle")
+    shape, bits, offsets = tuple(fields[10:15]), fields[15], tuple(fields[16:19])
+    weights_bytes, lut_bytes, digest = fields[23:26]
+    payload = data[header_size:]
+    if len(payload) != weights_bytes + lut_bytes or hashlib.sha256(payload).digest() != digest:
+        raise ValueError("AI bundle payload does not match its header")
+    sizes = [(n_in, n_hidden), (n_hidden,), (n_hidden, n_out), (n_out,)]
+    flat = np.frombuffer(payload[:weights_bytes], dtype='<i2').astype(np.int64)
+    qweights, start = [], 0
+    for size in sizes:
+        count = int(np.prod(size))
+        qweights.append(flat[start:start + count].reshape(size))
+        start += count
+    layout = next((name for name, l in LAYOUTS.items()
+                   if l.shape == shape and l.bits_per_entry == bits and tuple(l.tile_offsets) == offsets), None)
+    return {'qweights': qweights, 'lut_bytes': payload[weights_bytes:], 'layout': layout,
+            'nn_divisors': tuple(fields[7:10]), 'sha256': hashlib.sha256(data).hexdigest()}
+
+
+def write_ai_bundle(directory, bundle, digest, layout=PACKED_LAYOUT):
+    """Write ai_bundle.<hash>.bin and point the manifest at it -> (bundle path, manifest path)"""
+    name = f"ai_bundle.{digest[:16]}.bin"
+    bundle_path = os.path.join(directory, name)
+    with open(bundle_path, 'wb') as f:
+        f.write(bundle)
+    manifest_path = os.path.join(directory, BUNDLE_MANIFEST)
+    with open(manifest_path, 'w') as f:
+        json.dump({'file': name, 'sha256': digest, 'bytes': len(bundle), 'version': BUNDLE_VERSION,
+                   'layout': layout.name}, f, indent=2)
+    return bundle_path, manifest_path
+
+
+def find_model():
+    for path in ('../models/pong_ai_model.h5', '../pong_ai_model.h5'):
+        path = os.path.join(SCRIPT_DIR, path)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def export_model_for_web(model_path=None, web_export_dir=DEFAULT_WEB_EXPORT_DIR, symmetric=False,
+                         nn_divisors='training'):
     """Export the trained model for web use"""
-    
+
     # Find the model
-    model_path = '../models/pong_ai_model.h5'
-    if not os.path.exists(model_path):
-        model_path = '../pong_ai_model.h5'
-        if not os.path.exists(model_path):
-            print("❌ Error: Could not find pong_ai_model.h5")
-            print("   Make sure you've trained a model first using pong_ai_train.py")
-            return False
-    
+    model_path = model_path or find_model()
+    if not model_path or not os.path.exists(model_path):
+        print("❌ Error: Could not find pong_ai_model.h5")
+        print("   Make sure you've trained a model first using pong_ai_train.py")
+        return False
+
     print(f"📁 Loading model from: {model_path}")
-    
+
     try:
-        # Load the model
-        model = tf.keras.models.load_model(model_path, compile=False)
+        # Load the weights
+        weights = load_weights(model_path)
         print("✅ Model loaded successfully!")
-        
+
         # Create web export directory
-        web_export_dir = '../pong-ai-web/public/models'
         os.makedirs(web_export_dir, exist_ok=True)
-        
-        # Export to TensorFlow.js format
+
+        # Export to TensorFlow.js format (needs the full TensorFlow stack, imported only here)
         tfjs_path = os.path.join(web_export_dir, 'pong_ai_model')
-        tfjs.converters.save_keras_model(model, tfjs_path)
-        print(f"✅ Model exported to: {tfjs_path}")
-        
+        try:
+            import tensorflow as tf
+            import tensorflowjs as tfjs
+            # Plain Dense layers from the weights: QAT models (qat.py) have custom layers TF.js cannot run
+            model = tf.keras.Sequential([tf.keras.layers.Input(shape=(weights[0].shape[0],)),
+                                         tf.keras.layers.Dense(weights[0].shape[1], activation='relu'),
+                                         tf.keras.layers.Dense(weights[2].shape[1])])
+            model.set_weights(weights)
+            tfjs.converters.save_keras_model(model, tfjs_path)
+            print(f"✅ Model exported to: {tfjs_path}")
+        except ImportError as e:
+            tfjs_path = None
+            print(f"⚠️  Skipping TensorFlow.js export ({e}); weights.json is still written")
+
         # Also export just the weights as JSON for easier integration
-        weights = model.get_weights()
         layer1_weights = weights[0].tolist()  # 5x8
         layer1_bias = weights[1].tolist()     # 8
-        layer2_weights = weights[2].tolist()  # 8x3  
+        layer2_weights = weights[2].tolist()  # 8x3
         layer2_bias = weights[3].tolist()     # 3
-        
+
         # Create weights object
         weights_data = {
             'architecture': {
@@ -61,38 +196,59 @@ def export_model_for_web():
             'metadata': {
                 'scale_factor': 1024,
                 'activation': 'relu',
-                'export_timestamp': tf.timestamp().numpy().item()
+                'export_timestamp': time.time()
             }
         }
-        
+
         # Save weights as JSON
-        import json
         weights_path = os.path.join(web_export_dir, 'weights.json')
         with open(weights_path, 'w') as f:
             json.dump(weights_data, f, indent=2)
-        
+
         print(f"✅ Weights exported to: {weights_path}")
-        
+
+        # Integer weights + packed LUT for the WASM engine, checked by reading it back
+        bundle, digest = pack_ai_bundle(quantize_weights(weights), PACKED_LAYOUT, symmetric=symmetric,
+                                        nn_divisors=nn_divisors)
+        read_ai_bundle(bundle)
+        bundle_path, manifest_path = write_ai_bundle(web_export_dir, bundle, digest)
+        print(f"✅ AI bundle exported to: {bundle_path} ({len(bundle):,} bytes, sha256 {digest[:16]}, "
+              f"network divisors {'/'.join(map(str, NN_DIVISORS[nn_divisors]))})")
+
         # Print summary
         print("\n" + "="*50)
         print("🎯 EXPORT COMPLETE!")
         print("="*50)
-        print(f"Model architecture: {model.count_params()} parameters")
-        print(f"Input shape: {model.input_shape}")
-        print(f"Output shape: {model.output_shape}")
+        print(f"Model architecture: {sum(w.size for w in weights)} parameters")
+        print(f"Input shape: (None, {weights[0].shape[0]})")
+        print(f"Output shape: (None, {weights[-1].shape[0]})")
         print("\nFiles created:")
-        print(f"  📁 {tfjs_path}/model.json")
-        print(f"  📁 {tfjs_path}/model_weights.bin")
+        if tfjs_path:
+            print(f"  📁 {tfjs_path}/model.json")
+            print(f"  📁 {tfjs_path}/model_weights.bin")
         print(f"  📁 {weights_path}")
+        print(f"  📁 {bundle_path}")
+        print(f"  📁 {manifest_path}")
         print("\n🌐 Your model is now ready for the web pong game!")
-        
+
         return True
-        
+
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
 
+def main():
+    parser = argparse.ArgumentParser(description="Export the trained model for the web game")
+    parser.add_argument('--model', default=None, help="Keras .h5 model (default: models/pong_ai_model.h5)")
+    parser.add_argument('--out', default=DEFAULT_WEB_EXPORT_DIR, help="Web models directory")
+    parser.add_argument('--symmetric-lut', action='store_true', help="Build the bundled LUT mirror-symmetric")
+    parser.add_argument('--nn-divisors', choices=sorted(NN_DIVISORS), default='training',
+                        help="Tile divisors of the web network: 'training' matches the LUT (/39, /27), "
+                             "'console' matches pong_ai_NN in ai.c (/17, /25)")
+    args = parser.parse_args()
+    return 0 if export_model_for_web(args.model, args.out, symmetric=args.symmetric_lut,
+                                     nn_divisors=args.nn_divisors) else 1
+
+
 if __name__ == "__main__":
-    success = export_model_for_web()
-    if not success:
-        sys.exit(1)
+    sys.exit(main())
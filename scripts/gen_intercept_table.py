@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Intercept-prediction tables for pong_ai_predict (ai.c)
+
+pong_ai_predict computes (290 - ball_x) / ball_vx and then reflects the
+projected y off the walls in a while loop, every frame. These two tables make
+it O(1) and exact, with no division and no loop:
+
+    t = time_table[(vx - 1) * INTERCEPT_X_COUNT + ball_x]        (s16, big-endian)
+    ball_future_y = fold_table[ball_y + vy * t - INTERCEPT_FOLD_MIN]  (u8)
+
+A single (ball_x tile, ball_y, vx, vy) table cannot be exact, because the
+time to the paddle depends on the pixel x, and a per-pixel 4D table would be
+2.5 MB. The factored form covers every ball_x pixel in about 5 KB.
+
+Outputs:
+- ../pong/res/ai_intercept.bin: time_table followed by fold_table (BIN ai_intercept_bin in resources.res)
+- ../pong/inc/ai_intercept.h: domain and offset constants used by ai.c
+
+The verifier replays the C lookup from the written bytes over the full input
+domain (ball_x 0..319, ball_y 0..223, vx 1..4, vy -4..4) and compares it with
+a line-by-line port of the C loop.
+
+Usage:
+    python gen_intercept_table.py [--verify-only]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from teacher_policy import time_to_paddle, reflect_y, predict_future_y_scalar
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BIN = os.path.join(SCRIPT_DIR, '..', 'pong', 'res', 'ai_intercept.bin')
+DEFAULT_HEADER = os.path.join(SCRIPT_DIR, '..', 'pong', 'inc', 'ai_intercept.h')
+
+X_COUNT = 320          # ball_x 0..319
+Y_COUNT = 224          # ball_y 0..223
+VX_VALUES = np.arange(1, 5)
+VY_VALUES = np.arange(-4, 5)
+
+
+def build_tables():
+    """-> (time_table int16 (4, 320), fold_table uint8, fold_min)"""
+    ball_x = np.arange(X_COUNT)
+    times = time_to_paddle(ball_x[None, :], VX_VALUES[:, None])
+    vy_t = VY_VALUES[:, None, None] * times[None]
+    fold_min = int(vy_t.min())
+    fold_max = int(vy_t.max()) + Y_COUNT - 1
+    fold = reflect_y(np.arange(fold_min, fold_max + 1))
+    assert fold.min() >= 0 and fold.max() <= 255
+    return times.astype(np.int16), fold.astype(np.uint8), fold_min
+
+
+def tables_to_bytes(times, fold):
+    """Big-endian s16 time table (68000 byte order) followed by the u8 fold table"""
+    return times.astype('>i2').tobytes() + fold.tobytes()
+
+
+def write_header(path, times, fold, fold_min):
+    guard = "AI_INTERCEPT_H"
+    with open(path, 'w') as f:
+        f.write("// Auto-generated by gen_intercept_table.py - layout of ai_intercept_bin\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n")
+        f.write("// time_table: s16[INTERCEPT_VX_MAX][INTERCEPT_X_COUNT] = (290 - x) / vx\n")
+        f.write("// fold_table: u8[INTERCEPT_FOLD_COUNT] = wall-reflected y for projected y - INTERCEPT_FOLD_MIN\n")
+        f.write(f"#define INTERCEPT_X_COUNT {X_COUNT}\n")
+        f.write(f"#define INTERCEPT_Y_COUNT {Y_COUNT}\n")
+        f.write(f"#define INTERCEPT_VX_MAX {len(VX_VALUES)}\n")
+        f.write(f"#define INTERCEPT_VY_MAX {VY_VALUES.max()}\n")
+        f.write(f"#define INTERCEPT_FOLD_OFFSET {times.size * 2} // byte offset of fold_table\n")
+        f.write(f"#define INTERCEPT_FOLD_MIN ({fold_min})\n")
+        f.write(f"#define INTERCEPT_FOLD_COUNT {len(fold)}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def lookup_from_bytes(data, ball_x, ball_y, ball_vx, ball_vy, fold_min):
+    """The C table lookup, evaluated on the raw resource bytes"""
+    times = np.frombuffer(data, dtype='>i2', count=len(VX_VALUES) * X_COUNT).astype(np.int64)
+    fold = np.frombuffer(data, dtype=np.uint8, offset=times.size * 2)
+    t = times[(ball_vx - 1) * X_COUNT + ball_x]
+    return fold[ball_y + ball_vy * t - fold_min].astype(np.int64)
+
+
+def verify(data, fold_min):
+    """Compare the table lookup with the C loop on every input; returns mismatch count"""
+    bx, by, vx, vy = (a.ravel() for a in np.meshgrid(np.arange(X_COUNT), np.arange(Y_COUNT),
+                                                     VX_VALUES, VY_VALUES, indexing='ij'))
+    fast = lookup_from_bytes(data, bx, by, vx, vy, fold_min)
+    slow = np.fromiter((predict_future_y_scalar(*s) for s in zip(bx.tolist(), by.tolist(),
+                                                                vx.tolist(), vy.tolist())),
+                       dtype=np.int64, count=len(bx))
+    return len(bx), int(np.count_nonzero(fast != slow))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the pong_ai_predict intercept tables")
+    parser.add_argument('--bin', default=DEFAULT_BIN, help="Resource file to write")
+    parser.add_argument('--header', default=DEFAULT_HEADER, help="C header with the table layout")
+    parser.add_argument('--verify-only', action='store_true', help="Check the existing --bin file")
+    args = parser.parse_args()
+
+    times, fold, fold_min = build_tables()
+    if not args.verify_only:
+        data = tables_to_bytes(times, fold)
+        with open(args.bin, 'wb') as f:
+            f.write(data)
+        write_header(args.header, times, fold, fold_min)
+        print(f"💾 {args.bin}: {times.size} time entries + {len(fold)} fold entries ({len(data)} bytes)")
+        print(f"💾 {args.header}")
+
+    with open(args.bin, 'rb') as f:
+        data = f.read()
+    start = time.time()
+    total, mismatches = verify(data, fold_min)
+    status = '✅' if mismatches == 0 else '❌'
+    print(f"{status} Verified {total:,} inputs against the C loop in {time.time() - start:.1f}s: {mismatches} mismatches")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
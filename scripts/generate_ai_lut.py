@@ -16,10 +16,10 @@ import os
 # Add scripts directory to path to import existing model
 sys.path.append('../scripts')
 
+from keras_weights import load_weights, dense_forward
+
 # Try to load the trained model if available
 try:
-    import tensorflow as tf
-    
     # Look for models in the models directory
     model_dir = '../models'
     model_files = []
@@ -33,7 +33,7 @@ try:
         # Sort by modification time, newest first
         model_files.sort(key=os.path.getmtime, reverse=False)
         model_path = model_files[0]
-        model = tf.keras.models.load_model(model_path, compile=False)
+        model_weights = load_weights(model_path)
         
         # Get file modification time for verification
         import time
@@ -42,7 +42,7 @@ try:
         
         print(f"✓ Loaded trained neural network model: {model_path}")
         print(f"  Model last modified: {mod_time_str}")
-        print(f"  Model summary: {model.count_params()} parameters")
+        print(f"  Model summary: {sum(w.size for w in model_weights)} parameters")
         
         use_neural_network = True
     else:
@@ -89,7 +89,7 @@ def neural_network_ai(ball_x, ball_y, ball_vx, ball_vy, ai_y):
     ])
     
     # Get prediction from neural network
-    q_values = model.predict(state.reshape(1, -1), verbose=0)
+    q_values = dense_forward(model_weights, state.reshape(1, -1))
     action = np.argmax(q_values[0])
     
     # Debug output for first few predictions
@@ -106,7 +106,7 @@ def neural_network_ai(ball_x, ball_y, ball_vx, ball_vy, ai_y):
 def neural_network_ai_batch(states):
     """Use the trained neural network for batch predictions (faster)"""
     # Get predictions for all states at once
-    q_values_batch = model.predict(states, verbose=0)
+    q_values_batch = dense_forward(model_weights, states)
     actions = np.argmax(q_values_batch, axis=1)
     return actions
 
@@ -121,39 +121,28 @@ def generate_lookup_table():
     if use_neural_network:
         # Batch processing for neural network (much faster)
         print("Preparing batch prediction...")
-        all_states = []
-        
-        for bx in range(LUT_BALL_X_STEPS):
-            for by in range(LUT_BALL_Y_STEPS):
-                for vx in range(LUT_VEL_X_STEPS):
-                    for vy in range(LUT_VEL_Y_STEPS):
-                        for ay in range(LUT_AI_Y_STEPS):
-                            # Convert indices back to actual game values (8px resolution)
-                            ball_x = bx * 8   # 0, 8, 16, ..., 312
-                            ball_y = by * 8   # 0, 8, 16, ..., 216
-                            ball_vx = vx - 4  # -4, -3, -2, -1, 0, 1, 2, 3, 4
-                            ball_vy = vy - 4  # -4, -3, -2, -1, 0, 1, 2, 3, 4
-                            ai_y = ay * 8     # 0, 8, 16, ..., 216
-                            
-                            # Use the EXACT same input normalization as ai.c and training script
-                            bx_input = (ball_x << 1) * 13 >> 6
-                            by_input = ball_y * 37 >> 6
-                            vx_input = ball_vx << 4
-                            vy_input = ball_vy << 4
-                            ay_input = ai_y * 37 >> 6
-                            
-                            # Normalize to training range (divide by 1024 to match scale factor)
-                            state = np.array([
-                                bx_input / 1024.0,
-                                by_input / 1024.0, 
-                                vx_input / 1024.0,
-                                vy_input / 1024.0,
-                                ay_input / 1024.0
-                            ])
-                            all_states.append(state)
+        # Every grid state at once, in (bx, by, vx, vy, ay) order with ay innermost
+        bx, by, vx, vy, ay = np.meshgrid(np.arange(LUT_BALL_X_STEPS), np.arange(LUT_BALL_Y_STEPS),
+                                         np.arange(LUT_VEL_X_STEPS), np.arange(LUT_VEL_Y_STEPS),
+                                         np.arange(LUT_AI_Y_STEPS), indexing='ij')
+        # Convert indices back to actual game values (8px resolution)
+        ball_x = bx.ravel() * 8   # 0, 8, 16, ..., 312
+        ball_y = by.ravel() * 8   # 0, 8, 16, ..., 216
+        ball_vx = vx.ravel() - 4  # -4, -3, -2, -1, 0, 1, 2, 3, 4
+        ball_vy = vy.ravel() - 4  # -4, -3, -2, -1, 0, 1, 2, 3, 4
+        ai_y = ay.ravel() * 8     # 0, 8, 16, ..., 216
+
+        # Use the EXACT same input normalization as ai.c and training script,
+        # normalized to training range (divide by 1024 to match scale factor)
+        all_states = np.stack([
+            ((ball_x << 1) * 13 >> 6) / 1024.0,
+            (ball_y * 37 >> 6) / 1024.0,
+            (ball_vx << 4) / 1024.0,
+            (ball_vy << 4) / 1024.0,
+            (ai_y * 37 >> 6) / 1024.0,
+        ], axis=1)
         
         print("Running batch prediction...")
-        all_states = np.array(all_states)
         lookup_table = neural_network_ai_batch(all_states).tolist()
         
     else:
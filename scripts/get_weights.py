@@ -1,7 +1,8 @@
-import tensorflow as tf
 import numpy as np
 import os
 
+from keras_weights import load_weights, load_model_config
+
 # Updated script to extract weights from the optimized 2-layer neural network
 # Architecture: 5 inputs -> 8 hidden neurons -> 3 outputs
 # Scale factor: 256 for efficient bit shifting on Genesis (>>8) and fits in s16
@@ -18,10 +19,11 @@ if not os.path.exists(model_path):
 
 print(f"📁 Loading model from: {model_path}")
 
-# Load just the weights without training config
+# Read just the weight arrays (no TensorFlow needed)
 try:
-    model = tf.keras.models.load_model(model_path, compile=False)
-    print("✅ Model loaded successfully!")
+    weights = load_weights(model_path)
+    config = load_model_config(model_path)
+    print("✅ Model weights loaded successfully!")
 except Exception as e:
     print(f"❌ Error loading model: {e}")
     exit(1)
@@ -29,7 +31,9 @@ except Exception as e:
 print("\n" + "="*60)
 print("🧠 MODEL ARCHITECTURE")
 print("="*60)
-model.summary()
+for i, w in enumerate(weights):
+    print(f"   Layer {i // 2} {'kernel' if i % 2 == 0 else 'bias  '}: {w.shape}")
+print(f"   Total params: {sum(w.size for w in weights)}")
 
 print("\n" + "="*60)
 print("⚙️  EXTRACTING WEIGHTS FOR GENESIS")
@@ -37,18 +41,22 @@ print("="*60)
 
 # Verify the expected architecture
 expected_layers = 2
-if len(model.layers) != expected_layers:
-    print(f"⚠️  Warning: Expected {expected_layers} layers, found {len(model.layers)}")
+num_layers = len(weights) // 2
+if config is not None:
+    num_layers = len([layer for layer in config.get('config', {}).get('layers', [])
+                      if layer.get('class_name') not in ('InputLayer', 'TileQuantize')])  # no weights
+if num_layers != expected_layers:
+    print(f"⚠️  Warning: Expected {expected_layers} layers, found {num_layers}")
     print("   This script is designed for the simplified 2-layer architecture:")
     print("   Layer 0: Dense(8, input_dim=5, activation='relu')")
     print("   Layer 1: Dense(3, activation='linear')")
     print("   Please check your model architecture.")
 
 # Get the actual trained weights
-layer1_weights = model.layers[0].get_weights()[0]  # First Dense layer weights (5x8)
-layer1_bias = model.layers[0].get_weights()[1]     # First Dense layer bias (8,)
-layer2_weights = model.layers[1].get_weights()[0]  # Second Dense layer weights (8x3)
-layer2_bias = model.layers[1].get_weights()[1]     # Second Dense layer bias (3,)
+layer1_weights = weights[0]  # First Dense layer weights (5x8)
+layer1_bias = weights[1]     # First Dense layer bias (8,)
+layer2_weights = weights[2]  # Second Dense layer weights (8x3)
+layer2_bias = weights[3]     # Second Dense layer bias (3,)
 
 print(f"📊 Layer 1 weights shape: {layer1_weights.shape} (expected: 5x8)")
 print(f"📊 Layer 1 bias shape: {layer1_bias.shape} (expected: 8,)")
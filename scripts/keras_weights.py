@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+TensorFlow-free Keras weight reader
+
+Reads the weights of a saved Keras model straight into NumPy with h5py, in
+the same order as model.get_weights(), so tools that only need the four
+arrays of the 5->8->3 network do not pay for importing TensorFlow.
+
+Supported files:
+- .h5 full models (model.save) and legacy save_weights files: layer groups
+  listed in the layer_names attribute, each with a weight_names attribute
+- .keras archives (Keras 3 zip): config.json gives the layer order and
+  model.weights.h5 holds layers/<name>/vars/<i>
+- .weights.h5 (Keras 3 save_weights): the same layers/<name>/vars/<i> layout
+
+Usage:
+    python keras_weights.py ../models/pong_ai_model.h5
+"""
+
+import io
+import json
+import re
+import sys
+import zipfile
+
+import h5py
+import numpy as np
+
+
+def _decode(value):
+    return value.decode('utf8') if isinstance(value, bytes) else str(value)
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _read_legacy_h5(group):
+    """Keras 2 / Keras 3 .h5 layout: ordered layer_names -> weight_names datasets"""
+    weights = []
+    for layer_name in group.attrs['layer_names']:
+        layer = group[_decode(layer_name)]
+        for weight_name in layer.attrs.get('weight_names', []):
+            weights.append(np.array(layer[_decode(weight_name)]))
+    return weights
+
+
+def _read_vars_h5(handle, layer_order=None):
+    """Keras 3 saving_lib layout: layers/<name>/vars/<i>"""
+    layers = handle['layers']
+    names = [n for n in (layer_order or sorted(layers, key=_natural_key)) if n in layers]
+    weights = []
+    for name in names:
+        variables = layers[name].get('vars')
+        if variables is None:
+            continue
+        for index in sorted(variables, key=int):
+            weights.append(np.array(variables[index]))
+    return weights
+
+
+def _keras_layer_order(config):
+    layers = config.get('config', {}).get('layers', [])
+    return [layer['config']['name'] for layer in layers if layer.get('class_name') != 'InputLayer']
+
+
+def load_weights(path):
+    """Float weights of a saved model, ordered like model.get_weights()"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            config = json.loads(archive.read('config.json'))
+            data = archive.read('model.weights.h5')
+        with h5py.File(io.BytesIO(data), 'r') as handle:
+            return _read_vars_h5(handle, _keras_layer_order(config))
+    with h5py.File(path, 'r') as handle:
+        if 'model_weights' in handle:
+            return _read_legacy_h5(handle['model_weights'])
+        if 'layer_names' in handle.attrs:
+            return _read_legacy_h5(handle)
+        if 'layers' in handle:
+            return _read_vars_h5(handle)
+    raise ValueError(f"{path}: no Keras weights found")
+
+
+def load_model_config(path):
+    """The model_config / config.json dict of a saved model, or None if the file has none"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return json.loads(archive.read('config.json'))
+    with h5py.File(path, 'r') as handle:
+        config = handle.attrs.get('model_config')
+    return json.loads(_decode(config)) if config is not None else None
+
+
+def dense_forward(weights, inputs):
+    """Float forward pass of the Dense(relu) -> Dense(linear) stack -> outputs"""
+    x = np.asarray(inputs, dtype=np.float32)
+    pairs = list(zip(weights[0::2], weights[1::2]))
+    for i, (kernel, bias) in enumerate(pairs):
+        x = x @ kernel + bias
+        if i < len(pairs) - 1:
+            x = np.maximum(x, 0.0)
+    return x
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        return 1
+    for i, w in enumerate(load_weights(sys.argv[1])):
+        print(f"  [{i}] {str(w.shape):<8} min {w.min():+.4f} max {w.max():+.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+League opponents for Pong self-play training
+
+The left paddle is normally the scripted follower in pong_env. In league mode
+each episode samples its opponent from a mix of:
+- scripted: the pong_env follower (aim error and skipped reactions)
+- checkpoint: a frozen earlier model (Keras files, or snapshots of this run)
+- self: the current policy, refreshed periodically
+
+Network opponents play from the left as ai.c's notes describe (mirrored
+state: SCREEN_WIDTH - ball.x, -ball.dx, own paddle y), normalized like
+PongEnv.get_state. Their float weights are held as stacked NumPy arrays, so
+any batch of games, each with its own opponent, is one gather plus two small
+einsums and never calls TensorFlow.
+
+Actions from League.act go straight to PongEnv.step(action, opponent_action) or
+VecPongEnv.step(actions, opponent_actions); -1 means the scripted follower.
+pong_ai_train.py enables it with --league [CHECKPOINT_GLOB ...].
+"""
+
+import collections
+import glob
+import os
+
+import numpy as np
+
+from keras_weights import load_weights
+
+OPPONENT_KINDS = ('scripted', 'checkpoint', 'self')
+SCRIPTED = -1
+SCREEN_WIDTH = 320
+
+
+def mirrored_states(ball_x, ball_y, ball_vx, ball_vy, paddle_y):
+    """PongEnv.get_state inputs as seen by the left paddle -> (N, 5) float32"""
+    state = np.empty((np.size(ball_x), 5), dtype=np.float32)
+    state[:, 0] = ((SCREEN_WIDTH - np.asarray(ball_x)) // 8) / 39.0
+    state[:, 1] = (np.asarray(ball_y) // 8) / 27.0
+    state[:, 2] = (-np.asarray(ball_vx) + 4) / 8.0
+    state[:, 3] = (np.asarray(ball_vy) + 4) / 8.0
+    state[:, 4] = (np.asarray(paddle_y) // 8) / 27.0
+    return state
+
+
+class League:
+    """Opponent pool with a sampled scripted / checkpoint / self mix
+
+    Slot 0 of the weight stack is the current policy ('self'); the other slots
+    are frozen checkpoints, oldest dropped first beyond max_checkpoints.
+    """
+
+    def __init__(self, mix=(0.5, 0.3, 0.2), max_checkpoints=8, history=100, seed=None):
+        self.mix = np.asarray(mix, dtype=np.float64)
+        self.max_checkpoints = max_checkpoints
+        self.rng = np.random.default_rng(seed)
+        self.names = ['self']
+        self.stack = None  # [w1 (K,5,8), b1 (K,8), w2 (K,8,3), b2 (K,3)]
+        self.recent = collections.deque(maxlen=history)
+        self._loaded = {}
+
+    @property
+    def num_checkpoints(self):
+        return len(self.names) - 1
+
+    def _set_slot(self, slot, weights):
+        weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        if self.stack is None:
+            self.stack = [np.zeros((1,) + w.shape, dtype=np.float32) for w in weights]
+        if slot == len(self.stack[0]):
+            self.stack = [np.concatenate([s, w[None]]) for s, w in zip(self.stack, weights)]
+        else:
+            for s, w in zip(self.stack, weights):
+                s[slot] = w
+
+    def update_self(self, weights):
+        """Refresh the 'self' opponent with the current policy's weights"""
+        self._set_slot(0, weights)
+
+    def add_checkpoint(self, weights, name):
+        """Freeze a weight set into the pool (the oldest checkpoint is dropped when full)"""
+        if self.stack is None:
+            self._set_slot(0, weights)  # until update_self is called, 'self' plays like this checkpoint
+        if self.num_checkpoints >= self.max_checkpoints:
+            self.names.pop(1)
+            self.stack = [np.delete(s, 1, axis=0) for s in self.stack]
+        self._set_slot(len(self.names), weights)
+        self.names.append(name)
+
+    def add_checkpoint_files(self, patterns):
+        """Load Keras checkpoints matching the glob patterns (each file read once)"""
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                if path not in self._loaded:
+                    self._loaded[path] = load_weights(path)
+                    self.add_checkpoint(self._loaded[path], os.path.basename(path))
+        return self.num_checkpoints
+
+    def sample(self, size=None):
+        """Opponent ids for new games: -1 scripted, 0 self, 1.. checkpoints"""
+        available = self.mix * np.array([1.0, self.num_checkpoints > 0, self.stack is not None])
+        if available.sum() <= 0:
+            available = np.array([1.0, 0.0, 0.0])  # nothing in the mix can play yet: the scripted follower
+        kinds = self.rng.choice(len(OPPONENT_KINDS), size=size, p=available / available.sum())
+        checkpoints = self.rng.integers(1, max(self.num_checkpoints, 1) + 1, size=size)
+        ids = np.where(kinds == 0, SCRIPTED, np.where(kinds == 1, checkpoints, 0))
+        for kind in np.atleast_1d(kinds):
+            self.recent.append(OPPONENT_KINDS[kind])
+        return ids if size is not None else int(ids)
+
+    def act(self, opponent_ids, ball_x, ball_y, ball_vx, ball_vy, paddle_y):
+        """Greedy left-paddle actions for each game's opponent (-1 where the scripted follower plays)"""
+        ids = np.atleast_1d(opponent_ids)
+        actions = np.full(len(ids), SCRIPTED, dtype=np.int64)
+        net = ids >= 0
+        if net.any():
+            state = mirrored_states(*(np.atleast_1d(v)[net] for v in (ball_x, ball_y, ball_vx, ball_vy, paddle_y)))
+            w1, b1, w2, b2 = (s[ids[net]] for s in self.stack)
+            hidden = np.maximum(np.einsum('ni,nih->nh', state, w1) + b1, 0.0)
+            q = np.einsum('nh,nha->na', hidden, w2) + b2
+            actions[net] = np.argmax(q, axis=1)
+        return actions if np.ndim(opponent_ids) else int(actions[0])
+
+    def name(self, opponent_id):
+        return 'scripted' if opponent_id == SCRIPTED else self.names[opponent_id]
+
+    def mix_stats(self):
+        """Share of each opponent kind over the recent episodes"""
+        total = max(len(self.recent), 1)
+        counts = collections.Counter(self.recent)
+        return {kind: round(counts[kind] / total, 3) for kind in OPPONENT_KINDS}
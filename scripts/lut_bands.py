@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Band compiler for the AI lookup table
+
+Along the ai_y axis the LUT actions form contiguous bands (the policy moves
+the paddle toward an intercept), so each (ball_x, ball_y, vx, vy) row of
+ai_y entries is stored as two boundaries plus the action of each band:
+
+    action = ai_y < lo ? a0 : ai_y < hi ? a1 : a2
+
+packed into one big-endian u16: lo (5 bits) | hi (5 bits) | a0 a1 a2 (2 bits
+each). That is 2 bytes per row instead of 24 two-bit entries for the packed
+layout, and the lookup is two compares.
+
+The boundaries of each row are fitted exactly when the row has at most
+three bands, otherwise to the fewest mismatching cells. Lossless mode stores
+the mismatches as a sorted exception list (u32: flat index << 2 | action,
+binary-searched); --lossy drops them and reports the error instead.
+
+Outputs:
+- bands binary: rows table, then the exception list
+- ai_lut_bands.h: layout constants and the static inline lookup
+- optional --c-out: the binary as a C array (const u8 ai_lut_bands[])
+
+The verifier decodes the written bytes the way the C lookup does and compares
+every cell with the source LUT.
+
+Usage:
+    python lut_bands.py --lut ../pong/res/ai_lut.bin --layout packed --out ../pong/res/ai_lut_bands.bin
+    python lut_bands.py --lut ../pong/res/ai_lut_expert.bin --layout full --lossy --out /tmp/bands.bin
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from lut_builder import LAYOUTS, lut_from_bytes, write_lut_c_array
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HEADER = os.path.join(SCRIPT_DIR, '..', 'pong', 'inc', 'ai_lut_bands.h')
+MAX_AI_Y_STEPS = 31  # lo/hi are 5-bit
+
+
+def fit_bands(rows, chunk=8192):
+    """Best 3-band fit per row -> (lo, hi, actions (R, 3), mismatches per row)
+
+    For every boundary pair the band actions are the per-band majorities, read
+    from per-action prefix counts, so all pairs are scored with a few gathers.
+    """
+    rows = np.asarray(rows, dtype=np.uint8)
+    num_rows, n = rows.shape
+    if n > MAX_AI_Y_STEPS:
+        raise ValueError(f"ai_y axis of {n} steps does not fit the 5-bit band boundaries")
+    pair_lo, pair_hi = np.triu_indices(n + 1)  # every lo <= hi
+    lo = np.empty(num_rows, dtype=np.int64)
+    hi = np.empty(num_rows, dtype=np.int64)
+    actions = np.empty((num_rows, 3), dtype=np.uint8)
+    errors = np.empty(num_rows, dtype=np.int64)
+    for start in range(0, num_rows, chunk):
+        block = rows[start:start + chunk]
+        prefix = np.zeros((len(block), 3, n + 1), dtype=np.int32)  # prefix[r, a, i] = count of a in row[:i]
+        prefix[:, :, 1:] = np.cumsum(block[:, None, :] == np.arange(3)[None, :, None], axis=2)
+        bands = [(np.zeros_like(pair_lo), pair_lo), (pair_lo, pair_hi), (pair_hi, np.full_like(pair_hi, n))]
+        counts = [prefix[:, :, b] - prefix[:, :, a] for a, b in bands]  # each (rows, 3, pairs)
+        kept = sum(c.max(axis=1) for c in counts)
+        best = np.argmax(kept, axis=1)
+        take = np.arange(len(block))
+        lo[start:start + len(block)] = pair_lo[best]
+        hi[start:start + len(block)] = pair_hi[best]
+        for band, c in enumerate(counts):
+            actions[start:start + len(block), band] = np.argmax(c[take, :, best], axis=1)
+        errors[start:start + len(block)] = n - kept[take, best]
+    return lo, hi, actions, errors
+
+
+def encode_rows(lo, hi, actions):
+    return ((lo << 11) | (hi << 6) | (actions[:, 0].astype(np.int64) << 4) |
+            (actions[:, 1].astype(np.int64) << 2) | actions[:, 2]).astype('>u2')
+
+
+def decode_rows(words, n):
+    """Expand u16 band words to (R, n) actions"""
+    words = np.asarray(words, dtype=np.int64)
+    ay = np.arange(n)[None, :]
+    lo, hi = (words >> 11)[:, None], ((words >> 6) & 31)[:, None]
+    a0, a1, a2 = ((words >> 4) & 3)[:, None], ((words >> 2) & 3)[:, None], (words & 3)[:, None]
+    return np.where(ay < lo, a0, np.where(ay < hi, a1, a2)).astype(np.uint8)
+
+
+def compile_bands(lut, lossless=True):
+    """LUT (layout.shape) -> (bytes, num_rows, num_exceptions, mismatched cells before exceptions)"""
+    lut = np.asarray(lut, dtype=np.uint8)
+    rows = lut.reshape(-1, lut.shape[-1])
+    lo, hi, actions, errors = fit_bands(rows)
+    words = encode_rows(lo, hi, actions)
+    if lossless:
+        flat_fit = decode_rows(words, rows.shape[1]).ravel()
+        wrong = np.flatnonzero(flat_fit != rows.ravel())
+        exceptions = ((wrong << 2) | rows.ravel()[wrong]).astype('>u4')
+    else:
+        exceptions = np.zeros(0, dtype='>u4')
+    return words.tobytes() + exceptions.tobytes(), len(words), len(exceptions), int(errors.sum())
+
+
+def lookup_from_bytes(data, num_rows, n, index):
+    """The C lookup on the raw bytes for flat LUT indices"""
+    words = np.frombuffer(data, dtype='>u2', count=num_rows).astype(np.int64)
+    exceptions = np.frombuffer(data, dtype='>u4', offset=num_rows * 2).astype(np.int64)
+    index = np.asarray(index, dtype=np.int64)
+    row, ay = np.divmod(index, n)
+    w = words[row]
+    lo, hi = w >> 11, (w >> 6) & 31
+    action = np.where(ay < lo, (w >> 4) & 3, np.where(ay < hi, (w >> 2) & 3, w & 3))
+    if len(exceptions):
+        keys = exceptions >> 2
+        pos = np.minimum(np.searchsorted(keys, index), len(keys) - 1)
+        action = np.where(keys[pos] == index, exceptions[pos] & 3, action)
+    return action.astype(np.uint8)
+
+
+def write_bands_header(path, layout, num_rows, num_exceptions):
+    guard = "AI_LUT_BANDS_H"
+    n = layout.shape[-1]
+    with open(path, 'w') as f:
+        f.write(f"// Auto-generated by lut_bands.py - {layout.name} LUT as ai_y bands "
+                f"({num_rows} rows, {num_exceptions} exceptions)\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n#include <genesis.h>\n\n")
+        f.write("// rows: u16[AI_LUT_BANDS_ROWS] = lo:5 | hi:5 | a0:2 | a1:2 | a2:2, row = flat index / AI_LUT_BANDS_AY_STEPS\n")
+        f.write("// exceptions: u32[AI_LUT_BANDS_EXCEPTIONS] = flat index << 2 | action, ascending\n")
+        f.write(f"#define AI_LUT_BANDS_AY_STEPS {n}\n")
+        f.write(f"#define AI_LUT_BANDS_ROWS {num_rows}\n")
+        f.write(f"#define AI_LUT_BANDS_EXCEPTIONS {num_exceptions}\n")
+        f.write(f"#define AI_LUT_BANDS_EXC_OFFSET {num_rows * 2} // byte offset of the exception list\n\n")
+        f.write("static inline u8 ai_lut_bands_get(const u8 *bands, u32 row, u8 ay_idx)\n{\n")
+        f.write("    u16 w = ((const u16 *)bands)[row];\n")
+        f.write("    u8 action = ay_idx < (w >> 11) ? (w >> 4) & 3 : ay_idx < ((w >> 6) & 31) ? (w >> 2) & 3 : w & 3;\n")
+        f.write("#if AI_LUT_BANDS_EXCEPTIONS > 0\n")
+        f.write("    const u32 *exc = (const u32 *)(bands + AI_LUT_BANDS_EXC_OFFSET);\n")
+        f.write("    u32 index = (u32)row * AI_LUT_BANDS_AY_STEPS + ay_idx;\n")
+        f.write("    u32 first = 0, last = AI_LUT_BANDS_EXCEPTIONS;\n")
+        f.write("    while (first < last)\n    {\n")
+        f.write("        u32 mid = (first + last) >> 1;\n")
+        f.write("        u32 key = exc[mid] >> 2;\n")
+        f.write("        if (key == index)\n            return exc[mid] & 3;\n")
+        f.write("        if (key < index)\n            first = mid + 1;\n        else\n            last = mid;\n    }\n")
+        f.write("#endif\n    return action;\n}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a LUT to ai_y band boundaries")
+    parser.add_argument('--lut', default=os.path.join(SCRIPT_DIR, '..', 'pong', 'res', 'ai_lut.bin'))
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='packed')
+    parser.add_argument('--lossy', action='store_true', help="Drop the exception list (bounded-error fit)")
+    parser.add_argument('--out', help="Write the band binary here")
+    parser.add_argument('--header', default=DEFAULT_HEADER, help="C header written along with --out")
+    parser.add_argument('--c-out', help="Also write the binary as a C array")
+    args = parser.parse_args()
+
+    layout = LAYOUTS[args.layout]
+    with open(args.lut, 'rb') as f:
+        lut = lut_from_bytes(f.read(), layout)
+
+    start = time.time()
+    data, num_rows, num_exceptions, fit_errors = compile_bands(lut, lossless=not args.lossy)
+    print(f"🧮 {num_rows:,} rows fitted in {time.time() - start:.1f}s: "
+          f"{fit_errors:,} cells outside 3 bands ({fit_errors / layout.num_entries * 100:.3f}%)")
+    print(f"📦 {len(data):,} bytes ({num_rows:,} rows + {num_exceptions:,} exceptions) vs "
+          f"{layout.num_bytes:,} dense: {layout.num_bytes / len(data):.1f}x smaller")
+
+    decoded = lookup_from_bytes(data, num_rows, layout.shape[-1], np.arange(layout.num_entries))
+    mismatches = int(np.count_nonzero(decoded != lut.ravel()))
+    status = '✅' if mismatches == 0 or args.lossy else '❌'
+    print(f"{status} Verified {layout.num_entries:,} cells: {mismatches:,} differ from the source LUT")
+
+    if args.out:
+        with open(args.out, 'wb') as f:
+            f.write(data)
+        write_bands_header(args.header, layout, num_rows, num_exceptions)
+        print(f"💾 {args.out} and {args.header} written")
+    if args.c_out:
+        write_lut_c_array(args.c_out, data, name="ai_lut_bands")
+        print(f"💾 {args.c_out} written")
+    return 0 if mismatches == 0 or args.lossy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+ROM-budget LUT resolution optimizer for Genesis Pong
+
+The packed LUT resolutions in gen_lut_v3.1.py and ai.c (7 ball_x steps from
+LIMIT_X 232, 18 ball_y, 24 ai_y) were picked by hand. This searches per-axis
+bin counts and ranges for the layout that best reproduces a trained model
+within a byte budget.
+
+A candidate layout maps every 8px tile (and velocity) of each axis to a bin:
+- ball_x: tiles from a start tile up to the paddle (x 296), non-uniform bins
+          that get finer near the paddle (spacing exponent gamma)
+- ball_y, ai_y: uniform bins over the playfield; vx 1..4 and vy -4..4: grouped values
+Its cost is the 2-bit LUT plus the u8 tile->bin maps the lookup needs.
+
+Each bin takes the visit-weighted majority action of the model over the
+tiles it covers, so agreement with the model on the states the game visits
+has a closed form: one bincount per candidate over the visited full-resolution
+cells (states outside a candidate's ball_x range use the ai.c centering
+fallback). Coordinate ascent over the axes maximizes agreement under the
+budget, evaluating each sweep's candidates in a process pool. The best
+candidates are then played in VecPongEnv for the in-game win rate.
+
+Usage:
+    python lut_budget.py --budget 27216 --model ../models/pong_ai_model.h5
+    python lut_budget.py --budget 16384 --reference-lut ../pong/res/ai_lut.bin --objective winrate \\
+        --out ../pong/res/ai_lut_opt.bin
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from pong_native import make_vec_env
+from teacher_policy import teacher_actions
+from lut_builder import FULL_LAYOUT, PACKED_LAYOUT, LAYOUTS, build_lut, lut_from_bytes, pack_2bit, quantize_weights
+from lut_visitation import redraw_serve_speed
+from keras_weights import load_weights
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(SCRIPT_DIR, '..', 'models', 'pong_ai_model.h5')
+DEFAULT_HEADER = os.path.join(SCRIPT_DIR, '..', 'pong', 'inc', 'ai_lut_opt.h')
+
+PADDLE_TILE = 296 >> 3     # the table is consulted up to ball_x 296
+MIN_START_TILE = 22        # earliest ball_x range start searched (x 176)
+BALL_Y_TILES = (2, 25)     # walls at y 16 / 208
+AI_Y_TILES = (1, 20)       # paddle y 8..160
+
+AXIS_OPTIONS = {
+    'ball_x': [(start, bins, gamma) for start in range(MIN_START_TILE, PADDLE_TILE)
+               for bins in range(1, PADDLE_TILE - start + 2) for gamma in (1.0, 2.0, 3.0)
+               if gamma == 1.0 or 1 < bins < PADDLE_TILE - start + 1],
+    'ball_y': [3, 4, 6, 8, 12, 24],
+    'vx': [1, 2, 4],
+    'vy': [1, 3, 5, 9],
+    'ai_y': [2, 4, 5, 10, 20],
+}
+AXES = list(AXIS_OPTIONS)
+
+
+def _uniform_map(length, lo, hi, bins):
+    tiles = np.clip(np.arange(length), lo, hi)
+    return ((tiles - lo) * bins // (hi - lo + 1)).astype(np.int64)
+
+
+def _paddle_map(start, bins, gamma):
+    """ball_x tile -> bin (-1 outside start..PADDLE_TILE), bins finer near the paddle for gamma > 1"""
+    tiles = np.arange(FULL_LAYOUT.shape[0])
+    span = PADDLE_TILE - start + 1
+    distance = np.clip(PADDLE_TILE - tiles, 0, span - 1) / span
+    from_paddle = np.floor(bins * distance ** (1.0 / gamma)).astype(np.int64)
+    _, bin_of = np.unique(-from_paddle, return_inverse=True)  # ascending x, contiguous
+    return np.where((tiles >= start) & (tiles <= PADDLE_TILE), bin_of, -1)
+
+
+class BinnedLayout:
+    """Per-axis tile/velocity -> bin maps over the full-resolution grid (FULL_LAYOUT axes)"""
+
+    def __init__(self, ball_x=(29, 7, 1.0), ball_y=24, vx=4, vy=9, ai_y=20):
+        self.params = {'ball_x': tuple(ball_x), 'ball_y': ball_y, 'vx': vx, 'vy': vy, 'ai_y': ai_y}
+        nbx, nby, nvx, nvy, nay = FULL_LAYOUT.shape
+        vx_values = FULL_LAYOUT.vx_values
+        self.maps = [
+            _paddle_map(*ball_x),
+            _uniform_map(nby, *BALL_Y_TILES, ball_y),
+            np.where(vx_values > 0, (np.maximum(vx_values, 1) - 1) * vx // 4, -1),
+            (FULL_LAYOUT.vy_values + 4) * vy // 9,
+            _uniform_map(nay, *AI_Y_TILES, ai_y),
+        ]
+        self.shape = tuple(int(m.max()) + 1 for m in self.maps)
+        self.start_tile = ball_x[0]
+
+    @property
+    def num_entries(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def lut_bytes(self):
+        return (self.num_entries * 2 + 7) // 8
+
+    @property
+    def map_bytes(self):
+        """u8 maps the lookup indexes by tile/velocity: ball_x from the start tile, vx 1..4, the rest in full"""
+        return (PADDLE_TILE - self.start_tile + 1) + len(self.maps[1]) + 4 + len(self.maps[3]) + len(self.maps[4])
+
+    @property
+    def rom_bytes(self):
+        return self.lut_bytes + self.map_bytes
+
+    def key(self):
+        return tuple(m.tobytes() for m in self.maps)
+
+    def bin_index(self, bx, by, vx, vy, ay):
+        """Flat bin for full-resolution axis indices; -1 where the table is not used"""
+        b = [m[i] for m, i in zip(self.maps, (bx, by, vx, vy, ay))]
+        inside = (b[0] >= 0) & (b[2] >= 0)
+        flat = np.ravel_multi_index([np.maximum(x, 0) for x in b], self.shape)
+        return np.where(inside, flat, -1)
+
+    def representatives(self):
+        """Middle full-resolution index of every bin on each axis"""
+        reps = []
+        for m, n in zip(self.maps, self.shape):
+            members = [np.flatnonzero(m == b) for b in range(n)]
+            reps.append(np.array([idx[len(idx) // 2] for idx in members]))
+        return reps
+
+    def describe(self):
+        start, bins, gamma = self.params['ball_x']
+        return (f"ball_x x{start * 8}+ {bins} bins (gamma {gamma:g}), ball_y {self.params['ball_y']}, "
+                f"vx {self.params['vx']}, vy {self.params['vy']}, ai_y {self.params['ai_y']}")
+
+
+def fallback_actions(ai_y):
+    """ai.c pong_ai_lookup outside the table: center the paddle (0=stay, 1=up, 2=down)"""
+    center = np.asarray(ai_y) + 24
+    return np.where(center < 112, 2, np.where(center > 112, 1, 0)).astype(np.uint8)
+
+
+def reference_from_lut(lut, layout):
+    """Expand a LUT of any layout to the full-resolution grid, read the way the game indexes it"""
+    axes = np.meshgrid(FULL_LAYOUT.bx_tiles * 8, FULL_LAYOUT.by_tiles * 8, FULL_LAYOUT.vx_values,
+                       FULL_LAYOUT.vy_values, FULL_LAYOUT.ay_tiles * 8, indexing='ij')
+    index, _ = layout.cell_indices(*axes)
+    return np.asarray(lut).ravel()[index].reshape(FULL_LAYOUT.shape)
+
+
+def load_model_reference(path):
+    return build_lut(quantize_weights(load_weights(path)), FULL_LAYOUT)
+
+
+def collect_reference_visits(reference, num_envs=4096, steps=2000, serve_speeds=(2, 3, 4), seed=0):
+    """Visited full-resolution cells where the table may be used, with per-action visit weights
+
+    Returns (cells (K, 5) axis indices, weights (K, 3) visits whose reference action is a,
+    fallback_hits (K,) visits where the centering fallback matches the reference).
+    """
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    redraw_serve_speed(env, np.ones(num_envs, dtype=bool), serve_speeds, rng)
+    flat_ref = reference.ravel()
+    counts = np.zeros(FULL_LAYOUT.num_entries, dtype=np.int64)
+    fallback_hits = np.zeros(FULL_LAYOUT.num_entries, dtype=np.int64)
+    for _ in range(steps):
+        index, _ = FULL_LAYOUT.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        used = (env.ball_vx > 0) & (env.ball_x <= 296) & (env.ball_x >= MIN_START_TILE * 8)
+        counts += np.bincount(index[used], minlength=len(counts))
+        hit = fallback_actions(env.ai_y[used]) == flat_ref[index[used]]
+        fallback_hits += np.bincount(index[used][hit], minlength=len(counts))
+        actions = teacher_actions(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        explore = rng.random(num_envs) < 0.2
+        _, _, dones = env.step(np.where(explore, rng.integers(0, 3, num_envs), actions))
+        env.reset(dones)
+        redraw_serve_speed(env, dones, serve_speeds, rng)
+    visited = np.flatnonzero(counts)
+    weights = np.zeros((len(visited), 3), dtype=np.int64)
+    weights[np.arange(len(visited)), flat_ref[visited]] = counts[visited]
+    cells = np.stack(np.unravel_index(visited, FULL_LAYOUT.shape), axis=1)
+    return cells, weights, fallback_hits[visited]
+
+
+def _votes(layout, bins, weights):
+    inside = bins >= 0
+    return np.stack([np.bincount(bins[inside], weights=weights[inside, a], minlength=layout.num_entries)
+                     for a in range(3)], axis=1)
+
+
+def fit_lut(layout, reference, cells, weights):
+    """Visit-weighted majority action per bin (reference at the bin's middle cell if never visited)"""
+    votes = _votes(layout, layout.bin_index(*cells.T), weights)
+    lut = reference[np.ix_(*layout.representatives())].ravel().copy()
+    seen = votes.sum(axis=1) > 0
+    lut[seen] = np.argmax(votes[seen], axis=1)
+    return lut.astype(np.uint8).reshape(layout.shape)
+
+
+def agreement(layout, cells, weights, fallback_hits):
+    """Fraction of visited table-range states on which the fitted layout acts like the reference"""
+    bins = layout.bin_index(*cells.T)
+    votes = _votes(layout, bins, weights)
+    matched = votes.max(axis=1).sum() + fallback_hits[bins < 0].sum()
+    return float(matched / weights.sum())
+
+
+def play_win_rate(layout, lut, num_envs=2048, steps=3000, serve_speeds=(2, 3, 4), seed=0):
+    """Points won by the right paddle playing the layout's LUT like pong_ai_lookup"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    redraw_serve_speed(env, np.ones(num_envs, dtype=bool), serve_speeds, rng)
+    flat = lut.ravel()
+    won = lost = 0
+    for _ in range(steps):
+        index, _ = FULL_LAYOUT.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        bins = layout.bin_index(*np.unravel_index(index, FULL_LAYOUT.shape))
+        use = (bins >= 0) & (env.ball_x <= 296)
+        actions = np.where(use, flat[np.maximum(bins, 0)], fallback_actions(env.ai_y))
+        actions[(env.ball_x > 296) & (env.ball_x < 300)] = 0
+        _, _, dones = env.step(actions)
+        won += int((dones & (env.ball_x <= 0)).sum())
+        lost += int((dones & (env.ball_x > 0)).sum())
+        env.reset(dones)
+        redraw_serve_speed(env, dones, serve_speeds, rng)
+    return won / max(won + lost, 1)
+
+
+_shared = {}
+
+
+def _init_worker(reference, cells, weights, fallback_hits):
+    _shared.update(reference=reference, cells=cells, weights=weights, fallback_hits=fallback_hits)
+
+
+def _score_params(params):
+    layout = BinnedLayout(**params)
+    return agreement(layout, _shared['cells'], _shared['weights'], _shared['fallback_hits'])
+
+
+def _win_rate_params(args):
+    params, num_envs, steps, serve_speeds, seed = args
+    layout = BinnedLayout(**params)
+    lut = fit_lut(layout, _shared['reference'], _shared['cells'], _shared['weights'])
+    return play_win_rate(layout, lut, num_envs, steps, serve_speeds, seed)
+
+
+def search(budget, pool, restarts=3, seed=0, log=print):
+    """Coordinate ascent on agreement under the ROM budget; returns {layout key: (params, rom_bytes, agreement)}"""
+    rng = np.random.default_rng(seed)
+    scored = {}
+
+    def evaluate(candidates):
+        fresh = {}
+        for params in candidates:
+            layout = BinnedLayout(**params)
+            key = layout.key()
+            if layout.rom_bytes <= budget and key not in scored and key not in fresh:
+                fresh[key] = (params, layout.rom_bytes)
+        results = pool.map(_score_params, [p for p, _ in fresh.values()])
+        for (key, (params, rom)), score in zip(fresh.items(), results):
+            scored[key] = (params, rom, score)
+
+    def score_of(params):
+        return scored[BinnedLayout(**params).key()][2]
+
+    for restart in range(restarts):
+        current = {axis: options[0] for axis, options in AXIS_OPTIONS.items()}
+        current['ball_x'] = (29, 1, 1.0)
+        for _ in range(100 if restart else 0):  # random feasible starting point
+            guess = {axis: options[rng.integers(len(options))] for axis, options in AXIS_OPTIONS.items()}
+            if BinnedLayout(**guess).rom_bytes <= budget:
+                current = guess
+                break
+        evaluate([current])
+        improved = True
+        while improved:
+            improved = False
+            for axis in AXES:
+                evaluate([{**current, axis: option} for option in AXIS_OPTIONS[axis]])
+                feasible = [{**current, axis: option} for option in AXIS_OPTIONS[axis]
+                            if BinnedLayout(**{**current, axis: option}).key() in scored]
+                best = max(feasible, key=lambda p: (score_of(p), -BinnedLayout(**p).rom_bytes))
+                if score_of(best) > score_of(current):
+                    current, improved = best, True
+        log(f"   restart {restart}: {score_of(current) * 100:.2f}% agreement, "
+            f"{BinnedLayout(**current).rom_bytes:,} bytes - {BinnedLayout(**current).describe()}")
+    return scored
+
+
+def write_layout_header(path, layout, lut_bytes):
+    """Maps, dimensions and an index function for the optimized layout"""
+    guard = "AI_LUT_OPT_H"
+    nbx, nby, nvx, nvy, nay = layout.shape
+    start = layout.start_tile
+    bx_map, by_map, vx_map, vy_map, ay_map = layout.maps
+
+    def array(name, values):
+        return f"static const u8 {name}[{len(values)}] = {{{', '.join(str(int(v)) for v in values)}}};\n"
+
+    with open(path, 'w') as f:
+        f.write(f"// Auto-generated by lut_budget.py - {layout.describe()}\n")
+        f.write(f"// {len(lut_bytes)} LUT bytes (2-bit, MSB first) + {layout.map_bytes} map bytes\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n#include <genesis.h>\n\n")
+        f.write(f"#define AI_LUT_OPT_X_MIN {start * 8}\n#define AI_LUT_OPT_X_MAX 296\n")
+        f.write(f"#define AI_LUT_OPT_DIMS {{{nbx}, {nby}, {nvx}, {nvy}, {nay}}}\n\n")
+        f.write(array("ai_lut_opt_bx", bx_map[start:PADDLE_TILE + 1]))
+        f.write(array("ai_lut_opt_by", by_map))
+        f.write(array("ai_lut_opt_vx", vx_map[5:]))  # vx 1..4
+        f.write(array("ai_lut_opt_vy", vy_map))      # vy -4..4
+        f.write(array("ai_lut_opt_ay", ay_map))
+        f.write("\n// Entry index for a ball moving right with AI_LUT_OPT_X_MIN <= ball_x <= AI_LUT_OPT_X_MAX\n")
+        f.write("static inline u32 ai_lut_opt_index(s16 ball_x, s16 ball_y, s16 ball_vx, s16 ball_vy, s16 ai_y)\n{\n")
+        f.write("    u32 index = ai_lut_opt_bx[(ball_x >> 3) - (AI_LUT_OPT_X_MIN >> 3)];\n")
+        f.write(f"    index = index * {nby} + ai_lut_opt_by[ball_y >> 3];\n")
+        f.write(f"    index = index * {nvx} + ai_lut_opt_vx[(ball_vx > 4 ? 4 : ball_vx) - 1];\n")
+        f.write(f"    index = index * {nvy} + ai_lut_opt_vy[(ball_vy < -4 ? -4 : ball_vy > 4 ? 4 : ball_vy) + 4];\n")
+        f.write(f"    return index * {nay} + ai_lut_opt_ay[ai_y >> 3];\n}}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search LUT axis resolutions under a ROM byte budget")
+    parser.add_argument('--budget', type=int, default=PACKED_LAYOUT.num_bytes,
+                        help=f"ROM bytes for LUT + maps (default: {PACKED_LAYOUT.num_bytes}, the packed LUT)")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Trained .h5 model to reproduce")
+    parser.add_argument('--reference-lut', help="Use an existing LUT as the reference instead of --model")
+    parser.add_argument('--reference-layout', choices=sorted(LAYOUTS), default='packed')
+    parser.add_argument('--objective', choices=['agreement', 'winrate'], default='agreement')
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=2000, help="Steps of visitation play")
+    parser.add_argument('--serve-speeds', default='2,3,4', help="|vx| values drawn on every serve")
+    parser.add_argument('--restarts', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help="Candidates played for the win rate")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Write the optimized 2-bit LUT here (plus --header)")
+    parser.add_argument('--header', default=DEFAULT_HEADER)
+    args = parser.parse_args()
+
+    if args.reference_lut:
+        layout = LAYOUTS[args.reference_layout]
+        with open(args.reference_lut, 'rb') as f:
+            reference = reference_from_lut(lut_from_bytes(f.read(), layout), layout)
+        print(f"📂 Reference: {args.reference_lut} ({layout.name} layout)")
+    else:
+        reference = load_model_reference(args.model)
+        print(f"📂 Reference: {args.model}")
+
+    speeds = [int(s) for s in args.serve_speeds.split(',')]
+    start = time.time()
+    cells, weights, fallback_hits = collect_reference_visits(reference, args.envs, args.steps, speeds, args.seed)
+    print(f"🎮 {weights.sum():,} table-range states over {len(cells):,} cells in {time.time() - start:.1f}s")
+
+    start = time.time()
+    with Pool(args.workers, initializer=_init_worker,
+              initargs=(reference, cells, weights, fallback_hits)) as pool:
+        print(f"🔎 Searching layouts under {args.budget:,} bytes ({args.workers} workers)")
+        scored = search(args.budget, pool, args.restarts, args.seed)
+        ranked = sorted(scored.values(), key=lambda item: (-item[2], item[1]))[:args.top]
+        hand_picked = BinnedLayout((29, 7, 1.0), ball_y=18, ai_y=20)  # closest to PACKED_LAYOUT
+        candidates = [params for params, _, _ in ranked] + [hand_picked.params]
+        jobs = [(params, args.envs // 2, args.steps, speeds, args.seed + 7) for params in candidates]
+        win_rates = pool.map(_win_rate_params, jobs) if args.objective == 'winrate' else [None] * len(jobs)
+        hand_agreement = pool.apply(_score_params, (hand_picked.params,))
+    print(f"   {len(scored):,} layouts evaluated in {time.time() - start:.1f}s")
+
+    print(f"\n{'bytes':>7} {'agree':>7} {'win':>6}  layout")
+    rows = [(p, rom, score) for p, rom, score in ranked] + [(hand_picked.params, hand_picked.rom_bytes, hand_agreement)]
+    for i, ((params, rom, score), win) in enumerate(zip(rows, win_rates)):
+        label = " (hand-picked packed-like)" if i == len(rows) - 1 else ""
+        win_text = f"{win * 100:5.1f}%" if win is not None else "     -"
+        print(f"{rom:>7,} {score * 100:6.2f}% {win_text}  {BinnedLayout(**params).describe()}{label}")
+
+    if args.objective == 'winrate':
+        best = max(range(len(ranked)), key=lambda i: (win_rates[i], ranked[i][2]))
+    else:
+        best = 0
+    layout = BinnedLayout(**ranked[best][0])
+    print(f"\n🏆 {layout.describe()}: {layout.rom_bytes:,} bytes, {ranked[best][2] * 100:.2f}% agreement")
+
+    if args.out:
+        lut = fit_lut(layout, reference, cells, weights)
+        data = pack_2bit(lut).tobytes()
+        with open(args.out, 'wb') as f:
+            f.write(data)
+        write_layout_header(args.header, layout, data)
+        print(f"💾 {args.out} ({len(data):,} bytes) and {args.header} written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Vectorized lookup-table builder for Genesis Pong
+
+Evaluates the integer (>>10 fixed-point) 5->8->3 network over a whole LUT grid
+with NumPy instead of one Python call per cell. Because every first-layer term
+depends on a single input axis, per-axis partial sums are computed once and
+broadcast, so the 2.5M-cell full table builds in well under a second.
+
+Layouts:
+- FULL_LAYOUT:   40x28x9x9x28, one byte per action (pong_ai_train.py output)
+- PACKED_LAYOUT: 7x18x4x9x24, 2 bits per action, 4 per byte MSB-first
+                 (gen_lut_v3.1.py output, read by pong_ai_lookup in ai.c)
+
+Also holds the shared weight quantization (x1024, truncated like int()) and the
+C writers for weights and LUT arrays.
+
+build_luts(symmetric=True) enforces the court's vertical mirror symmetry
+(pong_env.mirror_codes): it evaluates the network only on the ball_y rows
+up to their mirror, plus the ai_y columns that have no mirror on the axis,
+and fills the other cells from their mirror cell with UP and DOWN swapped.
+"""
+
+import numpy as np
+
+from pong_env import MIRROR_BALL_TILES, MIRROR_PADDLE_TILES, MIRRORED_ACTIONS
+
+SCALE_FACTOR = 1024
+INPUT_NAMES = ["ball_x", "ball_y", "ball_vx", "ball_vy", "ai_y"]
+
+
+class LutLayout:
+    """Axis values and normalization divisors for one LUT format
+
+    Index order is (ball_x, ball_y, vx, vy, ai_y) with ai_y innermost. Tile axes
+    are normalized as (tile * 1024) // div; velocities as ((v + 4) * 1024) >> 3.
+    tile_offsets are the screen tiles (pixel >> 3) of index 0 on the ball_x,
+    ball_y and ai_y axes, and active_x is the ball_x pixel range (with vx > 0)
+    in which the game consults the table, or None if it always does.
+    """
+
+    def __init__(self, name, bx_tiles, by_tiles, vx_values, vy_values, ay_tiles,
+                 bx_div, by_div, ay_div, bits_per_entry=8, tile_offsets=(0, 0, 0), active_x=None):
+        self.name = name
+        self.bx_tiles = np.asarray(bx_tiles, dtype=np.int64)
+        self.by_tiles = np.asarray(by_tiles, dtype=np.int64)
+        self.vx_values = np.asarray(vx_values, dtype=np.int64)
+        self.vy_values = np.asarray(vy_values, dtype=np.int64)
+        self.ay_tiles = np.asarray(ay_tiles, dtype=np.int64)
+        self.bx_div = bx_div
+        self.by_div = by_div
+        self.ay_div = ay_div
+        self.bits_per_entry = bits_per_entry
+        self.tile_offsets = tile_offsets
+        self.active_x = active_x
+
+    @property
+    def shape(self):
+        return (len(self.bx_tiles), len(self.by_tiles), len(self.vx_values),
+                len(self.vy_values), len(self.ay_tiles))
+
+    @property
+    def num_entries(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def num_bytes(self):
+        return (self.num_entries * self.bits_per_entry + 7) // 8
+
+    def tile_indices(self, tile_bx, tile_by, ball_vx, ball_vy, tile_ay):
+        """Flat LUT index for tile coordinates and velocities, clamped like pong_ai_lookup"""
+        ox, oy, oa = self.tile_offsets
+        nbx, nby, nvx, nvy, nay = self.shape
+        bx = np.clip(np.asarray(tile_bx) - ox, 0, nbx - 1)
+        by = np.clip(np.asarray(tile_by) - oy, 0, nby - 1)
+        vx = np.clip(np.asarray(ball_vx) - self.vx_values[0], 0, nvx - 1)
+        vy = np.clip(np.asarray(ball_vy) - self.vy_values[0], 0, nvy - 1)
+        ay = np.clip(np.asarray(tile_ay) - oa, 0, nay - 1)
+        return (((bx * nby + by) * nvx + vx) * nvy + vy) * nay + ay
+
+    def code_indices(self, codes):
+        """Flat LUT index for pong_env state codes (..., 5); the active_x mask needs pixels, see cell_indices"""
+        return self.tile_indices(*np.moveaxis(np.asarray(codes, dtype=np.int64), -1, 0))
+
+    def cell_indices(self, ball_x, ball_y, ball_vx, ball_vy, ai_y):
+        """Flat LUT index for pixel states (clamped like pong_ai_lookup) and the mask of states that use the table"""
+        index = self.tile_indices(np.asarray(ball_x) >> 3, np.asarray(ball_y) >> 3, ball_vx, ball_vy,
+                                  np.asarray(ai_y) >> 3)
+        if self.active_x is None:
+            active = np.ones(index.shape, dtype=bool)
+        else:
+            active = (ball_x >= self.active_x[0]) & (ball_x <= self.active_x[1]) & (np.asarray(ball_vx) > 0)
+        return index, active
+
+    def mirror_plan(self):
+        """Axis maps for a mirror-symmetric build, or None when the vy axis is not symmetric
+
+        -> (computed by rows, mirrored by rows, their source rows, ai_y columns without a mirror,
+            ai_y columns with one, their source columns, vy source index per vy)
+        """
+        def mirror_index(values, mirrored):
+            lookup = {int(v): i for i, v in enumerate(values)}
+            return np.array([lookup.get(int(m), -1) for m in mirrored])
+
+        oy, oa = self.tile_offsets[1], self.tile_offsets[2]
+        by_source = mirror_index(self.by_tiles, MIRROR_BALL_TILES - (self.by_tiles + oy) - oy)
+        ay_source = mirror_index(self.ay_tiles, MIRROR_PADDLE_TILES - (self.ay_tiles + oa) - oa)
+        vy_source = mirror_index(self.vy_values, -self.vy_values)
+        if (vy_source < 0).any():
+            return None
+        rows = np.arange(len(self.by_tiles))
+        mirrored_rows = np.flatnonzero((by_source >= 0) & (by_source < rows))
+        computed_rows = np.setdiff1d(rows, mirrored_rows)
+        own_cols = np.flatnonzero(ay_source < 0)
+        mirrored_cols = np.flatnonzero(ay_source >= 0)
+        return (computed_rows, mirrored_rows, by_source[mirrored_rows], own_cols, mirrored_cols,
+                ay_source[mirrored_cols], vy_source)
+
+    def axis_inputs(self):
+        """Normalized integer network input for every value of each axis"""
+        return [
+            (self.bx_tiles * SCALE_FACTOR) // self.bx_div,
+            (self.by_tiles * SCALE_FACTOR) // self.by_div,
+            ((self.vx_values + 4) * SCALE_FACTOR) >> 3,
+            ((self.vy_values + 4) * SCALE_FACTOR) >> 3,
+            (self.ay_tiles * SCALE_FACTOR) // self.ay_div,
+        ]
+
+
+FULL_LAYOUT = LutLayout(
+    "full",
+    bx_tiles=range(40), by_tiles=range(28), vx_values=range(-4, 5), vy_values=range(-4, 5),
+    ay_tiles=range(28), bx_div=39, by_div=27, ay_div=27, bits_per_entry=8)
+
+PACKED_LAYOUT = LutLayout(
+    "packed",
+    bx_tiles=range(7), by_tiles=range(18), vx_values=range(1, 5), vy_values=range(-4, 5),
+    ay_tiles=range(24), bx_div=7, by_div=18, ay_div=24, bits_per_entry=2,
+    tile_offsets=(29, 2, 2), active_x=(232, 296))  # ai.c: LIMIT_X 232, ball_y/ai_y from 16
+
+LAYOUTS = {layout.name: layout for layout in (FULL_LAYOUT, PACKED_LAYOUT)}
+
+
+def quantize_weights(weights, scale_factor=SCALE_FACTOR):
+    """Float [w1 (5,8), b1 (8,), w2 (8,3), b2 (3,)] -> int64 arrays, truncated like int(w * scale)"""
+    return [np.trunc(np.asarray(w, dtype=np.float64) * scale_factor).astype(np.int64) for w in weights]
+
+
+def nn_forward_int(inputs, qweights):
+    """Integer forward pass for a batch of normalized inputs (..., 5) -> actions (...)"""
+    w1, b1, w2, b2 = qweights
+    inputs = np.asarray(inputs, dtype=np.int64)
+    hidden = np.broadcast_to(b1, inputs.shape[:-1] + (len(b1),)).copy()
+    for i in range(inputs.shape[-1]):
+        hidden += (inputs[..., i:i + 1] * w1[i]) >> 10
+    np.maximum(hidden, 0, out=hidden)
+    outputs = np.broadcast_to(b2, inputs.shape[:-1] + (len(b2),)).copy()
+    for h in range(hidden.shape[-1]):
+        outputs += (hidden[..., h:h + 1] * w2[h]) >> 10
+    return np.argmax(outputs, axis=-1).astype(np.uint8)
+
+
+def build_lut(qweights, layout=FULL_LAYOUT, symmetric=False):
+    """Actions for every cell of layout, shaped layout.shape (uint8)"""
+    return build_luts([qweights], layout, symmetric=symmetric)[0]
+
+
+def build_luts(qweights_list, layout=FULL_LAYOUT, temperatures=None, seed=0, symmetric=False):
+    """LUTs for several weight sets in one pass over the grid -> (num_models,) + layout.shape (uint8)
+
+    The models are stacked on a leading axis so every step below is one
+    broadcast over all of them. A temperature > 0 samples the action from
+    softmax(outputs / 1024 / T) (Gumbel-max, seeded) instead of taking the argmax.
+    symmetric=True builds a vertically mirror-symmetric table from about half
+    the cells (see LutLayout.mirror_plan).
+    """
+    w1, b1, w2, b2 = (np.stack(ws) for ws in zip(*qweights_list))
+    k = len(qweights_list)
+    expand = (slice(None),) + (None,) * 4  # model axis in front of the 4 inner grid axes
+    bx_in, by_in, vx_in, vy_in, ay_in = layout.axis_inputs()
+    # Per-axis first-layer partial sums, shape (models, axis_len, hidden)
+    t_bx = (bx_in[None, :, None] * w1[:, None, 0]) >> 10
+    t_by = (by_in[None, :, None] * w1[:, None, 1]) >> 10
+    t_vx = (vx_in[None, :, None] * w1[:, None, 2]) >> 10
+    t_vy = (vy_in[None, :, None] * w1[:, None, 3]) >> 10
+    t_ay = (ay_in[None, :, None] * w1[:, None, 4]) >> 10
+
+    inner = (t_by[:, :, None, None, None, :] + t_vx[:, None, :, None, None, :] +
+             t_vy[:, None, None, :, None, :] + t_ay[:, None, None, None, :, :] + b1[expand])
+    temperatures = np.zeros(k) if temperatures is None else np.asarray(temperatures, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    def actions(pre_hidden, bx):
+        hidden = np.maximum(pre_hidden + t_bx[:, bx][expand], 0)
+        outputs = np.broadcast_to(b2[expand], hidden.shape[:-1] + (b2.shape[-1],)).copy()
+        for h in range(hidden.shape[-1]):
+            outputs += (hidden[..., h:h + 1] * w2[:, h][expand]) >> 10
+        result = np.empty(outputs.shape[:-1], dtype=np.uint8)
+        for m in np.flatnonzero(temperatures > 0):
+            logits = outputs[m] / (SCALE_FACTOR * temperatures[m])
+            result[m] = np.argmax(logits + rng.gumbel(size=logits.shape), axis=-1)
+        for m in np.flatnonzero(temperatures <= 0):
+            result[m] = np.argmax(outputs[m], axis=-1)
+        return result
+
+    plan = layout.mirror_plan() if symmetric else None
+    luts = np.empty((k,) + layout.shape, dtype=np.uint8)
+    if plan is None:
+        for bx in range(len(bx_in)):
+            luts[:, bx] = actions(inner, bx)
+        return luts
+
+    rows, mirrored_rows, source_rows, own_cols, mirrored_cols, source_cols, vy_source = plan
+    inner_rows = inner[:, rows]
+    inner_own = inner[:, mirrored_rows][:, :, :, :, own_cols]
+    for bx in range(len(bx_in)):
+        luts[:, bx, rows] = actions(inner_rows, bx)
+        block = np.empty((k, len(mirrored_rows)) + layout.shape[2:], dtype=np.uint8)
+        block[..., own_cols] = actions(inner_own, bx)
+        source = luts[:, bx, source_rows][:, :, :, vy_source][..., source_cols]
+        block[..., mirrored_cols] = MIRRORED_ACTIONS[source]
+        luts[:, bx, mirrored_rows] = block
+    return luts
+
+
+def pack_2bit(actions):
+    """Pack actions 4 per byte, first action in the high bits (GET_ACTION_2BIT order)"""
+    flat = np.asarray(actions, dtype=np.uint8).ravel() & 0x3
+    pad = (-len(flat)) % 4
+    if pad:
+        flat = np.concatenate([flat, np.zeros(pad, dtype=np.uint8)])
+    quads = flat.reshape(-1, 4)
+    return ((quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]).astype(np.uint8)
+
+
+def unpack_2bit(packed, count=None):
+    packed = np.asarray(packed, dtype=np.uint8)
+    actions = np.stack([(packed >> 6) & 3, (packed >> 4) & 3, (packed >> 2) & 3, packed & 3], axis=1).ravel()
+    return actions if count is None else actions[:count]
+
+
+def lut_to_bytes(lut, layout):
+    if layout.bits_per_entry == 2:
+        return pack_2bit(lut).tobytes()
+    return np.asarray(lut, dtype=np.uint8).tobytes()
+
+
+def lut_from_bytes(data, layout):
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if layout.bits_per_entry == 2:
+        raw = unpack_2bit(raw, layout.num_entries)
+    return raw[:layout.num_entries].reshape(layout.shape)
+
+
+def format_weights_c(qweights, ctype="s16"):
+    """C array definitions for weights.h / ai.c"""
+    w1, b1, w2, b2 = qweights
+    lines = [f"// First layer weights: {len(w1)}x{len(b1)} matrix",
+             f"const {ctype} weights1[INPUT_SIZE][HIDDEN_SIZE] = {{"]
+    for i, row in enumerate(w1):
+        lines.append(f"    {{{', '.join(str(int(w)) for w in row)}}}, // {INPUT_NAMES[i]} weights")
+    lines += ["};", "", f"// First layer bias: {len(b1)} values",
+              f"const {ctype} bias1[HIDDEN_SIZE] = {{{', '.join(str(int(b)) for b in b1)}}};", "",
+              f"// Second layer weights: {len(w2)}x{len(b2)} matrix",
+              f"const {ctype} weights2[HIDDEN_SIZE][OUTPUT_SIZE] = {{"]
+    for h, row in enumerate(w2):
+        lines.append(f"    {{{', '.join(str(int(w)) for w in row)}}}, // hidden neuron {h}")
+    lines += ["};", "", f"// Second layer bias: {len(b2)} values",
+              f"const {ctype} bias2[OUTPUT_SIZE] = {{{', '.join(str(int(b)) for b in b2)}}};"]
+    return "\n".join(lines) + "\n"
+
+
+def write_weights_header(path, qweights, guard="WEIGHTS_GENERATED_H"):
+    """Write a standalone header with the quantized weights"""
+    with open(path, 'w') as f:
+        f.write(f"// Auto-generated by lut_builder.py - scale factor {SCALE_FACTOR} (use >>10)\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n#include <genesis.h>\n\n")
+        f.write(f"#define INPUT_SIZE {len(qweights[0])}\n#define HIDDEN_SIZE {len(qweights[1])}\n"
+                f"#define OUTPUT_SIZE {len(qweights[3])}\n\n")
+        f.write(format_weights_c(qweights))
+        f.write(f"\n#endif // {guard}\n")
+
+
+def write_lut_c_array(path, lut_bytes, name="ai_lookup_table"):
+    """Write raw LUT bytes as a C array (20 values per row)"""
+    values = np.frombuffer(bytes(lut_bytes), dtype=np.uint8)
+    with open(path, 'w') as f:
+        f.write("// Auto-generated AI lookup table for Genesis Pong\n")
+        f.write("// Generated by lut_builder.py\n\n")
+        f.write("#include <genesis.h>\n\n")
+        f.write(f"const u8 {name}[{len(values)}] = {{\n")
+        rows = [", ".join(map(str, values[i:i + 20].tolist())) for i in range(0, len(values), 20)]
+        f.write(",\n".join("    " + row for row in rows))
+        f.write("\n};\n")
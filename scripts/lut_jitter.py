@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+LUT jitter and oscillation analyzer for Genesis Pong
+
+pong_ai_lookup keeps a 4-entry recent_actions ring to suppress up-down-up-down
+jitter. The jitter comes from the table itself: a cell that says DOWN above a
+cell that says UP makes the paddle bounce between them forever.
+
+This tool finds those cycles and can remove them:
+- static: for every (ball_x, ball_y, vx, vy) row, the paddle's pixel-level
+  transition graph over ai_y (PADDLE_SPEED 3, update.c bounds 16..160) with
+  the ball frozen is walked for all rows at once, and every cycle longer than
+  a fixed point is reported by length and by region
+- dynamic: VecPongEnv games played with the LUT (like pong_ai_lookup, with
+  its centering fallback) count the frames where the last 4 actions alternate
+  UP/DOWN, i.e. the frames ai.c's ring suppresses
+- repair (--smooth): the UP cell of every cycle becomes STAY. That is one
+  changed cell per cycle, and it turns the cycle into a fixed point.
+
+Usage:
+    python lut_jitter.py --lut ../pong/res/ai_lut.bin --layout packed
+    python lut_jitter.py --lut ../pong/res/ai_lut.bin --smooth --out ../pong/res/ai_lut_smooth.bin
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from pong_native import make_vec_env
+from lut_builder import LAYOUTS, INPUT_NAMES, lut_from_bytes, lut_to_bytes
+from lut_visitation import redraw_serve_speed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ACTION_STAY, ACTION_UP, ACTION_DOWN = 0, 1, 2
+PADDLE_SPEED = 3
+PADDLE_MIN_Y, PADDLE_MAX_Y = 16, 160  # update.c: moves up while y > 16, down while y < 160
+
+
+def _ay_index(layout, ai_y):
+    return np.clip((ai_y >> 3) - layout.tile_offsets[2], 0, layout.shape[-1] - 1)
+
+
+def find_cycles(lut, layout, chunk=4096):
+    """Cycle length of every (row, paddle y) start in the frozen-ball paddle graph
+
+    Returns (positions (P,), cycle_len (rows, P), on_cycle (rows, P)); a
+    cycle length of 1 means the paddle settles.
+    """
+    rows = np.asarray(lut).reshape(-1, layout.shape[-1])
+    positions = np.arange(PADDLE_MIN_Y - PADDLE_SPEED + 1, PADDLE_MAX_Y + PADDLE_SPEED)
+    length = np.zeros((len(rows), len(positions)), dtype=np.int64)
+    on_cycle = np.zeros(length.shape, dtype=bool)
+    for start in range(0, len(rows), chunk):
+        actions = rows[start:start + chunk][:, _ay_index(layout, positions)]
+        up = (actions == ACTION_UP) & (positions > PADDLE_MIN_Y)
+        down = (actions == ACTION_DOWN) & (positions < PADDLE_MAX_Y)
+        nxt = np.arange(len(positions)) + np.where(up, -PADDLE_SPEED, np.where(down, PADDLE_SPEED, 0))
+        rows_idx = np.arange(len(nxt))[:, None]
+
+        # After len(positions) steps every walk is inside its cycle; then measure the cycle
+        node = np.broadcast_to(np.arange(len(positions)), nxt.shape).copy()
+        for _ in range(len(positions)):
+            node = nxt[rows_idx, node]
+        block = length[start:start + chunk]
+        walker = nxt[rows_idx, node]
+        for k in range(1, len(positions) + 1):
+            block[(walker == node) & (block == 0)] = k
+            if (block > 0).all():
+                break
+            walker = nxt[rows_idx, walker]
+        marks = on_cycle[start:start + chunk]
+        for k in range(int(block.max())):
+            marks[rows_idx, node] |= k < block
+            node = nxt[rows_idx, node]
+    return positions, length, on_cycle
+
+
+def cycle_rows(lut, layout):
+    """Mask over layout.shape[:-1]: rows whose paddle graph has a cycle longer than 1"""
+    _, length, _ = find_cycles(lut, layout)
+    return (length > 1).any(axis=1).reshape(layout.shape[:-1]), length
+
+
+def smooth_lut(lut, layout):
+    """Minimal repair: STAY on the UP cell of every paddle cycle -> (lut, changed cells)
+
+    A cycle is a DOWN cell directly above an UP cell; stopping on the UP cell
+    makes it a fixed point whichever side the paddle arrives from.
+    """
+    lut = np.array(lut, dtype=np.uint8)
+    rows = lut.reshape(-1, layout.shape[-1])
+    positions, length, on_cycle = find_cycles(lut, layout)
+    row, pos = np.nonzero(on_cycle & (length > 1))
+    ay = _ay_index(layout, positions[pos])
+    trapped = rows[row, ay] == ACTION_UP
+    changed = np.unique(row[trapped] * rows.shape[1] + ay[trapped])
+    rows.reshape(-1)[changed] = ACTION_STAY
+    return lut, len(changed)
+
+
+def oscillation_rate(lut, layout, num_envs=2048, steps=3000, serve_speeds=(2, 3, 4), seed=0):
+    """Frames where the last 4 actions alternate UP/DOWN, per table cell (int64, layout.shape), and frames played"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    redraw_serve_speed(env, np.ones(num_envs, dtype=bool), serve_speeds, rng)
+    flat = np.asarray(lut).ravel()
+    history = np.zeros((4, num_envs), dtype=np.uint8)
+    counts = np.zeros(layout.num_entries, dtype=np.int64)
+    frames = 0
+    for step in range(steps):
+        index, active = layout.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        center = env.ai_y + 24
+        fallback = np.where(center < 112, ACTION_DOWN, np.where(center > 112, ACTION_UP, ACTION_STAY))
+        actions = np.where(active, flat[index], fallback)
+        history[step % 4] = actions
+        a, b, c, d = (history[(step - i) % 4] for i in range(4))
+        alternating = (active & (a != ACTION_STAY) & (b != ACTION_STAY) & (a != b) & (a == c) & (b == d)
+                       & (c != ACTION_STAY))
+        counts += np.bincount(index[alternating], minlength=len(counts))
+        frames += int(active.sum())
+        _, _, dones = env.step(actions)
+        env.reset(dones)
+        history[:, dones] = ACTION_STAY
+        redraw_serve_speed(env, dones, serve_speeds, rng)
+    return counts.reshape(layout.shape), frames
+
+
+def report_regions(mask, layout, title):
+    """Share of rows flagged in mask, broken down by each non-ai_y axis"""
+    values = [layout.bx_tiles + layout.tile_offsets[0], layout.by_tiles + layout.tile_offsets[1],
+              layout.vx_values, layout.vy_values]
+    print(f"\n📍 {title} by region")
+    for axis, name in enumerate(INPUT_NAMES[:4]):
+        other = tuple(a for a in range(mask.ndim) if a != axis)
+        share = mask.mean(axis=other)
+        label = "tile" if name in ('ball_x', 'ball_y') else "v"
+        cells = "  ".join(f"{label}{int(v)}:{s * 100:.0f}%" for v, s in zip(values[axis], share))
+        print(f"   {name:<7} {cells}")
+
+
+def analyze(lut, layout, name, num_envs, steps):
+    has_cycle, length = cycle_rows(lut, layout)
+    lengths = np.bincount(length.ravel())
+    cycle_lengths = {k: int(c) for k, c in enumerate(lengths) if k > 1 and c}
+    print(f"\n🔁 {name}: {has_cycle.sum():,} / {has_cycle.size:,} rows ({has_cycle.mean() * 100:.1f}%) "
+          f"trap the paddle in a cycle; paddle starts by cycle length: {cycle_lengths or 'none'}")
+    osc, frames = oscillation_rate(lut, layout, num_envs, steps)
+    print(f"🎮 In play: {osc.sum():,} of {frames:,} table frames ({osc.sum() / max(frames, 1) * 100:.2f}%) "
+          f"end an UP/DOWN/UP/DOWN run")
+    return has_cycle, osc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and repair ai_y oscillation cycles in a LUT")
+    parser.add_argument('--lut', default=os.path.join(SCRIPT_DIR, '..', 'pong', 'res', 'ai_lut.bin'))
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='packed')
+    parser.add_argument('--envs', type=int, default=2048)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--smooth', action='store_true', help="Apply the minimal STAY repair and re-analyze")
+    parser.add_argument('--out', help="Write the repaired LUT here (with --smooth)")
+    args = parser.parse_args()
+
+    layout = LAYOUTS[args.layout]
+    with open(args.lut, 'rb') as f:
+        lut = lut_from_bytes(f.read(), layout)
+
+    has_cycle, _ = analyze(lut, layout, os.path.basename(args.lut), args.envs, args.steps)
+    report_regions(has_cycle, layout, "Rows with cycles")
+
+    if args.smooth:
+        smoothed, changed = smooth_lut(lut, layout)
+        print(f"\n🧽 Smoothing changed {changed:,} cells ({changed / lut.size * 100:.2f}%)")
+        analyze(smoothed, layout, "smoothed", args.envs, args.steps)
+        if args.out:
+            with open(args.out, 'wb') as f:
+                f.write(lut_to_bytes(smoothed, layout))
+            print(f"💾 {args.out} written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Exact tabular planner for the Genesis Pong AI lookup table
+
+Instead of approximating Q with the 8-neuron DQN and quantizing it, this builds
+the discretized transition model of PongEnv.step over the LUT state space
+(ball tile x/y, vx, vy, paddle tile: 40x28x9x9x28) and solves it with
+vectorized value iteration.
+
+Model:
+- Every cell is an aggregate of pixel states, sampled uniformly (all 8x8 ball
+  offsets, all 8 paddle offsets), stepped with the exact integer physics
+- Wall bounce noise is enumerated as explicit branches (BOUNCE_NOISE_PROB)
+- The scripted opponent is a chance node: when the ball first reaches x<=24
+  it is returned with a probability per vy, estimated by simulating VecPongEnv
+- Rewards are the sparse game terms of PongEnv (+1 hit, +1 AI scores, -1
+  conceded); the shaping terms depend on history that is not in the LUT state
+
+Ball and paddle move independently except where the ball can reach the AI
+paddle (x >= 296), so the model is stored as a sparse ball-cell matrix, three
+28x28 paddle matrices and a sparse joint matrix for the paddle-collision cells.
+
+The optimal action per cell is written in the same format as ai_lut.bin (the
+packed layout read by pong_ai_lookup, or the full layout), and Q* is saved so
+any LUT (e.g. from a DQN) can be scored against the optimum with --score.
+
+A layout that does not cover the whole grid is planned the way the ROM plays
+it: states outside active_x or with vx <= 0 take the centering fallback of
+pong_ai_lookup, and the states inside read the table cell their clamped index
+selects. One action per table cell must serve all the states that share it,
+so this is solved by policy iteration over the table (table_iteration) and
+the saved Q is that of the planned table. Grid states are read at their
+pixel origin, like lut_budget.reference_from_lut.
+
+The LUT is written under models/planner/ by default; copy it to pong/res/
+to ship it.
+
+Usage:
+    python lut_planner.py [--layout packed|full] [--output ../models/planner/ai_lut_packed.bin] [--gamma 0.99]
+    python lut_planner.py --score ../pong/res/ai_lut.bin [--score-layout packed]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from pong_env import BOUNCE_NOISE_PROB
+from pong_native import make_vec_env
+from lut_builder import FULL_LAYOUT, LAYOUTS, lut_to_bytes, lut_from_bytes
+from lut_budget import fallback_actions
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PLANNER_DIR = os.path.join(SCRIPT_DIR, '..', 'models', 'planner')
+
+BALL_SHAPE = (40, 28, 9, 9)          # ball tile x, tile y, vx + 4, vy + 4
+NUM_BALL = int(np.prod(BALL_SHAPE))
+NUM_PADDLE = 28                      # paddle tile (ai_y // 8)
+NUM_STATES = NUM_BALL * NUM_PADDLE   # flat index == FULL_LAYOUT order
+NUM_ACTIONS = 3
+
+_OFFSETS = np.arange(8)
+_BALL_DX, _BALL_DY = (a.ravel() for a in np.meshgrid(_OFFSETS, _OFFSETS, indexing='ij'))
+
+
+def estimate_return_prob(num_envs=4096, steps=3000, seed=0, min_count=200):
+    """Chance the scripted opponent returns a ball that reaches x<=24, per vy (-4..4)
+
+    Measured on VecPongEnv with a random AI; vy values seen fewer than
+    min_count times fall back to the pooled rate.
+    """
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    pending = np.full(num_envs, -1)  # vy index at arrival, -1 when no arrival is open
+    returned = np.zeros(9)
+    missed = np.zeros(9)
+    for _ in range(steps):
+        prev_x = env.ball_x.copy()
+        prev_vx = env.ball_vx.copy()
+        _, reward, dones = env.step(rng.integers(0, 3, num_envs))
+        arrived = (prev_vx < 0) & (prev_x > 24) & (env.ball_x <= 24)
+        pending[arrived] = env.ball_vy[arrived] + 4
+        open_ = pending >= 0
+        back = open_ & (env.ball_vx > 0)
+        lost = open_ & dones & (reward > 0)
+        np.add.at(returned, pending[back], 1)
+        np.add.at(missed, pending[lost], 1)
+        pending[back | lost | dones] = -1
+        env.reset(dones)
+    total = returned + missed
+    pooled = returned.sum() / max(total.sum(), 1)
+    return np.where(total >= min_count, returned / np.maximum(total, 1), pooled)
+
+
+def _ball_index(x, y, vx, vy):
+    bx = np.clip(x // 8, 0, 39)
+    by = np.clip(y // 8, 0, 27)
+    return ((bx * 28 + by) * 9 + (vx + 4)) * 9 + (vy + 4)
+
+
+def _ball_samples(cells):
+    """Pixel samples (all 64 offsets) of ball cells -> src, x, y, vx, vy, prob"""
+    bx, by, vxi, vyi = np.unravel_index(cells, BALL_SHAPE)
+    n = len(_BALL_DX)
+    src = np.repeat(cells, n)
+    x = (np.repeat(bx * 8, n) + np.tile(_BALL_DX, len(cells))).astype(np.int64)
+    y = (np.repeat(by * 8, n) + np.tile(_BALL_DY, len(cells))).astype(np.int64)
+    vx = np.repeat(vxi - 4, n).astype(np.int64)
+    vy = np.repeat(vyi - 4, n).astype(np.int64)
+    return src, x, y, vx, vy, np.full(len(src), 1.0 / n)
+
+
+def _ball_move(src, x, y, vx, vy, prob):
+    """Ball movement and wall bounce (PongEnv.step order), bounce noise enumerated as branches
+
+    Returns src, x, x2, y2, vx, vy2, prob with one entry per branch.
+    """
+    x2 = x + vx
+    y2 = y + vy
+    wall = (y2 <= 16) | (y2 >= 208)
+    vy2 = np.where(wall, -vy, vy)
+    noise = np.where(wall, BOUNCE_NOISE_PROB, 0.0)
+    branch_vy = [vy2, np.clip(vy2 - 1, -4, 4), np.clip(vy2 + 1, -4, 4)]
+    branch_p = [prob * (1.0 - noise), prob * noise / 2, prob * noise / 2]
+    keep = [np.ones(len(src), dtype=bool), wall, wall]
+    pick = lambda arrays: np.concatenate([a[k] for a, k in zip(arrays, keep)])
+    return (pick([src] * 3), pick([x] * 3), pick([x2] * 3), pick([y2] * 3), pick([vx] * 3),
+            pick(branch_vy), pick(branch_p))
+
+
+def _aggregate(rows, cols, probs, num_cols):
+    """Sum duplicate (row, col) entries; result sorted by row"""
+    keys, inverse = np.unique(rows * num_cols + cols, return_inverse=True)
+    return keys // num_cols, keys % num_cols, np.bincount(inverse, weights=probs)
+
+
+def paddle_transitions():
+    """Ppad[a, t, t']: paddle tile transition per action (paddle moves before the ball)"""
+    ay = (np.arange(NUM_PADDLE)[:, None] * 8 + _OFFSETS).ravel()
+    ppad = np.zeros((NUM_ACTIONS, NUM_PADDLE, NUM_PADDLE))
+    for action, ay2 in enumerate(_paddle_move(ay)):
+        np.add.at(ppad[action], (ay // 8, np.clip(ay2 // 8, 0, 27)), 1.0 / 8)
+    return ppad
+
+
+def _paddle_move(ay):
+    """ai_y after each action (0=stay, 1=up, 2=down), same bounds as PongEnv.step"""
+    return ay, np.where(ay > 8, ay - 3, ay), np.where(ay < 160, ay + 3, ay)
+
+
+class PongMDP:
+    """Sparse transition model of the aggregated LUT-state MDP"""
+
+    def __init__(self, return_prob, chunk=64):
+        self.return_prob = np.asarray(return_prob, dtype=np.float64)
+        self.paddle = paddle_transitions()
+
+        # Ball cells whose next position can reach the AI paddle need the joint model
+        cells = np.arange(NUM_BALL)
+        bx, _, vxi, _ = np.unravel_index(cells, BALL_SHAPE)
+        vx = vxi - 4
+        self.collision_cells = cells[(vx > 0) & (bx * 8 + 7 + vx >= 296)]
+        free = np.ones(NUM_BALL, dtype=bool)
+        free[self.collision_cells] = False
+        self._build_ball(cells[free])
+        self._build_joint(chunk)
+
+    def _build_ball(self, cells):
+        rows, cols, probs = [], [], []
+        self.ball_reward = np.zeros(NUM_BALL)
+        for bx in range(BALL_SHAPE[0]):
+            chunk = cells[cells // (NUM_BALL // BALL_SHAPE[0]) == bx]
+            if not len(chunk):
+                continue
+            src, x, x2, y2, vx, vy2, p = _ball_move(*_ball_samples(chunk))
+            # Opponent chance node on first arrival at x<=24
+            arrive = (vx < 0) & (x > 24) & (x2 <= 24)
+            p_ret = np.where(arrive, self.return_prob[vy2 + 4], 0.0)
+            src = np.concatenate([src, src[arrive]])
+            x2 = np.concatenate([x2, np.full(int(arrive.sum()), 24)])
+            y2 = np.concatenate([y2, y2[arrive]])
+            vx = np.concatenate([vx, -vx[arrive]])
+            vy2 = np.concatenate([vy2, vy2[arrive]])
+            p = np.concatenate([p * (1.0 - p_ret), (p * p_ret)[arrive]])
+            # AI scores when an unreturned ball reaches x<=0
+            scored = (vx < 0) & (x2 <= 0)
+            self.ball_reward += np.bincount(src[scored], weights=p[scored], minlength=NUM_BALL)
+            live = ~scored & (p > 0)
+            r, c, v = _aggregate(src[live], _ball_index(x2[live], y2[live], vx[live], vy2[live]),
+                                 p[live], NUM_BALL)
+            rows.append(r)
+            cols.append(c)
+            probs.append(v)
+        self.ball_rows = np.concatenate(rows)
+        self.ball_cols = np.concatenate(cols)
+        self.ball_probs = np.concatenate(probs)
+        self._ball_keys = (np.arange(NUM_PADDLE)[:, None] * NUM_BALL + self.ball_rows).ravel()
+        self._paddle_all = np.concatenate(list(self.paddle.transpose(0, 2, 1)), axis=1)  # (28, 3 * 28)
+
+    def _build_joint(self, chunk):
+        ay = np.arange(NUM_PADDLE) * 8 + _OFFSETS[:, None]                  # (8, 28)
+        ay2 = np.stack(_paddle_move(ay))                                     # (3, 8, 28)
+        a = np.broadcast_to(np.arange(NUM_ACTIONS)[:, None, None], ay2.shape).ravel()
+        t = np.broadcast_to(np.arange(NUM_PADDLE), ay2.shape).ravel()
+        t2 = np.clip(ay2 // 8, 0, 27).ravel()
+        ay2 = ay2.ravel()
+        rows, cols, probs = [], [], []
+        self.joint_keys = []
+        self.joint_reward = []
+        for start in range(0, len(self.collision_cells), chunk):
+            cells = self.collision_cells[start:start + chunk]
+            src, _, x2, y2, vx, vy2, p = (v[:, None] for v in _ball_move(*_ball_samples(cells)))
+            hit = (x2 >= 296) & (ay2 <= y2) & (y2 <= ay2 + 48)
+            conceded = ~hit & (x2 >= 320)
+            # Rows are (ball cell, action, paddle tile) in chunk-local numbering
+            local = np.searchsorted(cells, src)
+            row = (local * NUM_ACTIONS + a) * NUM_PADDLE + t
+            num_rows = len(cells) * NUM_ACTIONS * NUM_PADDLE
+            prob = np.broadcast_to(p / 8, row.shape)
+            reward = np.where(hit, 1.0, np.where(conceded, -1.0, 0.0))
+            self.joint_reward.append(np.bincount(row.ravel(), weights=(prob * reward).ravel(),
+                                                 minlength=num_rows))
+            self.joint_keys.append(((cells[:, None] * NUM_ACTIONS + np.arange(NUM_ACTIONS)) * NUM_PADDLE)
+                                   .ravel()[:, None] + np.arange(NUM_PADDLE))
+            # Sum duplicates with one dense bincount: successor ball cells are renumbered
+            # compactly and the paddle tile is stored relative to the current one
+            live = ~conceded
+            dst_ball = _ball_index(np.where(hit, 296, x2), y2, np.where(hit, -vx, vx), vy2)[live]
+            row = np.broadcast_to(row, live.shape)[live]
+            dt = np.broadcast_to(t2 - t + 1, live.shape)[live]
+            used = np.flatnonzero(np.bincount(dst_ball, minlength=NUM_BALL))
+            compact = np.zeros(NUM_BALL, dtype=np.int64)
+            compact[used] = np.arange(len(used))
+            key = (row * len(used) + compact[dst_ball]) * 3 + dt
+            summed = np.bincount(key, weights=prob[live], minlength=num_rows * len(used) * 3)
+            nz = np.flatnonzero(summed)
+            local_row, rest = np.divmod(nz, len(used) * 3)
+            ball, rel = np.divmod(rest, 3)
+            local_t = local_row % NUM_PADDLE
+            rows.append(local_row + start * NUM_ACTIONS * NUM_PADDLE)
+            cols.append(used[ball] * NUM_PADDLE + local_t + rel - 1)
+            probs.append(summed[nz])
+        # Every (ball cell, action, paddle) row of the collision cells, even those that always concede
+        self.joint_keys = np.concatenate([k.ravel() for k in self.joint_keys])
+        self.joint_reward = np.concatenate(self.joint_reward)
+        self.joint_entry_row = np.concatenate(rows)
+        self.joint_cols = np.concatenate(cols)
+        self.joint_probs = np.concatenate(probs)
+
+    @property
+    def num_transitions(self):
+        return len(self.ball_probs) + len(self.joint_probs)
+
+    def bellman(self, values, gamma):
+        """Q for a value table shaped (NUM_BALL, NUM_PADDLE); returned as (NUM_BALL, NUM_ACTIONS, NUM_PADDLE)"""
+        # Ball part: one bincount over (paddle tile, ball row) keys
+        gathered = values.T[:, self.ball_cols] * self.ball_probs
+        expected = np.bincount(self._ball_keys, weights=gathered.ravel(),
+                               minlength=NUM_PADDLE * NUM_BALL).reshape(NUM_PADDLE, NUM_BALL).T
+        q = (expected @ self._paddle_all).reshape(NUM_BALL, NUM_ACTIONS, NUM_PADDLE)
+        q *= gamma
+        q += self.ball_reward[:, None, None]
+        joint = np.bincount(self.joint_entry_row, minlength=len(self.joint_keys),
+                            weights=self.joint_probs * values.ravel()[self.joint_cols])
+        q.reshape(-1)[self.joint_keys] = self.joint_reward + gamma * joint
+        return q
+
+
+def covers_grid(layout):
+    """True when the layout has one cell per grid state and is always consulted"""
+    return layout.active_x is None and layout.shape == FULL_LAYOUT.shape and layout.tile_offsets == (0, 0, 0)
+
+
+def rom_cells(layout):
+    """How the ROM acts in every grid state -> (table index, uses the table, fallback action), each (NUM_STATES,)"""
+    axes = np.meshgrid(FULL_LAYOUT.bx_tiles * 8, FULL_LAYOUT.by_tiles * 8, FULL_LAYOUT.vx_values,
+                       FULL_LAYOUT.vy_values, FULL_LAYOUT.ay_tiles * 8, indexing='ij')
+    index, active = layout.cell_indices(*axes)
+    return index.ravel(), active.ravel(), fallback_actions(axes[4]).ravel().astype(np.int64)
+
+
+def table_actions(q_states, index, active, num_entries, tie_tol=1e-9):
+    """One action per table cell, the best summed over the grid states that read it"""
+    sums = np.stack([np.bincount(index[active], weights=q_states[active, a], minlength=num_entries)
+                     for a in range(NUM_ACTIONS)], axis=1)
+    return greedy_policy(sums, tie_tol)
+
+
+def rom_policy(lut, index, active, fallback):
+    """Grid-state actions of a LUT as the ROM plays it, shaped (NUM_BALL, NUM_PADDLE)"""
+    actions = np.where(active, np.asarray(lut, dtype=np.int64).ravel()[index], fallback)
+    return actions.reshape(NUM_BALL, NUM_PADDLE)
+
+
+def value_iteration(mdp, gamma=0.99, tol=1e-4, max_iters=5000, log_every=100):
+    """Q* shaped (NUM_BALL, NUM_PADDLE, NUM_ACTIONS), i.e. full LUT order x action"""
+    values = np.zeros((NUM_BALL, NUM_PADDLE))
+    for iteration in range(1, max_iters + 1):
+        q = mdp.bellman(values, gamma)
+        new_values = q.max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if log_every and iteration % log_every == 0:
+            print(f"   iteration {iteration:5d}  max change {delta:.2e}", flush=True)
+        if delta < tol:
+            break
+    return np.ascontiguousarray(q.transpose(0, 2, 1)), iteration, delta
+
+
+def evaluate_policy(mdp, policy, gamma=0.99, tol=1e-4, max_iters=5000, values=None):
+    """V^pi for a full-grid policy (actions shaped (NUM_BALL, NUM_PADDLE)), optionally warm-started"""
+    values = np.zeros((NUM_BALL, NUM_PADDLE)) if values is None else values
+    for _ in range(max_iters):
+        q = mdp.bellman(values, gamma)
+        new_values = np.take_along_axis(q, policy[:, None, :], axis=1)[:, 0]
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tol:
+            break
+    return values
+
+
+def table_iteration(mdp, layout, gamma=0.99, tol=1e-4, max_iters=5000, max_rounds=30):
+    """Best table for a layout that does not cover the grid -> (lut, Q of its ROM policy, rounds)
+
+    Table cells are shared by many grid states (clamped indices) and the rest
+    of the grid plays the fallback, so a greedy backup has no fixed point and
+    value iteration oscillates. Each round instead evaluates the ROM policy of
+    the current table and sets every cell to the action with the highest Q
+    summed over the states that read it. It stops when no cell changes; if
+    the rounds cycle, the table with the best mean value is kept.
+    """
+    index, active, fallback = rom_cells(layout)
+    lut = np.zeros(layout.num_entries, dtype=np.uint8)
+    values, best = None, (-np.inf, None, None)
+    for rounds in range(1, max_rounds + 1):
+        values = evaluate_policy(mdp, rom_policy(lut, index, active, fallback), gamma, tol, max_iters, values)
+        q = mdp.bellman(values, gamma)
+        if values.mean() > best[0]:
+            best = (values.mean(), lut, q)
+        new_lut = table_actions(q.transpose(0, 2, 1).reshape(-1, NUM_ACTIONS), index, active, layout.num_entries)
+        changed = int(np.count_nonzero(new_lut != lut))
+        print(f"   round {rounds:3d}  mean value {values.mean():.4f}  {changed:,} table cells change", flush=True)
+        if changed == 0:
+            break
+        lut = new_lut
+    _, lut, q = best
+    return lut.reshape(layout.shape), np.ascontiguousarray(q.transpose(0, 2, 1)), rounds
+
+
+def greedy_policy(q, tie_tol=1e-9):
+    """Optimal action per cell; ties go to the lowest action (stay, then up) to avoid jitter"""
+    return np.argmax(q >= q.max(axis=-1, keepdims=True) - tie_tol, axis=-1).astype(np.uint8)
+
+
+def layout_state_index(layout):
+    """Full-grid state index for every cell of a LUT layout, shaped layout.shape"""
+    ox, oy, oa = layout.tile_offsets
+    bx, by, vx, vy, ay = np.meshgrid(layout.bx_tiles + ox, layout.by_tiles + oy, layout.vx_values + 4,
+                                     layout.vy_values + 4, layout.ay_tiles + oa, indexing='ij')
+    return (((bx * 28 + by) * 9 + vx) * 9 + vy) * NUM_PADDLE + ay
+
+
+def policy_to_lut(policy, layout):
+    return policy.reshape(-1)[layout_state_index(layout)]
+
+
+def score_lut(mdp, q, lut, layout, gamma):
+    """Compare a LUT against the optimum on the cells it covers"""
+    states = layout_state_index(layout).ravel()
+    q_flat = q.reshape(-1, NUM_ACTIONS)
+    actions = np.asarray(lut, dtype=np.int64).ravel()
+    v_star = q_flat[states].max(axis=-1)
+    regret = v_star - q_flat[states, actions]
+    # Play the LUT the way the ROM does (fallback outside the table)
+    if covers_grid(layout):
+        policy = np.empty(NUM_STATES, dtype=np.int64)
+        policy[states] = actions
+        policy = policy.reshape(NUM_BALL, NUM_PADDLE)
+    else:
+        policy = rom_policy(lut, *rom_cells(layout))
+    v_pi = evaluate_policy(mdp, policy, gamma)
+    return {
+        'cells': len(states),
+        'optimal_fraction': float(np.mean(regret <= 1e-9)),
+        'mean_one_step_regret': float(regret.mean()),
+        'max_one_step_regret': float(regret.max()),
+        'mean_value_optimal': float(v_star.mean()),
+        'mean_value_lut': float(v_pi.reshape(-1)[states].mean()),
+    }
+
+
+def default_paths(layout):
+    """(LUT, Q*) files under models/planner/ for a layout"""
+    return (os.path.join(PLANNER_DIR, f'ai_lut_{layout.name}.bin'),
+            os.path.join(PLANNER_DIR, f'optimal_q_{layout.name}.npz'))
+
+
+def solve(gamma, tol, max_iters, return_prob=None, seed=0, layout=FULL_LAYOUT, max_rounds=30):
+    """-> (mdp, Q of the planned policy, return_prob, LUT for the layout)"""
+    start = time.time()
+    if return_prob is None:
+        print("🎲 Estimating opponent return probability from VecPongEnv...")
+        return_prob = estimate_return_prob(seed=seed)
+    print(f"   return prob by vy -4..4: {np.array2string(return_prob, precision=3)}")
+    print("🧮 Building sparse transition model...")
+    mdp = PongMDP(return_prob)
+    print(f"   {NUM_STATES:,} states, {mdp.num_transitions:,} transitions "
+          f"({len(mdp.collision_cells)} paddle-collision ball cells) in {time.time() - start:.1f}s")
+    if covers_grid(layout):
+        print(f"🔁 Value iteration (gamma {gamma}, tol {tol:g})...")
+        q, iterations, delta = value_iteration(mdp, gamma, tol, max_iters)
+        print(f"✅ Converged after {iterations} iterations (max change {delta:.2e}), "
+              f"total {time.time() - start:.1f}s")
+        return mdp, q, return_prob, policy_to_lut(greedy_policy(q), layout)
+    print(f"🔁 Policy iteration over the {layout.name} table with the centering fallback (gamma {gamma})...")
+    lut, q, rounds = table_iteration(mdp, layout, gamma, tol, max_iters, max_rounds)
+    print(f"✅ Table planned in {rounds} rounds, total {time.time() - start:.1f}s")
+    return mdp, q, return_prob, lut
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact value-iteration planner for the Pong AI LUT")
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='packed',
+                        help="Output LUT layout (default: packed, as read by pong_ai_lookup)")
+    parser.add_argument('--output', default=None,
+                        help="LUT file to write (default: models/planner/ai_lut_<layout>.bin; pong/res/ is not touched)")
+    parser.add_argument('--values', default=None,
+                        help="Where Q* is saved / loaded from (default: models/planner/optimal_q_<layout>.npz)")
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--tol', type=float, default=1e-4, help="Stop when the max value change is below this")
+    parser.add_argument('--max-iters', type=int, default=5000)
+    parser.add_argument('--max-rounds', type=int, default=30,
+                        help="Policy-iteration rounds for layouts that do not cover the grid (e.g. packed)")
+    parser.add_argument('--opponent-return', type=float,
+                        help="Fixed opponent return probability instead of estimating it")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--score', metavar='LUT', help="Score an existing LUT against Q* instead of writing one")
+    parser.add_argument('--score-layout', choices=sorted(LAYOUTS), default='packed')
+    args = parser.parse_args()
+
+    return_prob = None if args.opponent_return is None else np.full(9, args.opponent_return)
+    layout = LAYOUTS[args.score_layout if args.score else args.layout]
+    output, values_path = default_paths(layout)
+    output = args.output or output
+    values_path = args.values or values_path
+
+    if args.score:
+        with open(args.score, 'rb') as f:
+            lut = lut_from_bytes(f.read(), layout)
+        saved = np.load(values_path) if os.path.exists(values_path) else None
+        if saved is not None and float(saved['gamma']) == args.gamma and str(saved['layout']) == layout.name:
+            print(f"📂 Using Q* from {values_path}")
+            q = saved['q'].astype(np.float64)
+            mdp = PongMDP(saved['return_prob'])
+        else:
+            mdp, q, _, _ = solve(args.gamma, args.tol, args.max_iters, return_prob, args.seed, layout,
+                                 args.max_rounds)
+        score = score_lut(mdp, q, lut, layout, args.gamma)
+        print(f"\n📊 {args.score} ({layout.name} layout, {score['cells']:,} cells)")
+        print(f"   optimal actions:      {score['optimal_fraction'] * 100:6.2f}%")
+        print(f"   one-step regret:      mean {score['mean_one_step_regret']:.4f}, max {score['max_one_step_regret']:.4f}")
+        print(f"   mean value (optimal): {score['mean_value_optimal']:.4f}")
+        print(f"   mean value (LUT):     {score['mean_value_lut']:.4f}")
+        return 0
+
+    mdp, q, return_prob, lut = solve(args.gamma, args.tol, args.max_iters, return_prob, args.seed, layout,
+                                     args.max_rounds)
+    data = lut_to_bytes(lut, layout)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, output)
+    counts = np.bincount(lut.ravel(), minlength=3)
+    print(f"💾 Optimal {layout.name} LUT written to {output} ({len(data)} bytes)")
+    print(f"   stay {counts[0]:,}  up {counts[1]:,}  down {counts[2]:,}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(values_path)), exist_ok=True)
+    np.savez_compressed(values_path, q=q.astype(np.float32), gamma=args.gamma, return_prob=return_prob,
+                        layout=layout.name)
+    print(f"💾 Q* saved to {values_path} (use --score to rate other LUTs against it)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
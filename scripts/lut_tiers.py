@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Difficulty-tier LUT builder for Genesis Pong
+
+Builds the LUT of every difficulty tier in one run: the weight sets are
+stacked and evaluated together over the grid (lut_builder.build_luts), so the
+grid is enumerated once and each model is loaded once, instead of one script
+run per tier. Easier tiers can be derived from a stronger model by perturbing
+its weights (noise) or by sampling actions from its Q-values (temperature).
+
+Each tier is given as NAME=SOURCE[,noise=S][,temperature=T][,seed=N], where
+SOURCE is a Keras .h5/.keras model or a .npz of float weights (w1, b1, w2, b2). Noise
+adds Gaussian noise of S times each tensor's std (seeded by N) before
+quantization.
+
+Writes ai_lut_<NAME>.bin per tier and prints the cross-tier diff matrix (the
+fraction of cells where two tiers choose different actions).
+
+Usage:
+    python lut_tiers.py --tier expert=../models/pong_ai_model.h5 \\
+        --tier easy=../models/pong_ai_model.h5,noise=0.5,temperature=0.3 --out-dir ../pong/res
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from lut_builder import LAYOUTS, build_luts, lut_to_bytes, quantize_weights
+from lut_jitter import smooth_lut
+from keras_weights import load_weights
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT_DIR = os.path.join(SCRIPT_DIR, '..', 'pong', 'res')
+ACTION_NAMES = ['stay', 'up', 'down']
+
+
+def parse_tier(spec):
+    """'easy=model.h5,noise=0.5' -> {'name', 'source', 'noise', 'temperature', 'seed'}"""
+    name, _, rest = spec.partition('=')
+    if not name or not rest:
+        raise argparse.ArgumentTypeError(f"Expected NAME=SOURCE[,key=value...], got {spec!r}")
+    source, *options = rest.split(',')
+    tier = {'name': name, 'source': source, 'noise': 0.0, 'temperature': 0.0, 'seed': 0}
+    for option in options:
+        key, _, value = option.partition('=')
+        if key not in ('noise', 'temperature', 'seed'):
+            raise argparse.ArgumentTypeError(f"Unknown tier option {key!r} in {spec!r}")
+        tier[key] = int(value) if key == 'seed' else float(value)
+    return tier
+
+
+_weight_cache = {}
+
+
+def load_float_weights(path):
+    """[w1, b1, w2, b2] float arrays from a .h5/.keras model or .npz weight set (each file loaded once)"""
+    if path not in _weight_cache:
+        if path.endswith('.npz'):
+            with np.load(path) as npz:
+                _weight_cache[path] = [npz[key] for key in ('w1', 'b1', 'w2', 'b2')]
+        else:
+            _weight_cache[path] = load_weights(path)
+    return _weight_cache[path]
+
+
+def tier_weights(tier):
+    """Quantized weights of a tier, with its weight noise applied"""
+    weights = load_float_weights(tier['source'])
+    if tier['noise'] > 0:
+        rng = np.random.default_rng(tier['seed'])
+        weights = [w + rng.normal(0.0, tier['noise'] * (np.std(w) or 1.0), np.shape(w)) for w in weights]
+    return quantize_weights(weights)
+
+
+def diff_matrix(luts):
+    """(K, K) fraction of cells where tiers i and j disagree"""
+    flat = luts.reshape(len(luts), -1)
+    k = len(flat)
+    matrix = np.zeros((k, k))
+    for i in range(k):
+        matrix[i] = (flat[i] != flat).mean(axis=1)
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every difficulty tier's LUT in one pass")
+    parser.add_argument('--tier', action='append', type=parse_tier, required=True,
+                        help="NAME=SOURCE[,noise=S][,temperature=T][,seed=N] (repeat per tier)")
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='full')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR)
+    parser.add_argument('--seed', type=int, default=0, help="Seed for temperature sampling")
+    parser.add_argument('--smooth', action='store_true', help="Repair ai_y oscillation cycles (lut_jitter.py)")
+    parser.add_argument('--report', help="Also save the diff matrix and action mix as JSON")
+    args = parser.parse_args()
+
+    layout = LAYOUTS[args.layout]
+    tiers = args.tier
+    start = time.time()
+    qweights = [tier_weights(tier) for tier in tiers]
+    print(f"📂 {len(tiers)} tiers from {len({t['source'] for t in tiers})} weight source(s) "
+          f"in {time.time() - start:.1f}s")
+
+    start = time.time()
+    luts = build_luts(qweights, layout, [t['temperature'] for t in tiers], seed=args.seed)
+    print(f"⚡ {len(tiers)} x {layout.num_entries:,} {layout.name} cells in {time.time() - start:.1f}s")
+
+    if args.smooth:
+        for i, tier in enumerate(tiers):
+            luts[i], changed = smooth_lut(luts[i], layout)
+            print(f"🧽 {tier['name']}: {changed:,} cells set to STAY to break oscillation cycles")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    mixes = {}
+    for tier, lut in zip(tiers, luts):
+        path = os.path.join(args.out_dir, f"ai_lut_{tier['name']}.bin")
+        with open(path, 'wb') as f:
+            f.write(lut_to_bytes(lut, layout))
+        mix = np.bincount(lut.ravel(), minlength=3) / lut.size
+        mixes[tier['name']] = dict(zip(ACTION_NAMES, mix.round(4).tolist()))
+        print(f"💾 {path}: " + ", ".join(f"{n} {m * 100:.1f}%" for n, m in zip(ACTION_NAMES, mix)))
+
+    matrix = diff_matrix(luts)
+    names = [t['name'] for t in tiers]
+    width = max(8, max(len(n) for n in names) + 1)
+    print("\n📊 Cross-tier diff (% of cells with a different action)")
+    print(" " * width + "".join(f"{n:>{width}}" for n in names))
+    for name, row in zip(names, matrix):
+        print(f"{name:<{width}}" + "".join(f"{v * 100:>{width - 1}.1f}%" for v in row))
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'layout': layout.name, 'tiers': tiers, 'actions': mixes,
+                       'diff': {a: dict(zip(names, row.round(4).tolist())) for a, row in zip(names, matrix)}},
+                      f, indent=2)
+        print(f"💾 Report saved to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
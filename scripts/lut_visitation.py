@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+State-visitation profiler and sparse LUT for Genesis Pong
+
+Plays many VecPongEnv games to build a histogram of the LUT cells that
+actually occur, then stores only the occupied blocks of the table:
+
+    header | occupied-block bitmap | rank table | dense blocks
+
+A block is a run of block_entries consecutive cells (ai_y innermost). Blocks
+with no visits, and blocks whose actions all equal the fallback policy, are
+dropped. Lookups of dropped cells return AI_LUT_SPARSE_MISSING, and the game
+then applies its ball-following fallback (move toward ball_y, 8px dead zone).
+
+The report gives the bytes saved and the agreement lost against the dense LUT,
+both per cell and weighted by visits.
+
+Binary layout (big-endian, for the 68000):
+    0  'PGSL' magic, u8 version, u8 bits_per_entry, u16 block_entries
+    8  u32 num_entries, u32 num_blocks, u32 num_occupied
+    20 u32 bitmap_offset, u32 rank_offset, u32 data_offset
+    bitmap: 1 bit per block, MSB first; rank: u16 per bitmap byte = occupied blocks before it
+
+Usage:
+    python lut_visitation.py --lut ../pong/res/ai_lut.bin --layout packed [--out ../pong/res/ai_lut_sparse.bin]
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from pong_native import make_vec_env
+from teacher_policy import teacher_actions
+from lut_builder import LAYOUTS, lut_from_bytes, pack_2bit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HEADER = os.path.join(SCRIPT_DIR, '..', 'pong', 'inc', 'ai_lut_sparse.h')
+
+SPARSE_MAGIC = b'PGSL'
+SPARSE_VERSION = 1
+SPARSE_HEADER = struct.Struct('>4sBBHIIIIII')
+MISSING = 0xFF
+
+
+def redraw_serve_speed(env, mask, speeds, rng):
+    """Re-draw |vx| of the games in mask from speeds, keeping the serve direction
+
+    PongEnv always serves at |vx| 2; the console uses BALL_SPEED 3, up to 4 with A.
+    """
+    idx = np.flatnonzero(mask)
+    env.ball_vx[idx] = np.sign(env.ball_vx[idx]) * rng.choice(np.asarray(speeds), size=len(idx))
+
+
+def collect_visitation(layout, num_envs=4096, steps=2000, serve_speeds=(2, 3, 4),
+                       random_action_prob=0.2, seed=0):
+    """Visit counts per LUT cell (int64, layout.shape) from teacher-driven games, serving at serve_speeds"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    redraw_serve_speed(env, np.ones(num_envs, dtype=bool), serve_speeds, rng)
+    counts = np.zeros(layout.num_entries, dtype=np.int64)
+    for _ in range(steps):
+        index, active = layout.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        counts += np.bincount(index[active], minlength=layout.num_entries)
+        actions = teacher_actions(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        explore = rng.random(num_envs) < random_action_prob
+        _, _, dones = env.step(np.where(explore, rng.integers(0, 3, num_envs), actions))
+        env.reset(dones)
+        redraw_serve_speed(env, dones, serve_speeds, rng)
+    return counts.reshape(layout.shape)
+
+
+def fallback_actions(layout):
+    """Ball-following fallback per cell, evaluated at the cell's pixel origin"""
+    ox, oy, oa = layout.tile_offsets
+    by = (layout.by_tiles + oy) * 8 + 4
+    ay = (layout.ay_tiles + oa) * 8 + 24
+    diff = by[:, None] - ay[None, :]
+    per_y = np.where(diff < -8, 1, np.where(diff > 8, 2, 0)).astype(np.uint8)
+    return np.broadcast_to(per_y[None, :, None, None, :], layout.shape)
+
+
+def build_sparse(lut, counts, layout, block_entries=16, min_visits=1):
+    """Occupied-block sparse encoding of lut -> bytes"""
+    flat = np.asarray(lut, dtype=np.uint8).ravel()
+    fallback = fallback_actions(layout).ravel()
+    num_entries = len(flat)
+    num_blocks = -(-num_entries // block_entries)
+    pad = num_blocks * block_entries - num_entries
+    blocks = np.concatenate([flat, np.zeros(pad, dtype=np.uint8)]).reshape(num_blocks, block_entries)
+    visits = np.concatenate([counts.ravel(), np.zeros(pad, dtype=np.int64)]).reshape(num_blocks, block_entries)
+    same = np.concatenate([flat == fallback, np.ones(pad, dtype=bool)]).reshape(num_blocks, block_entries)
+    occupied = (visits.sum(axis=1) >= min_visits) & ~same.all(axis=1)
+
+    bitmap = np.packbits(occupied)  # MSB first
+    before = np.concatenate([[0], np.cumsum(occupied)])[::8][:len(bitmap)]
+    if before[-1] > 0xFFFF:
+        raise ValueError("Too many occupied blocks for the u16 rank table; use a larger --block")
+    rank = before.astype('>u2')
+    kept = blocks[occupied]
+    data = pack_2bit(kept) if layout.bits_per_entry == 2 else kept.astype(np.uint8)
+
+    bitmap_offset = SPARSE_HEADER.size
+    rank_offset = bitmap_offset + len(bitmap) + (len(bitmap) & 1)  # keep the u16 table aligned
+    data_offset = rank_offset + rank.nbytes
+    header = SPARSE_HEADER.pack(SPARSE_MAGIC, SPARSE_VERSION, layout.bits_per_entry, block_entries,
+                                num_entries, num_blocks, int(occupied.sum()),
+                                bitmap_offset, rank_offset, data_offset)
+    return (header + bitmap.tobytes() + b'\0' * (len(bitmap) & 1) + rank.tobytes() +
+            np.asarray(data, dtype=np.uint8).tobytes())
+
+
+def sparse_lookup(data, index):
+    """The C lookup on the raw bytes: actions for flat indices, MISSING where the block was dropped"""
+    (_, _, bits, block_entries, _, num_blocks, _, bitmap_offset, rank_offset,
+     data_offset) = SPARSE_HEADER.unpack_from(data)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    bitmap = raw[bitmap_offset:bitmap_offset + (num_blocks + 7) // 8]
+    rank = np.frombuffer(data, dtype='>u2', count=len(bitmap), offset=rank_offset).astype(np.int64)
+    index = np.asarray(index, dtype=np.int64)
+    block, within = np.divmod(index, block_entries)
+    byte, bit = np.divmod(block, 8)
+    bm = bitmap[byte].astype(np.int64)
+    present = (bm >> (7 - bit)) & 1 == 1
+    # Occupied blocks before this one: rank of the bitmap byte + set bits above this one in it
+    higher = bm >> (8 - bit)
+    popcount = np.unpackbits(higher.astype(np.uint8)[:, None], axis=1).sum(axis=1, dtype=np.int64)
+    entry = (rank[byte] + popcount) * block_entries + within
+    stored = raw[data_offset:]
+    if bits == 2:
+        values = (stored[np.minimum(entry >> 2, len(stored) - 1)] >> (6 - 2 * (entry & 3))) & 3
+    else:
+        values = stored[np.minimum(entry, len(stored) - 1)]
+    return np.where(present, values, MISSING).astype(np.uint8)
+
+
+def evaluate_sparse(data, lut, counts, layout):
+    flat = np.asarray(lut, dtype=np.uint8).ravel()
+    looked_up = sparse_lookup(data, np.arange(len(flat)))
+    stored = looked_up != MISSING
+    if not np.array_equal(looked_up[stored], flat[stored]):
+        raise AssertionError("Sparse LUT disagrees with the dense LUT on stored cells")
+    effective = np.where(stored, looked_up, fallback_actions(layout).ravel())
+    agree = effective == flat
+    visits = counts.ravel()
+    return {
+        'dense_bytes': layout.num_bytes,
+        'sparse_bytes': len(data),
+        'stored_cells': int(stored.sum()),
+        'cell_agreement': float(agree.mean()),
+        'visit_agreement': float((visits * agree).sum() / max(visits.sum(), 1)),
+    }
+
+
+def write_sparse_header(path, data, layout):
+    (_, _, bits, block_entries, num_entries, num_blocks, num_occupied, bitmap_offset, rank_offset,
+     data_offset) = SPARSE_HEADER.unpack_from(data)
+    guard = "AI_LUT_SPARSE_H"
+    with open(path, 'w') as f:
+        f.write(f"// Auto-generated by lut_visitation.py - sparse {layout.name} LUT ({len(data)} bytes, "
+                f"{num_occupied}/{num_blocks} blocks)\n")
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n#include <genesis.h>\n\n")
+        f.write(f"#define AI_LUT_SPARSE_BITS {bits}\n")
+        f.write(f"#define AI_LUT_SPARSE_BLOCK {block_entries}\n")
+        f.write(f"#define AI_LUT_SPARSE_ENTRIES {num_entries}\n")
+        f.write(f"#define AI_LUT_SPARSE_BITMAP {bitmap_offset}\n")
+        f.write(f"#define AI_LUT_SPARSE_RANK {rank_offset}\n")
+        f.write(f"#define AI_LUT_SPARSE_DATA {data_offset}\n")
+        f.write(f"#define AI_LUT_SPARSE_MISSING 0x{MISSING:02X} // caller applies the ball-following fallback\n\n")
+        f.write("static const u8 ai_lut_sparse_popcount4[16] = {0, 1, 1, 2, 1, 2, 2, 3, 1, 2, 2, 3, 2, 3, 3, 4};\n\n")
+        f.write("static inline u8 ai_lut_sparse_get(const u8 *lut, u32 index)\n{\n")
+        f.write("    u32 block = index / AI_LUT_SPARSE_BLOCK;\n")
+        f.write("    u16 within = index % AI_LUT_SPARSE_BLOCK;\n")
+        f.write("    u8 bm = lut[AI_LUT_SPARSE_BITMAP + (block >> 3)];\n")
+        f.write("    u8 bit = 7 - (block & 7);\n")
+        f.write("    if (!((bm >> bit) & 1))\n        return AI_LUT_SPARSE_MISSING;\n")
+        f.write("    u8 higher = bm >> (bit + 1);\n")
+        f.write("    u16 rank = ((const u16 *)(lut + AI_LUT_SPARSE_RANK))[block >> 3]\n"
+                "        + ai_lut_sparse_popcount4[higher & 15] + ai_lut_sparse_popcount4[higher >> 4];\n")
+        f.write("    u32 entry = (u32)rank * AI_LUT_SPARSE_BLOCK + within;\n")
+        f.write("#if AI_LUT_SPARSE_BITS == 2\n")
+        f.write("    return (lut[AI_LUT_SPARSE_DATA + (entry >> 2)] >> (6 - 2 * (entry & 3))) & 3;\n")
+        f.write("#else\n    return lut[AI_LUT_SPARSE_DATA + entry];\n#endif\n}\n")
+        f.write(f"\n#endif // {guard}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LUT visitation profiler and sparse LUT writer")
+    parser.add_argument('--lut', default=os.path.join(SCRIPT_DIR, '..', 'pong', 'res', 'ai_lut.bin'))
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='packed')
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--serve-speeds', default='2,3,4', help="|vx| values drawn on every serve")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--block', type=int, default=16, help="Cells per block (default: 16)")
+    parser.add_argument('--min-visits', type=int, default=1, help="Visits needed to keep a block")
+    parser.add_argument('--histogram', help="Save the visit histogram as .npy")
+    parser.add_argument('--out', help="Write the sparse LUT here")
+    parser.add_argument('--header', default=DEFAULT_HEADER, help="C header written along with --out")
+    args = parser.parse_args()
+
+    layout = LAYOUTS[args.layout]
+    with open(args.lut, 'rb') as f:
+        lut = lut_from_bytes(f.read(), layout)
+
+    start = time.time()
+    speeds = [int(s) for s in args.serve_speeds.split(',')]
+    counts = collect_visitation(layout, args.envs, args.steps, speeds, seed=args.seed)
+    visited = counts > 0
+    print(f"🎮 {counts.sum():,} table lookups over {args.envs * args.steps:,} steps in {time.time() - start:.1f}s")
+    print(f"   visited cells: {visited.sum():,} / {layout.num_entries:,} ({visited.mean() * 100:.1f}%)")
+    for axis, name in enumerate(['ball_x', 'ball_y', 'vx', 'vy', 'ai_y']):
+        other = tuple(a for a in range(5) if a != axis)
+        never = np.flatnonzero(~visited.any(axis=other))
+        if len(never):
+            print(f"   {name:<6} indices never visited: {never.tolist()}")
+    if args.histogram:
+        np.save(args.histogram, counts)
+        print(f"💾 Histogram saved to {args.histogram}")
+
+    data = build_sparse(lut, counts, layout, args.block, args.min_visits)
+    report = evaluate_sparse(data, lut, counts, layout)
+    saved = report['dense_bytes'] - report['sparse_bytes']
+    print(f"\n📦 Sparse {layout.name} LUT, {args.block}-cell blocks: {report['sparse_bytes']:,} bytes "
+          f"vs {report['dense_bytes']:,} dense ({saved:+,} saved, {saved / report['dense_bytes'] * 100:.1f}%)")
+    print(f"   stored cells: {report['stored_cells']:,}")
+    print(f"   agreement with dense LUT: {report['cell_agreement'] * 100:.2f}% of cells, "
+          f"{report['visit_agreement'] * 100:.2f}% of visits")
+    if args.out:
+        with open(args.out, 'wb') as f:
+            f.write(data)
+        write_sparse_header(args.header, data, layout)
+        print(f"💾 {args.out} and {args.header} written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+68000 cycle-cost model of pong_ai_NN
+
+Counts the instructions of the C loop in ai.c (inputs -> hidden -> outputs,
+products shifted >>10, ReLU, argmax) for any hidden width and input encoding,
+and prices them with the MC68000 timing tables (no wait states, register
+operands, word-sized data unless noted). It estimates what the code costs
+per frame. It is not cycle exact: MULS/MULU time depends on the operand's bit
+pattern (38 + 2 per 01/10 pair in the source), so 'typical' charges 54 and
+'worst' 70. 'libcall' prices the u16 * s16 product as gcc's 32-bit __mulsi3
+helper, which is what it emits when it cannot prove both factors fit MULS.W.
+
+Input encodings (integer network inputs, x1024 scale):
+- div:    (tile * 1024) / div, one DIVU per tile axis (ai.c's /17 and /25; the
+          LUT normalization /39 and /27 costs the same)
+- recip:  (tile * round(1024 * 256 / div)) >> 8, a MULU and a shift instead of the DIVU
+- shift:  tile << 5, i.e. tile / 32 normalization, no multiply at all
+Velocities are ((v + 4) * 1024) >> 3 = (v + 4) << 7 in every encoding.
+
+Usage:
+    python m68k_cost.py                     # cost table for common widths
+    python m68k_cost.py --hidden 8 --encoding div --detail
+"""
+
+import argparse
+import sys
+
+CPU_HZ = 7_670_453          # NTSC Mega Drive 68000 clock
+FRAME_CYCLES = CPU_HZ // 60  # 127,840 cycles per frame
+
+ENCODINGS = ('div', 'recip', 'shift')
+TILE_AXES = 3   # ball_x, ball_y, ai_y
+VEL_AXES = 2    # ball_vx, ball_vy
+
+# Cycle cost per instruction (68000 timing tables)
+CYCLES = {
+    'move_w_mem': 8,       # MOVE.W (An)+,Dn (weight / bias load)
+    'move_w_store': 8,     # MOVE.W Dn,(An)+
+    'add_w': 4,            # ADD.W Dn,Dn
+    'add_l': 8,            # ADD.L Dn,Dn
+    'addq': 4,             # ADDQ.W #4,Dn
+    'asr_l_10': 36,        # ASR.L #8 + ASR.L #2 (8 + 2n each)
+    'lsr_w_3': 12,         # LSR.W #3 (6 + 2n)
+    'lsl_w_5': 16,         # LSL.W #5
+    'lsl_w_7': 20,         # LSL.W #7
+    'lsl_w_10': 32,        # LSL.W #8 + LSL.W #2
+    'lsr_l_8': 24,         # LSR.L #8
+    'divu': 140,           # DIVU.W worst case
+    'tst_bcc': 14,         # TST.W + Bcc taken
+    'clr_w': 4,            # CLR.W Dn (ReLU clamp)
+    'cmp_bcc': 16,         # CMP.L + Bcc
+    'dbra': 10,            # DBRA taken (loop back edge)
+    'call': 120,           # JSR/RTS, MOVEM save/restore, argument setup
+}
+MUL_CYCLES = {'typical': 54, 'worst': 70, 'libcall': 190}
+
+
+def nn_cycles(hidden, encoding='div', inputs=5, outputs=3, mul='typical'):
+    """Estimated cycles of one pong_ai_NN call -> {'inputs', 'hidden', 'outputs', 'argmax', 'call', 'total'}"""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+    c = CYCLES
+    muls = MUL_CYCLES[mul]
+
+    tile = c['lsr_w_3']  # pixel -> tile
+    if encoding == 'div':
+        tile += c['lsl_w_10'] + c['divu']
+    elif encoding == 'recip':
+        tile += min(muls, MUL_CYCLES['worst']) + c['lsr_l_8']  # constant u16 factor: always MULU.W
+    else:
+        tile += c['lsl_w_5']
+    velocity = c['addq'] + c['lsl_w_7']
+    encode = TILE_AXES * tile + VEL_AXES * velocity + inputs * c['move_w_store']
+
+    # sum += (inputs[i] * weights[i][h]) >> 10 in s16
+    term = c['move_w_mem'] * 2 + muls + c['asr_l_10'] + c['add_w'] + c['dbra']
+    neuron = c['move_w_mem'] + inputs * term + c['tst_bcc'] + c['clr_w'] + c['move_w_store'] + c['dbra']
+    # outputs accumulate in s32
+    out_term = c['move_w_mem'] * 2 + muls + c['asr_l_10'] + c['add_l'] + c['dbra']
+    out_neuron = c['move_w_mem'] + hidden * out_term + c['move_w_store'] * 2 + c['dbra']
+
+    cost = {
+        'inputs': encode,
+        'hidden': hidden * neuron,
+        'outputs': outputs * out_neuron,
+        'argmax': (outputs - 1) * c['cmp_bcc'],
+        'call': c['call'],
+    }
+    cost['total'] = sum(cost.values())
+    return cost
+
+
+def lookup_cycles():
+    """pong_ai_lookup for comparison: index math with constant multiplies, one byte read, bit unpack"""
+    c = CYCLES
+    return c['call'] + 5 * c['lsr_w_3'] + 4 * (MUL_CYCLES['typical'] + c['add_l']) + 2 * c['move_w_mem'] + 40
+
+
+def main():
+    parser = argparse.ArgumentParser(description="68000 cycle estimate of pong_ai_NN")
+    parser.add_argument('--hidden', type=int, nargs='*', default=[2, 4, 6, 8, 12, 16])
+    parser.add_argument('--encoding', choices=ENCODINGS, nargs='*', default=list(ENCODINGS))
+    parser.add_argument('--mul', choices=sorted(MUL_CYCLES), default='typical')
+    parser.add_argument('--detail', action='store_true', help="Break each estimate down by stage")
+    args = parser.parse_args()
+
+    print(f"🧮 Estimated 68000 cycles per call ({args.mul} multiplies, frame = {FRAME_CYCLES:,} cycles)")
+    print(f"   {'hidden':>6}  " + "".join(f"{e:>16}" for e in args.encoding))
+    for hidden in args.hidden:
+        cells = []
+        for encoding in args.encoding:
+            total = nn_cycles(hidden, encoding, mul=args.mul)['total']
+            cells.append(f"{total:>8,} ({total / FRAME_CYCLES * 100:4.1f}%)")
+        print(f"   {hidden:>6}  " + "".join(f"{cell:>16}" for cell in cells))
+        if args.detail:
+            for encoding in args.encoding:
+                parts = nn_cycles(hidden, encoding, mul=args.mul)
+                print(f"           {encoding:<6} " + ", ".join(f"{k} {v:,}" for k, v in parts.items() if k != 'total'))
+    print(f"   LUT lookup (pong_ai_lookup): ~{lookup_cycles():,} cycles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Architecture search for the per-frame pong_ai_NN network
+
+Running the integer MLP every frame instead of the LUT costs 68000 cycles,
+and the cost grows with the hidden width and the input normalization. This
+driver trains a grid of candidate networks and puts their play quality next
+to the m68k_cost.py estimate, so the strongest network that fits the frame
+budget can be picked.
+
+Candidates are 5 -> H -> 3 networks for each hidden width H and each input
+encoding of m68k_cost.py (div: ai.c's /17 and /25, recip: the same through a
+reciprocal multiply, shift: tile << 5). They are distilled from the best
+model: states come from VecPongEnv games played by the teacher's full-layout
+LUT (with random actions mixed in, so off-policy states are covered), and the
+labels are the teacher's LUT actions. Each student is trained with a small
+NumPy softmax/Adam loop on its own encoding, quantized like quantize_weights(),
+and scored through the integer forward pass the ROM runs:
+- agreement: share of held-out states where it picks the teacher's action
+- win rate: greedy points won against the scripted opponent (evaluator.py)
+
+Candidates are trained in a process pool. Results go to
+models/arch_search/results.json (plus each candidate's float weights in
+weights.npz); the plot is drawn in the terminal, and also saved as PNG when
+matplotlib is installed.
+
+Usage:
+    python nn_arch_search.py                                   # teacher ../models/pong_ai_model_best.h5 (or pong_ai_model.h5)
+    python nn_arch_search.py --hidden 3 4 6 8 --encoding div shift --budget 6000
+    python nn_arch_search.py --teacher ../models/saved/x.h5 --header ../pong/inc/weights_search.h
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from pong_native import make_vec_env
+from lut_builder import FULL_LAYOUT, SCALE_FACTOR, build_lut, nn_forward_int, quantize_weights, write_weights_header
+from keras_weights import load_weights
+from evaluator import play_greedy
+from m68k_cost import ENCODINGS, FRAME_CYCLES, MUL_CYCLES, nn_cycles
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(SCRIPT_DIR, '..')
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+DEFAULT_OUTPUT = os.path.join(MODELS_DIR, 'arch_search')
+AI_C_DIVISORS = (17, 25, 25)  # ball_x, ball_y, ai_y in pong_ai_NN
+
+
+def default_teacher():
+    best = os.path.join(MODELS_DIR, 'pong_ai_model_best.h5')
+    return best if os.path.exists(best) else os.path.join(MODELS_DIR, 'pong_ai_model.h5')
+
+
+def encode_inputs(ball_x, ball_y, ball_vx, ball_vy, ai_y, encoding):
+    """Integer x1024 network inputs as the C code would compute them -> (N, 5) int64"""
+    tiles = [np.asarray(v, dtype=np.int64) >> 3 for v in (ball_x, ball_y, ai_y)]
+    if encoding == 'div':
+        tiles = [(t * SCALE_FACTOR) // d for t, d in zip(tiles, AI_C_DIVISORS)]
+    elif encoding == 'recip':
+        tiles = [(t * round(SCALE_FACTOR * 256 / d)) >> 8 for t, d in zip(tiles, AI_C_DIVISORS)]
+    elif encoding == 'shift':
+        tiles = [t << 5 for t in tiles]
+    else:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+    vx = ((np.asarray(ball_vx, dtype=np.int64) + 4) * SCALE_FACTOR) >> 3
+    vy = ((np.asarray(ball_vy, dtype=np.int64) + 4) * SCALE_FACTOR) >> 3
+    return np.stack([tiles[0], tiles[1], vx, vy, tiles[2]], axis=-1)
+
+
+def lut_policy(lut):
+    """VecPongEnv -> actions through a full-layout LUT"""
+    def policy(env):
+        index, _ = FULL_LAYOUT.cell_indices(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        return lut[index]
+    return policy
+
+
+def student_policy(qweights, encoding):
+    """VecPongEnv -> actions through the integer forward pass"""
+    def policy(env):
+        return nn_forward_int(encode_inputs(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y, encoding),
+                              qweights)
+    return policy
+
+
+def generate_distillation_set(lut, num_samples, num_envs=4096, random_action_prob=0.2, seed=0):
+    """Raw states of teacher-played games and the teacher's actions -> (states int64 (N, 5), actions uint8)"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    teacher = lut_policy(lut)
+    steps = -(-num_samples // num_envs)
+    states = np.empty((steps * num_envs, 5), dtype=np.int64)
+    actions = np.empty(steps * num_envs, dtype=np.uint8)
+    for step in range(steps):
+        labels = teacher(env)
+        block = slice(step * num_envs, (step + 1) * num_envs)
+        states[block] = np.stack([env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y], axis=1)
+        actions[block] = labels
+        explore = rng.random(num_envs) < random_action_prob
+        _, _, dones = env.step(np.where(explore, rng.integers(0, 3, num_envs), labels))
+        env.reset(dones)
+    return states[:num_samples], actions[:num_samples]
+
+
+def train_student(inputs, labels, hidden, epochs=8, batch_size=512, lr=3e-3, seed=0):
+    """Softmax cross-entropy 5 -> hidden (relu) -> 3 MLP trained with Adam -> float [w1, b1, w2, b2]"""
+    rng = np.random.default_rng(seed)
+    n_in, n_out = inputs.shape[1], 3
+    params = [rng.normal(0, np.sqrt(2 / n_in), (n_in, hidden)), np.zeros(hidden),
+              rng.normal(0, np.sqrt(2 / hidden), (hidden, n_out)), np.zeros(n_out)]
+    m = [np.zeros_like(p) for p in params]
+    v = [np.zeros_like(p) for p in params]
+    beta1, beta2, step = 0.9, 0.999, 0
+    onehot = np.eye(n_out)[labels]
+    for _ in range(epochs):
+        order = rng.permutation(len(inputs))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x, y = inputs[batch], onehot[batch]
+            w1, b1, w2, b2 = params
+            pre = x @ w1 + b1
+            h = np.maximum(pre, 0)
+            logits = h @ w2 + b2
+            p = np.exp(logits - logits.max(axis=1, keepdims=True))
+            p /= p.sum(axis=1, keepdims=True)
+            d_logits = (p - y) / len(batch)
+            d_h = (d_logits @ w2.T) * (pre > 0)
+            grads = [x.T @ d_h, d_h.sum(axis=0), h.T @ d_logits, d_logits.sum(axis=0)]
+            step += 1
+            for i, g in enumerate(grads):
+                m[i] = beta1 * m[i] + (1 - beta1) * g
+                v[i] = beta2 * v[i] + (1 - beta2) * g * g
+                m_hat = m[i] / (1 - beta1 ** step)
+                v_hat = v[i] / (1 - beta2 ** step)
+                params[i] -= lr * m_hat / (np.sqrt(v_hat) + 1e-8)
+    return [p.astype(np.float32) for p in params]
+
+
+_worker_data = {}
+
+
+def _init_worker(train, test, settings):
+    _worker_data.update(train=train, test=test, settings=settings)
+
+
+def _run_candidate(candidate):
+    """Train, quantize and score one (hidden, encoding) candidate"""
+    hidden, encoding = candidate
+    (train_states, train_labels), (test_states, test_labels) = _worker_data['train'], _worker_data['test']
+    settings = _worker_data['settings']
+    start = time.time()
+    train_inputs = encode_inputs(*train_states.T, encoding) / SCALE_FACTOR
+    weights = train_student(train_inputs, train_labels, hidden, settings['epochs'], settings['batch_size'],
+                            settings['lr'], settings['seed'])
+    qweights = quantize_weights(weights)
+    agreement = float(np.mean(nn_forward_int(encode_inputs(*test_states.T, encoding), qweights) == test_labels))
+    won, lost, unfinished = play_greedy(student_policy(qweights, encoding), settings['games'],
+                                        settings['max_frames'], settings['seed'])
+    return {
+        'hidden': hidden,
+        'encoding': encoding,
+        'cycles': nn_cycles(hidden, encoding, mul=settings['mul'])['total'],
+        'agreement': agreement,
+        'win_rate': won / max(won + lost, 1),
+        'unfinished': unfinished,
+        'seconds': round(time.time() - start, 1),
+        'weights': weights,
+    }
+
+
+def pareto_front(results, key='win_rate'):
+    """Candidates no cheaper candidate beats on key, cheapest first"""
+    front, best = [], -1.0
+    for r in sorted(results, key=lambda r: (r['cycles'], -r[key])):
+        if r[key] > best:
+            front.append(r)
+            best = r[key]
+    return front
+
+
+def text_plot(results, front, budget=None, width=64, height=16, key='win_rate'):
+    """Quality vs. cycles scatter for the terminal (* Pareto front, o other, | budget)"""
+    xs = [r['cycles'] for r in results] + ([budget] if budget else [])
+    x_lo, x_hi = min(xs), max(xs)
+    y_lo, y_hi = min(r[key] for r in results), max(r[key] for r in results)
+    x_span, y_span = max(x_hi - x_lo, 1), max(y_hi - y_lo, 1e-9)
+    grid = [[' '] * width for _ in range(height)]
+    if budget:
+        col = round((budget - x_lo) / x_span * (width - 1))
+        for row in grid:
+            row[col] = '|'
+    on_front = {id(r) for r in front}
+    for r in sorted(results, key=lambda r: id(r) in on_front):
+        col = round((r['cycles'] - x_lo) / x_span * (width - 1))
+        row = height - 1 - round((r[key] - y_lo) / y_span * (height - 1))
+        grid[row][col] = '*' if id(r) in on_front else 'o'
+    lines = [f"{y_hi * 100:6.1f}% ┤" + ''.join(grid[0])]
+    lines += ["        │" + ''.join(row) for row in grid[1:-1]]
+    lines += [f"{y_lo * 100:6.1f}% ┤" + ''.join(grid[-1]),
+              "        └" + '─' * width,
+              f"         {x_lo:<,} cycles" + f"{x_hi:,} cycles".rjust(width - len(f"{x_lo:,} cycles"))]
+    return "\n".join(lines)
+
+
+def save_png(path, results, front, budget, teacher_win_rate):
+    """Quality vs. cycles plot as PNG; False when matplotlib is not installed"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for encoding, marker in zip(ENCODINGS, 'os^'):
+        rows = [r for r in results if r['encoding'] == encoding]
+        ax.scatter([r['cycles'] for r in rows], [r['win_rate'] * 100 for r in rows], marker=marker, label=encoding)
+        for r in rows:
+            ax.annotate(str(r['hidden']), (r['cycles'], r['win_rate'] * 100), fontsize=7,
+                        xytext=(3, 3), textcoords='offset points')
+    ax.plot([r['cycles'] for r in front], [r['win_rate'] * 100 for r in front], 'k--', lw=0.8, label='Pareto front')
+    ax.axhline(teacher_win_rate * 100, color='gray', lw=0.8, label='teacher LUT')
+    if budget:
+        ax.axvline(budget, color='red', lw=0.8, label='budget')
+    ax.set_xlabel('Estimated 68000 cycles per frame')
+    ax.set_ylabel('Greedy win rate vs scripted (%)')
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search pong_ai_NN widths and input encodings against a cycle budget")
+    parser.add_argument('--teacher', default=None, help="Keras model to distill (default: best model)")
+    parser.add_argument('--hidden', type=int, nargs='+', default=[2, 3, 4, 6, 8, 12, 16])
+    parser.add_argument('--encoding', choices=ENCODINGS, nargs='+', default=list(ENCODINGS))
+    parser.add_argument('--samples', type=int, default=400000, help="Distillation states (a fifth is held out)")
+    parser.add_argument('--epochs', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--lr', type=float, default=3e-3)
+    parser.add_argument('--games', type=int, default=2048, help="Greedy games per candidate")
+    parser.add_argument('--max-frames', type=int, default=3000)
+    parser.add_argument('--mul', choices=sorted(MUL_CYCLES), default='typical', help="Multiply cost in the model")
+    parser.add_argument('--budget', type=int, default=FRAME_CYCLES // 10,
+                        help="Cycles per frame the network may use (default: 10%% of a frame)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Directory for results.json, weights.npz, plot")
+    parser.add_argument('--header', help="Write the chosen candidate's weights as a C header")
+    args = parser.parse_args()
+
+    teacher_path = args.teacher or default_teacher()
+    print(f"🎓 Teacher: {teacher_path}")
+    lut = build_lut(quantize_weights(load_weights(teacher_path)), FULL_LAYOUT).ravel()
+    won, lost, _ = play_greedy(lut_policy(lut), args.games, args.max_frames, args.seed)
+    teacher_win_rate = won / max(won + lost, 1)
+    print(f"   Teacher LUT win rate: {teacher_win_rate * 100:.1f}%")
+
+    start = time.time()
+    states, labels = generate_distillation_set(lut, args.samples, seed=args.seed)
+    split = len(states) * 4 // 5
+    train, test = (states[:split], labels[:split]), (states[split:], labels[split:])
+    print(f"📦 {len(states):,} teacher-labeled states ({time.time() - start:.1f}s)")
+
+    settings = {'epochs': args.epochs, 'batch_size': args.batch_size, 'lr': args.lr, 'games': args.games,
+                'max_frames': args.max_frames, 'mul': args.mul, 'seed': args.seed}
+    candidates = [(h, e) for h in args.hidden for e in args.encoding]
+    workers = max(1, min(args.workers, len(candidates)))
+    print(f"🔎 Training {len(candidates)} candidates on {workers} workers")
+    results = []
+    with Pool(workers, initializer=_init_worker, initargs=(train, test, settings)) as pool:
+        for r in pool.imap_unordered(_run_candidate, candidates):
+            results.append(r)
+            print(f"   H={r['hidden']:<3} {r['encoding']:<6} {r['cycles']:>7,} cycles  "
+                  f"agreement {r['agreement'] * 100:5.1f}%  win {r['win_rate'] * 100:5.1f}%  ({r['seconds']}s)",
+                  flush=True)
+
+    results.sort(key=lambda r: (r['cycles'], r['hidden']))
+    front = pareto_front(results)
+    print(f"\n📈 Win rate vs estimated cycles per frame (budget {args.budget:,} = "
+          f"{args.budget / FRAME_CYCLES * 100:.1f}% of a frame)")
+    print(text_plot(results, front, args.budget))
+    print("\n🏁 Pareto front:")
+    for r in front:
+        fits = "✅" if r['cycles'] <= args.budget else "  "
+        print(f"   {fits} H={r['hidden']:<3} {r['encoding']:<6} {r['cycles']:>7,} cycles "
+              f"({r['cycles'] / FRAME_CYCLES * 100:4.1f}%)  win {r['win_rate'] * 100:5.1f}%  "
+              f"agreement {r['agreement'] * 100:5.1f}%")
+
+    fitting = [r for r in results if r['cycles'] <= args.budget]
+    chosen = max(fitting, key=lambda r: (r['win_rate'], -r['cycles'])) if fitting else None
+    if chosen:
+        print(f"\n🎯 Strongest within budget: H={chosen['hidden']} {chosen['encoding']}, "
+              f"{chosen['cycles']:,} cycles, win {chosen['win_rate'] * 100:.1f}% "
+              f"(teacher LUT {teacher_win_rate * 100:.1f}%)")
+    else:
+        print(f"\n⚠️  No candidate fits {args.budget:,} cycles")
+
+    os.makedirs(args.output, exist_ok=True)
+    report = {
+        'teacher': teacher_path, 'teacher_win_rate': teacher_win_rate, 'budget': args.budget,
+        'frame_cycles': FRAME_CYCLES, 'samples': len(states), 'settings': settings,
+        'candidates': [{k: v for k, v in r.items() if k != 'weights'} for r in results],
+        'pareto': [(r['hidden'], r['encoding']) for r in front],
+        'chosen': (chosen['hidden'], chosen['encoding']) if chosen else None,
+    }
+    with open(os.path.join(args.output, 'results.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    np.savez(os.path.join(args.output, 'weights.npz'),
+             **{f"h{r['hidden']}_{r['encoding']}_{name}": w
+                for r in results for name, w in zip(('w1', 'b1', 'w2', 'b2'), r['weights'])})
+    print(f"💾 Results saved to {args.output}")
+    png = os.path.join(args.output, 'pareto.png')
+    if save_png(png, results, front, args.budget, teacher_win_rate):
+        print(f"🖼️  Plot saved to {png}")
+    else:
+        print("   (matplotlib not installed, PNG plot skipped)")
+
+    if args.header and chosen:
+        write_weights_header(args.header, quantize_weights(chosen['weights']))
+        print(f"📝 Weights of H={chosen['hidden']} {chosen['encoding']} written to {args.header} "
+              f"(pong_ai_NN must use the {chosen['encoding']} input encoding)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
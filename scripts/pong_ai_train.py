@@ -2,6 +2,7 @@ import os
 import sys
 import time
 import signal
+import argparse
 import subprocess
 import json
 import socketio
@@ -24,11 +25,12 @@ os.environ['TF_NUM_INTRAOP_THREADS'] = cpu_count
 import numpy as np
 import tensorflow as tf
 tf.config.run_functions_eagerly(True)
-from tensorflow import keras
-from keras import layers
-import random
-from collections import deque
 from datetime import datetime
+from replay_recorder import EpisodeRecorder, AsyncReplayWriter, REPLAY_EXT
+from train_profiler import PhaseProfiler, ProfileWindow, format_report, append_report
+from checkpoint_manager import CheckpointManager
+from training_state import (capture_training_state, write_training_state, latest_state_dir,
+                            load_training_state, restore_training_state, DEFAULT_STATE_DIR)
 
 # --- GPU/Metal detection and setup ---
 gpus = tf.config.list_physical_devices('GPU')
@@ -63,296 +65,123 @@ print("")
 # - Scale factor: 1024 for easy bit shifting on Genesis (>>10 instead of /1000)
 # - Game boundaries match real implementation with horizontal borders
 # - Paddle positions and collision detection match actual game coordinates
-
-# Simple Pong environment simulation for training
-class PongEnv:
-    def __init__(self):
-        self.last_ai_y = 88  # Track previous position to detect camping
-        self.stationary_steps = 0  # Count steps without movement
-        self.reset()
-
-    def reset(self):
-        # Randomize ball starting position and direction to prevent camping
-        import random
-        self.ball_x = 160  # Always start at center X
-        self.ball_y = random.randint(50, 170)  # Random Y position
-        
-        # Random direction: 50% chance left, 50% chance right
-        direction = random.choice([-1, 1])
-        self.ball_vx = 2 * direction
-        
-        # Random Y velocity to add variety
-        self.ball_vy = random.choice([-2, -1, 1, 2])
-        
-        # CRITICAL: Randomize starting positions to prevent positional bias
-        self.player_y = random.randint(20, 150)  # Random player start
-        self.ai_y = random.randint(20, 150)      # Random AI start
-        self.last_ai_y = self.ai_y
-        self.stationary_steps = 0
-        self.player_score = 0
-        self.ai_score = 0
-        self.steps = 0
-        return self.get_state()
-
-    def get_state(self):
-        # Normalize all inputs using tile coordinates, matching ai.c and pong_ai_train.py
-        tile_ball_x = self.ball_x // 8
-        tile_ball_y = self.ball_y // 8
-        tile_ai_y   = self.ai_y // 8
-        norm_ball_x = tile_ball_x / 39.0
-        norm_ball_y = tile_ball_y / 27.0
-        norm_ball_vx = (self.ball_vx + 4) / 8.0
-        norm_ball_vy = (self.ball_vy + 4) / 8.0
-        norm_ai_y   = tile_ai_y / 27.0
-        return np.array([
-            norm_ball_x,
-            norm_ball_y,
-            norm_ball_vx,
-            norm_ball_vy,
-            norm_ai_y
-        ])
-
-    def step(self, action):
-        self.steps += 1
-        
-        # Track AI movement to discourage camping
-        prev_ai_y = self.ai_y
-        
-        # AI action (0=stay, 1=up, 2=down) - using real game PADDLE_SPEED=3
-        if action == 1 and self.ai_y > 8:
-            self.ai_y -= 3  # PADDLE_SPEED from real game
-        elif action == 2 and self.ai_y < 160:  # 26 tiles of 8 pixels = 208; 208 - 48 (PADDLE_HEIGHT) = 160
-            self.ai_y += 3  # PADDLE_SPEED from real game
-
-        # Track stationary behavior for anti-camping
-        if abs(self.ai_y - self.last_ai_y) < 1:  # Essentially not moving
-            self.stationary_steps += 1
-        else:
-            self.stationary_steps = 0
-        self.last_ai_y = self.ai_y
-
-        # Simple player AI (follows ball) - using real game PADDLE_SPEED=3
-        # IMPROVEMENT: Make player AI less skilled so AI can score more often
-        import random
-        player_target = self.ball_y
-        
-        # Make player AI balanced - 15% chance of positioning errors (reduced from 40%)
-        if random.random() < 0.15:
-            player_target += random.randint(-20, 20)  # Smaller positioning errors
-        
-        # Add slight reaction delay - player sometimes doesn't move at all
-        if random.random() < 0.1:  # 10% chance player doesn't react this frame (reduced from 20%)
-            pass  # Skip movement entirely
-        else:
-            # Normal movement speed for player (3, same as AI)
-            move_speed = 3  # Restored to 3 to match AI speed
-            
-            if player_target < self.player_y + 24:  # Half of PADDLE_HEIGHT (48/2 = 24)
-                self.player_y = max(8, self.player_y - move_speed)
-            elif player_target > self.player_y + 24:  # Half of PADDLE_HEIGHT (48/2 = 24)
-                self.player_y = min(160, self.player_y + move_speed)  # 208 - 48 = 160
-
-        # Ball movement - using real game BALL_SPEED=2
-        self.ball_x += self.ball_vx
-        self.ball_y += self.ball_vy
-
-        # Ball collision with top/bottom walls (match real game with horizontal borders at y=16 and y=208)
-        if self.ball_y <= 16 or self.ball_y >= 208:
-            self.ball_vy = -self.ball_vy
-            # Add slight randomness to bounces to prevent predictable patterns
-            if random.random() < 0.1:  # 10% chance
-                self.ball_vy += random.choice([-1, 1])  # Slight velocity change
-                self.ball_vy = max(-4, min(4, self.ball_vy))  # Keep within bounds
-
-        # Ball collision with paddles (using real PADDLE_HEIGHT=48)
-        done = False
-        reward = 0
-
-        # Player paddle collision (left side, match real game coordinates)
-        if (self.ball_x <= 24 and self.ball_vx < 0 and 
-            self.player_y <= self.ball_y <= self.player_y + 48):  # Real PADDLE_HEIGHT
-            self.ball_vx = -self.ball_vx
-            self.ball_x = 24
-
-        # AI paddle collision (right side, match real game coordinates)
-        elif (self.ball_x >= 296 and self.ball_vx > 0 and 
-              self.ai_y <= self.ball_y <= self.ai_y + 48):  # Real PADDLE_HEIGHT
-            self.ball_vx = -self.ball_vx
-            self.ball_x = 296
-            reward = 1.0  # Reduced reward for hitting the ball (was 2.0)
-
-        # Scoring
-        if self.ball_x <= 0:
-            self.ai_score += 1
-            reward = 1.0  # Reduced reward for scoring (was 2.0)
-            done = True
-        elif self.ball_x >= 320:
-            self.player_score += 1
-            reward = -1.0  # Reduced penalty for getting scored on (was -2.0)
-            done = True
-
-        # Additional reward shaping for better AI behavior (additive, not overwriting hit/score rewards)
-        if not done:
-            # small per-step time penalty to discourage camping
-            timestep_penalty = -0.001  # Reduced penalty for stability
-
-            # Calculate distance from AI paddle to ball (using real paddle center)
-            paddle_center = self.ai_y + 24  # Half of real PADDLE_HEIGHT (48/2 = 24)
-            ball_distance = abs(paddle_center - self.ball_y)
-
-            shaping_reward = 0.0
-            if self.ball_vx > 0:  # Ball moving toward AI
-                # Closer -> larger bonus (scaled to ~0..0.5)
-                proximity_reward = max(0.0, (50.0 - ball_distance) / 50.0) * 0.5
-                shaping_reward += proximity_reward
-            else:
-                # small negative when ball moving away to encourage tracking when relevant
-                shaping_reward += -0.02
-
-            # Bonus for staying in reasonable position (not at edges)
-            if 50 < self.ai_y < 150:
-                shaping_reward += 0.01
-
-            # Strong anti-camping penalty - discourage staying in same spot
-            if self.stationary_steps > 5:  # Been stationary for more than 5 steps
-                camping_penalty = -0.2 * (self.stationary_steps - 5)  # Harsh penalty
-                shaping_reward += camping_penalty
-
-            # CRITICAL: Add movement reward to encourage any action
-            if action != 0:  # Any movement (up or down)
-                movement_reward = 0.05  # Small but consistent movement reward
-                shaping_reward += movement_reward
-
-            # Apply timestep penalty + shaping to the base reward
-            reward += timestep_penalty + shaping_reward
-
-        return self.get_state(), reward, done
-
-# DQN Agent for learning
-class DQNAgent:
-    def __init__(self, state_size=5, action_size=3):
-        self.state_size = state_size
-        self.action_size = action_size
-        self.memory = deque(maxlen=10000)  # Optimized for M1 Pro 16GB - good balance of memory and diversity
-        
-        # Improved epsilon scheduling (linear decay like reference implementation)
-        self.epsilon = 1.0  # Start with full exploration
-        self.epsilon_min = 0.01  # Lower minimum for better final performance
-        self.epsilon_decay_steps = 3000  # Linear decay over first 3000 episodes
-        self.learning_rate = 1e-4  # Lower, more stable learning rate
-        self.initial_learning_rate = 1e-4
-        
-        # Training schedule parameters (modern practices with Adam)
-        self.learning_starts = 1000  # Wait longer before training starts
-        self.learning_freq = 4  # Train every 4 steps for stability
-        self.target_update_freq = 2000  # Update target model every 2000 steps
-        self.batch_size = 64  # Larger batch for more stable gradients
-        
-        self.step_count = 0
-        self.episode_count = 0
-        self.rng = np.random.default_rng(42)  # Reproducible random seed
-        self.first_replay_done = False  # Track first replay completion
-        
-        # Build neural network models
-        self.model = self._build_model()
-        self.target_model = self._build_model()
-        self.update_target_model()
-
-    def _build_model(self):
-        # Match the exact architecture used in ai.c: 5 inputs -> 8 hidden -> 3 outputs
-        # Optimized for M1 Pro with explicit dtype and modern Keras syntax
-        model = keras.Sequential([
-            layers.Input(shape=(self.state_size,)),  # Modern Keras input layer
-            layers.Dense(8, activation='relu', dtype='float32'),  # 8 hidden neurons to match ai.c
-            layers.Dense(self.action_size, activation='linear', dtype='float32')              # 3 output actions (up, stay, down)
-        ])
-        # Use Adam optimizer (modern best practice - better than RMSprop with experience replay)
-        # Google Brain showed Adam significantly improves DQN performance
-        optimizer = keras.optimizers.Adam(learning_rate=self.learning_rate, epsilon=1e-4, clipnorm=1.0)
-        # Use Huber loss (Smooth L1) which is more stable for Q-learning
-        model.compile(loss='huber', optimizer=optimizer, jit_compile=False)
-        return model
-
-    def update_target_model(self):
-        self.target_model.set_weights(self.model.get_weights())
-
-    def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
-
-    def act(self, state):
-        self.step_count += 1
-        
-        # Update target model periodically
-        if self.step_count % self.target_update_freq == 0:
-            self.update_target_model()
-        
-        # Linear epsilon decay (like reference implementation)
-        if self.episode_count < self.epsilon_decay_steps:
-            self.epsilon = 1.0 - (self.episode_count / self.epsilon_decay_steps) * (1.0 - self.epsilon_min)
-        else:
-            self.epsilon = self.epsilon_min
-            
-        if self.rng.random() <= self.epsilon:
-            return self.rng.integers(0, self.action_size)
-        q_values = self.model.predict(state.reshape(1, -1), verbose=0)
-        return np.argmax(q_values[0])
-
-    def replay(self, batch_size=None):  # Use agent's batch_size if not specified
-        if batch_size is None:
-            batch_size = self.batch_size
-        if len(self.memory) < batch_size:
-            return
-        
-        replay_start = time.time()  # Track replay timing for first run
-        
-        batch = random.sample(self.memory, batch_size)
-        states = np.array([e[0] for e in batch])
-        actions = np.array([e[1] for e in batch])
-        rewards = np.array([e[2] for e in batch])
-        next_states = np.array([e[3] for e in batch])
-        dones = np.array([e[4] for e in batch])
-
-        # Double DQN: Use main model to select action, target model to evaluate
-        current_q_values = self.model.predict(states, verbose=0)
-        next_q_values_main = self.model.predict(next_states, verbose=0)
-        next_q_values_target = self.target_model.predict(next_states, verbose=0)
-
-        target_q_values = current_q_values.copy()
-        
-        for i in range(batch_size):
-            if dones[i]:
-                target_q_values[i][actions[i]] = rewards[i]
-            else:
-                # Double DQN update
-                best_action = np.argmax(next_q_values_main[i])
-                target_q_values[i][actions[i]] = rewards[i] + 0.95 * next_q_values_target[i][best_action]
-
-        history = self.model.fit(states, target_q_values, epochs=1, verbose=0)
-        # Save last loss for stats
-        self.last_loss = history.history['loss'][0] if 'loss' in history.history else 0.0
-
-        if not self.first_replay_done:
-            replay_time = time.time() - replay_start
-            print(f"[INFO] First replay completed in {replay_time:.2f}s", flush=True)
-            self.first_replay_done = True
-    
-    def update_model(self):
-        # Final update of target model
-        self.update_target_model()
+from pong_env import PongEnv
+from dqn_agent import DQNAgent
+from teacher_policy import generate_dataset
+from lut_builder import quantize_weights, build_lut, lut_to_bytes, format_weights_c, FULL_LAYOUT
+from keras_weights import load_weights
+from league import League
+from evaluator import BackgroundEvaluator
+from actor_fleet import FleetServer
+from qat import lut_agreement
 
 # Training setup
 print("=" * 70)
 print("This training uses modern DQN best practices for M1 Pro with Metal GPU!")
 print("-" * 70)
 
-env = PongEnv()
-agent = DQNAgent()
+parser = argparse.ArgumentParser(description="Train the Genesis Pong DQN")
+parser.add_argument('--continue', dest='continue_training', action='store_true',
+                    help="Continue from ../models/pong_ai_model.h5 without prompting")
+parser.add_argument('--profile', action='store_true',
+                    help="Capture a cProfile/pyinstrument dump for a window of episodes")
+parser.add_argument('--profile-start', type=int, default=10,
+                    help="Episodes into this run before the profile window opens; counted from the "
+                         "resumed episode with --resume (default: 10)")
+parser.add_argument('--profile-episodes', type=int, default=20,
+                    help="Number of episodes in the profile window (default: 20)")
+parser.add_argument('--profile-backend', choices=['cprofile', 'pyinstrument'], default='cprofile',
+                    help="Profiler used for the --profile window (default: cprofile)")
+parser.add_argument('--profile-report-every', type=int, default=50,
+                    help="Emit per-phase timing report every N episodes (default: 50)")
+parser.add_argument('--peak-debounce', type=float, default=30.0,
+                    help="Write at most one peak-reward checkpoint per N seconds (default: 30)")
+parser.add_argument('--keep-top-k', type=int, default=5,
+                    help="Peak checkpoints kept by reward (default: 5)")
+parser.add_argument('--keep-last-n', type=int, default=3,
+                    help="Most recent peak checkpoints kept in addition to the top-K (default: 3)")
+parser.add_argument('--resume', nargs='?', const=DEFAULT_STATE_DIR, default=None, metavar='DIR',
+                    help=f"Resume the full training state (optimizer, replay, counters) from DIR "
+                         f"(default: {DEFAULT_STATE_DIR})")
+parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR,
+                    help=f"Where resumable training state is written (default: {DEFAULT_STATE_DIR})")
+parser.add_argument('--state-every', type=int, default=100,
+                    help="Save the resumable training state every N episodes, 0 disables (default: 100)")
+parser.add_argument('--pretrain-imitation', nargs='?', type=int, const=1_000_000, default=0, metavar='SAMPLES',
+                    help="Before RL, fit the net to pong_ai_predict on SAMPLES teacher-labeled states "
+                         "(default when given: 1000000)")
+parser.add_argument('--pretrain-epochs', type=int, default=3,
+                    help="Epochs over the imitation dataset (default: 3)")
+parser.add_argument('--pretrain-epsilon', type=float, default=0.1,
+                    help="Starting epsilon for the RL phase after imitation pretraining (default: 0.1)")
+parser.add_argument('--league', nargs='*', metavar='GLOB', default=None,
+                    help="League mode: sample the opponent from the scripted bot, these frozen checkpoints "
+                         "and the current policy (default: scripted bot only)")
+parser.add_argument('--league-mix', default='0.5,0.3,0.2',
+                    help="Opponent mix scripted,checkpoint,self for --league (default: 0.5,0.3,0.2)")
+parser.add_argument('--league-snapshot-every', type=int, default=200,
+                    help="Freeze the current policy into the league every N episodes (0 = never)")
+parser.add_argument('--league-self-every', type=int, default=10,
+                    help="Refresh the 'self' opponent with the current weights every N episodes")
+parser.add_argument('--eval-every', type=int, default=50,
+                    help="Greedy-evaluate a weight snapshot in the background every N episodes; its LUT win "
+                         "rate decides pong_ai_model_best.h5 (0 = use the training reward average)")
+parser.add_argument('--eval-games', type=int, default=2048,
+                    help="Greedy games per evaluation (default: 2048)")
+parser.add_argument('--qat', action='store_true',
+                    help="Quantization-aware training: forward pass through the Genesis fixed-point path (qat.py)")
+parser.add_argument('--mirror-augment', action='store_true',
+                    help="Add the vertically mirrored copy of every sampled replay transition (doubles each batch)")
+parser.add_argument('--action-repeat', type=int, default=1, metavar='K',
+                    help="Repeat each decision for K frames, summing their rewards (default: 1)")
+parser.add_argument('--n-step', type=int, default=1, metavar='N',
+                    help="Train on N-step returns from consecutive replay transitions (default: 1)")
+parser.add_argument('--fleet-port', type=int, default=0, metavar='PORT',
+                    help="Serve weights to actor_fleet.py actors and ingest their transitions on PORT (0: off)")
+parser.add_argument('--fleet-host', default='127.0.0.1',
+                    help="Address the fleet server binds (0.0.0.0 for actors on other hosts)")
+parser.add_argument('--fleet-publish-every', type=int, default=10,
+                    help="Publish the current weights to the actors every N episodes (default: 10)")
+parser.add_argument('--symmetric-lut', action='store_true',
+                    help="Build the LUT (and evaluate snapshots) mirror-symmetric, computing about half the cells")
+args = parser.parse_args()
+try:
+    league_mix = [float(m) for m in args.league_mix.split(',')]
+except ValueError:
+    league_mix = []
+if len(league_mix) != 3 or not all(0 <= m < float('inf') for m in league_mix) or sum(league_mix) <= 0:
+    parser.error(f"--league-mix needs three non-negative weights scripted,checkpoint,self with a positive sum "
+                 f"(got {args.league_mix!r})")
+
+profiler = PhaseProfiler()
+profile_dir = '../models/profiles'
+profile_log_path = f"{profile_dir}/train_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+profile_window = None
+
+env = PongEnv(encoded=True)  # int8 state codes end to end, normalized per replay batch
+agent = DQNAgent(profiler=profiler, quantization_aware=args.qat, mirror_augment=args.mirror_augment,
+                 n_step=args.n_step)
+if args.action_repeat > 1 or args.n_step > 1:
+    print(f"⏩ {args.action_repeat} frame(s) per decision, {args.n_step}-step returns "
+          f"(~{args.action_repeat * args.n_step} frames per bootstrap)")
+if args.qat:
+    print("📐 Quantization-aware training: tile inputs, x1024 truncated weights, >>10 products, like the LUT")
 
 # Check for existing model to continue training from
 continue_training = False
 model_path = None
-
-if len(sys.argv) > 1 and sys.argv[1] == "--continue":
+resume_metrics = None
+
+if args.resume:
+    state_path = latest_state_dir(args.resume)
+    if state_path is None:
+        print(f"❌ No training state found in {args.resume} (expected a LATEST file)")
+        sys.exit(1)
+    print(f"\n🔄 Resuming full training state from: {state_path}")
+    resume_metrics = restore_training_state(agent, load_training_state(state_path))
+    print(f"✅ Restored episode {agent.episode_count}, step {agent.step_count}, "
+          f"epsilon {agent.epsilon:.3f}, replay {len(agent.memory)} transitions")
+elif args.continue_training:
     # Look for existing models
     if os.path.exists('../models/pong_ai_model.h5'):
         model_path = '../models/pong_ai_model.h5'
@@ -376,37 +205,89 @@ else:
 if continue_training:
     print(f"\n🔄 Loading existing model from: {model_path}")
     try:
-        # Try loading with custom objects to handle version compatibility
-        agent.model = tf.keras.models.load_model(model_path, compile=False)
-        
-        # Recompile the model with current Keras version settings
-        agent.model.compile(loss='mse', optimizer=keras.optimizers.Adam(learning_rate=agent.learning_rate))
-        
-        # Clone and set up target model
-        agent.target_model = tf.keras.models.clone_model(agent.model)
-        agent.target_model.compile(loss='mse', optimizer=keras.optimizers.Adam(learning_rate=agent.learning_rate))
-        agent.target_model.set_weights(agent.model.get_weights())
+        if args.qat:
+            # Float and fixed-point models share the kernel/bias layout: keep the QAT model, load the weights
+            agent.model.set_weights(load_weights(model_path))
+            agent.update_target_model()
+        else:
+            # Try loading with custom objects to handle version compatibility
+            agent.model = tf.keras.models.load_model(model_path, compile=False)
+
+            # Recompile with the same Huber loss and Adam settings as a fresh run
+            agent.compile_model(agent.model)
+
+            # Clone and set up target model
+            agent.target_model = tf.keras.models.clone_model(agent.model)
+            agent.compile_model(agent.target_model)
+            agent.target_model.set_weights(agent.model.get_weights())
         
         print("✅ Successfully loaded existing model weights!")
         print("   Training will continue from the existing knowledge base.")
-        # Reduce epsilon since we're continuing training
-        agent.epsilon = max(0.1, agent.epsilon * 0.5)  # Start with less exploration
-        print(f"   Starting epsilon (exploration): {agent.epsilon:.3f}")
+        print("   (Weights only: use --resume to also restore optimizer, replay memory and epsilon)")
     except Exception as e:
         print(f"❌ Error loading model: {e}")
         print("   Starting fresh training instead...")
         continue_training = False
-else:
+elif resume_metrics is None:
     print("\n🆕 Starting fresh training from scratch...")
 
+if args.pretrain_imitation and resume_metrics is not None:
+    print("⚠️  --pretrain-imitation ignored when resuming a saved training state")
+elif args.pretrain_imitation:
+    print(f"\n🎓 Imitation pretraining on {args.pretrain_imitation:,} pong_ai_predict-labeled states...")
+    pretrain_start = time.time()
+    teacher_states, teacher_actions = generate_dataset(args.pretrain_imitation)
+    accuracy = agent.pretrain_imitation(teacher_states, teacher_actions, epochs=args.pretrain_epochs)
+    agent.epsilon_start = agent.epsilon = max(args.pretrain_epsilon, agent.epsilon_min)
+    print(f"✅ Teacher agreement {accuracy * 100:.1f}% after {time.time() - pretrain_start:.1f}s; "
+          f"RL starts at epsilon {agent.epsilon:.3f}")
+
+league = None
+if args.league is not None:
+    league = League(mix=league_mix)
+    league.update_self(agent.model.get_weights())
+    loaded = league.add_checkpoint_files(args.league)
+    print(f"🏟️  League mode: {loaded} frozen checkpoints, mix scripted/checkpoint/self = {args.league_mix}")
+
+# Background, atomic checkpoint writes (training thread only snapshots the weights)
+checkpoints = CheckpointManager(agent.model, '../models', peak_debounce_s=args.peak_debounce,
+                                keep_top_k=args.keep_top_k, keep_last_n=args.keep_last_n)
+
+evaluator = BackgroundEvaluator(args.eval_games, symmetric=args.symmetric_lut) if args.eval_every > 0 else None
+
+fleet = None
+if args.fleet_port:
+    fleet = FleetServer(args.fleet_host, args.fleet_port, action_repeat=args.action_repeat).start()
+    fleet.publish(agent.model.get_weights())
+    print(f"📡 Actor fleet server on {args.fleet_host}:{fleet.port} "
+          f"(python actor_fleet.py actor --host <this host> --port {fleet.port})")
+
 episodes = 5
 scores = []
 best_score = -float('inf')
+best_eval_win_rate = -1.0
+last_eval = None
 peak_reward = -float('inf')
 peak_reward_episode = -1
 episode_lengths = []
-
-if continue_training:
+previous_elapsed = 0.0
+if resume_metrics is not None:
+    scores = resume_metrics['scores']
+    episode_lengths = resume_metrics['episode_lengths']
+    best_score = resume_metrics['best_score']
+    peak_reward = resume_metrics['peak_reward']
+    peak_reward_episode = resume_metrics['peak_reward_episode']
+    previous_elapsed = resume_metrics['elapsed_time']
+    best_eval_win_rate = resume_metrics.get('best_eval_win_rate', -1.0)
+start_episode = agent.episode_count
+if args.profile:
+    profile_window = ProfileWindow(profile_dir, start_episode + args.profile_start, args.profile_episodes,
+                                   args.profile_backend)
+
+if resume_metrics is not None:
+    print("Beginning RESUMED training loop...")
+    print(f"🚀 Continuing at episode {start_episode} with {episodes} additional episodes")
+elif continue_training:
     print("Beginning CONTINUED training loop...")
     print(f"🚀 Resuming from existing model with {episodes} additional episodes")
 else:
@@ -415,39 +296,89 @@ else:
 
 # Start timing the training
 training_start_time = time.time()
-global_start_time = training_start_time
+global_start_time = training_start_time - previous_elapsed  # total elapsed carries across resumes
 
 # Global variables for signal handling
 agent_ref = None
 scores_ref = None
 episode_lengths_ref = None
-
-def save_model_and_exit(signum, frame):
-    """Signal handler to save model before exit"""
-    print(f"\n\n🛑 INTERRUPTED! Saving model before exit...")
+stop_signal = None  # set by the signal handler, acted on by the training loop
+
+def save_training_state():
+    """Snapshot everything needed by --resume now, write it on the checkpoint thread"""
+    metrics = {
+        'scores': list(scores),
+        'episode_lengths': list(episode_lengths),
+        'best_score': best_score,
+        'peak_reward': peak_reward,
+        'peak_reward_episode': peak_reward_episode,
+        'elapsed_time': time.time() - global_start_time,
+        'best_eval_win_rate': best_eval_win_rate,
+    }
+    snapshot = capture_training_state(agent, metrics)
+    checkpoints.run_async(write_training_state, snapshot, args.state_dir)
+
+def handle_evaluation(evaluation):
+    """Report a finished background evaluation; a new best LUT win rate saves the evaluated weights"""
+    global best_eval_win_rate, last_eval
+    eval_episode, eval_weights, result = evaluation
+    last_eval = result
+    print(f"\n🎯 Greedy eval of episode {eval_episode}: LUT {result['lut_win_rate'] * 100:.1f}%, "
+          f"float {result['float_win_rate'] * 100:.1f}% of {result['games']} games ({result['seconds']:.1f}s)")
+    if result['lut_win_rate'] > best_eval_win_rate:
+        best_eval_win_rate = result['lut_win_rate']
+        checkpoints.save_weights(eval_weights, '../models/pong_ai_model_best.h5')
+        print(f"           >>> NEW BEST GREEDY WIN RATE: {best_eval_win_rate * 100:.1f}% - BEST MODEL SAVE QUEUED <<<")
+
+def request_stop(signum, frame):
+    """Signal handler: only flag the stop, the training loop saves and exits between steps
+
+    Saving here could deadlock (the interrupted code may hold the checkpoint
+    lock that flush() waits on); a second signal aborts without saving.
+    """
+    global stop_signal
+    if stop_signal is not None:
+        raise KeyboardInterrupt
+    stop_signal = signum
+    print("\n\n🛑 INTERRUPTED! Saving model after the current step (signal again to abort)...", flush=True)
+
+def save_model_and_exit():
+    """Save the model and training state after an interrupt, then exit"""
+    print("💾 Saving model before exit...")
     if agent_ref is not None:
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             interrupted_path = f'../models/pong_ai_model_interrupted_{timestamp}.h5'
-            agent_ref.model.save(interrupted_path)
-            print(f"✅ Model saved to: {interrupted_path}")
-            
+            checkpoints.save(agent_ref.model, interrupted_path)
             # Also save as main model
-            agent_ref.model.save('../models/pong_ai_model.h5')
+            checkpoints.save(agent_ref.model, '../models/pong_ai_model.h5')
+            save_training_state()
+            checkpoints.close()
+            if evaluator is not None:
+                evaluator.close(wait=False)
+            print(f"✅ Model saved to: {interrupted_path}")
             print("✅ Model also saved as: ../models/pong_ai_model.h5")
+            print(f"✅ Training state saved to: {args.state_dir} (resume with --resume)")
+            if profile_window is not None:
+                profile_window.stop()
             
             if scores_ref and len(scores_ref) > 0:
                 avg_score = np.mean(scores_ref[-100:]) if len(scores_ref) >= 100 else np.mean(scores_ref)
                 print(f"📊 Final performance: {avg_score:.2f} average score")
         except Exception as e:
             print(f"❌ Error saving model: {e}")
+    replay_writer.close()
     
     print("👋 Exiting...")
     sys.exit(0)
 
+# Best-episode replays: compact delta-encoded recordings written off the training thread
+replay_writer = AsyncReplayWriter('../models/best_replays')
+recorder = EpisodeRecorder()
+
 # Set up signal handlers for graceful interruption
-signal.signal(signal.SIGINT, save_model_and_exit)  # Ctrl+C
-signal.signal(signal.SIGTERM, save_model_and_exit)  # Termination
+signal.signal(signal.SIGINT, request_stop)  # Ctrl+C
+signal.signal(signal.SIGTERM, request_stop)  # Termination
 
 # Set up global references for signal handler
 agent_ref = agent
@@ -461,43 +392,62 @@ try:
 except Exception as e:
     print(f"[Monitor] Could not connect to training monitor server: {e}")
 
-for episode in range(episodes):
+for episode in range(start_episode, start_episode + episodes):
     episode_start_time = time.time()
+    if profile_window is not None:
+        profile_window.on_episode_start(episode)
     state = env.reset()
+    opponent = league.sample() if league is not None else None
+    recorder.start(env, episode)
     total_reward = 0
     steps_in_episode = 0
     
     while True:
         action = agent.act(state)
-        next_state, reward, done = env.step(action)
+        reward = 0.0
+        for _ in range(args.action_repeat):
+            opponent_action = None
+            if league is not None:
+                with profiler.phase('opponent'):
+                    opponent_action = league.act(opponent, env.ball_x, env.ball_y, env.ball_vx, env.ball_vy,
+                                                 env.player_y)
+            with profiler.phase('env_step'):
+                next_state, frame_reward, done = env.step(action, opponent_action)
+            profiler.count_steps(1)
+            recorder.record(env, action)
+            reward += frame_reward
+            steps_in_episode += 1
+            if done:
+                break
         agent.remember(state, action, reward, next_state, done)
         state = next_state
         total_reward += reward
-        steps_in_episode += 1
 
         # Train according to modern schedule (every few steps with Adam)
         if (len(agent.memory) >= agent.learning_starts and 
             agent.step_count % agent.learning_freq == 0):
             agent.replay()  # Use agent's default batch size
 
-        if done or steps_in_episode > 1000:  # Prevent infinite games
+        if done or steps_in_episode > 1000 or stop_signal is not None:  # Prevent infinite games
             break
+    if stop_signal is not None:
+        break  # the interrupted episode is not scored
     
     scores.append(total_reward)
     episode_lengths.append(steps_in_episode)
     agent.episode_count += 1  # Track episodes for epsilon decay
+    profiler.count_episode()
 
     # Track peak single-episode reward and save model if new peak
     if total_reward > peak_reward:
         peak_reward = total_reward
         peak_reward_episode = episode
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            peak_filename = f'../models/pong_ai_model_peak_{peak_reward:.2f}_ep{episode}_{timestamp}.h5'
-            agent.model.save(peak_filename)
-            print(f"           >>> PEAK REWARD MODEL SAVED: {peak_filename} <<<")
-        except Exception as e:
-            print(f"           >>> Error saving peak reward model: {e}")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with profiler.phase('checkpoint'):
+            checkpoints.save_peak(agent.model, peak_reward, episode)
+        replay_name = f'pong_replay_peak_{peak_reward:.2f}_ep{episode}_{timestamp}{REPLAY_EXT}'
+        replay_path = replay_writer.submit(replay_name, recorder.finish(total_reward))
+        print(f"           >>> PEAK EPISODE REPLAY QUEUED: {replay_path} <<<")
     
     # Calculate timing
     episode_time = time.time() - episode_start_time
@@ -520,8 +470,24 @@ for episode in range(episodes):
             'best_score': best_score,
             'elapsed_time': total_elapsed
         }
+        if last_eval is not None:
+            stats_payload['eval_win_rate'] = last_eval['lut_win_rate']
+            stats_payload['eval_float_win_rate'] = last_eval['float_win_rate']
+        if league is not None:
+            stats_payload['opponent'] = league.name(opponent)
+            stats_payload['opponent_mix'] = league.mix_stats()
         print(f"[SocketIO Emit] {stats_payload}")
-        sio.emit('stats', stats_payload)
+        with profiler.phase('telemetry'):
+            sio.emit('stats', stats_payload)
+
+    # Per-phase timing report every N episodes (console, JSONL file and monitor)
+    if args.profile_report_every > 0 and agent.episode_count % args.profile_report_every == 0:
+        report = profiler.report()
+        print(format_report(report), flush=True)
+        append_report(profile_log_path, report, episode=agent.episode_count, elapsed_time=total_elapsed)
+        if sio.connected:
+            sio.emit('profile', dict(report, episode=agent.episode_count))
+        profiler.reset()
 
     if episode % 10 == 0:
         hours = int(total_elapsed // 3600)
@@ -546,16 +512,60 @@ for episode in range(episodes):
         if avg_score > best_score:
             best_score = avg_score
             print(f"           >>> NEW BEST AVERAGE SCORE: {best_score:.2f} <<<")
-            # Auto-save on improvement
-            try:
-                agent.model.save('../models/pong_ai_model_best.h5')
-                print("           >>> BEST MODEL SAVED <<<")
-            except Exception as e:
-                print(f"           >>> Error saving best model: {e}")
+            # Without the greedy evaluator, auto-save on training reward improvement
+            if evaluator is None:
+                with profiler.phase('checkpoint'):
+                    checkpoints.save(agent.model, '../models/pong_ai_model_best.h5')
+                print("           >>> BEST MODEL SAVE QUEUED <<<")
+
+    if evaluator is not None:
+        if agent.episode_count % args.eval_every == 0:
+            with profiler.phase('checkpoint'):
+                if not evaluator.submit(agent.episode_count, agent.model.get_weights()):
+                    print(f"\n⏭️  Greedy eval of episode {agent.episode_count} skipped (previous one still running)")
+        evaluation = evaluator.poll()
+        if evaluation is not None:
+            handle_evaluation(evaluation)
 
     if episode % 1 == 0 and episode > 0:
         print(".", end="", flush=True)
 
+    if league is not None:
+        if args.league_self_every > 0 and agent.episode_count % args.league_self_every == 0:
+            league.update_self(agent.model.get_weights())
+        if args.league_snapshot_every > 0 and agent.episode_count % args.league_snapshot_every == 0:
+            league.add_checkpoint(agent.model.get_weights(), f"episode_{agent.episode_count}")
+            print(f"\n🏟️  Froze episode {agent.episode_count} into the league "
+                  f"({league.num_checkpoints} checkpoints, recent mix {league.mix_stats()})")
+
+    if fleet is not None:
+        with profiler.phase('fleet'):
+            fleet.drain_into(agent.memory)
+            if args.fleet_publish_every > 0 and agent.episode_count % args.fleet_publish_every == 0:
+                fleet.publish(agent.model.get_weights())
+
+    if args.state_every > 0 and agent.episode_count % args.state_every == 0:
+        with profiler.phase('checkpoint'):
+            save_training_state()
+
+    if profile_window is not None:
+        profile_window.on_episode_end(episode)
+
+if stop_signal is not None:
+    save_model_and_exit()
+
+replay_writer.close()
+if fleet is not None:
+    fleet.close()
+    print(f"📡 Actor fleet: {fleet.stats['transitions']:,} transitions from {fleet.stats['connections']} connections")
+if profile_window is not None:
+    profile_window.stop()
+if evaluator is not None:
+    evaluator.close()  # let the last snapshot finish so it can still become the best model
+    evaluation = evaluator.poll()
+    if evaluation is not None:
+        handle_evaluation(evaluation)
+
 print("\n" + "=" * 70)
 print("🏆 TRAINING COMPLETED! 🏆")
 
@@ -592,89 +602,31 @@ model = agent.model
 # Save model
 print("\nSaving trained model...")
 versioned_filename = f'{models_dir}/pong_ai_model_v{timestamp}.h5'
-model.save(versioned_filename)
-print(f"✓ Keras model saved as '{versioned_filename}'")
+checkpoints.save(model, versioned_filename)
 standard_filename = f'{models_dir}/pong_ai_model.h5'
-model.save(standard_filename)
+checkpoints.save(model, standard_filename)
+save_training_state()
+checkpoints.close()  # also writes any debounced peak checkpoint
+print(f"✓ Keras model saved as '{versioned_filename}'")
 print(f"✓ Keras model also saved as '{standard_filename}' (for get_weights.py compatibility)")
+print(f"✓ Training state saved under '{args.state_dir}' (continue exactly with --resume)")
 
 # === Extract weights for Genesis (get_weights.py logic) ===
 print("\nExtracting weights...")
-import tensorflow as tf
-model = tf.keras.models.load_model(standard_filename, compile=False)
-layer1_weights = model.layers[0].get_weights()[0]  # (5,8)
-layer1_bias = model.layers[0].get_weights()[1]     # (8,)
-layer2_weights = model.layers[1].get_weights()[0]  # (8,3)
-layer2_bias = model.layers[1].get_weights()[1]     # (3,)
-scale_factor = 1024
-weights1 = [[int(w * scale_factor) for w in row] for row in layer1_weights]
-bias1 = [int(b * scale_factor) for b in layer1_bias]
-weights2 = [[int(w * scale_factor) for w in row] for row in layer2_weights]
-bias2 = [int(b * scale_factor) for b in layer2_bias]
-
-# === Generate LUT (gen_lut_v3.py logic) ===
+qweights = quantize_weights(load_weights(standard_filename))
+
+# === Generate LUT (gen_lut_v3.py logic, vectorized in lut_builder.py) ===
 print("\nGenerating LUT...")
-LUT_BALL_X_STEPS = 40
-LUT_BALL_Y_STEPS = 28
-LUT_VEL_X_STEPS  = 9
-LUT_VEL_Y_STEPS  = 9
-LUT_AI_Y_STEPS   = 28
-LUT_SIZE = (LUT_BALL_X_STEPS * LUT_BALL_Y_STEPS * LUT_VEL_X_STEPS * LUT_VEL_Y_STEPS * LUT_AI_Y_STEPS)
-def relu(x): return x if x > 0 else 0
-def nn_forward(ball_x_px, ball_y_px, ball_vx, ball_vy, ai_y_px):
-    tile_ball_x = ball_x_px >> 3
-    tile_ball_y = ball_y_px >> 3
-    tile_ai_y   = ai_y_px   >> 3
-    norm_ball_x = (tile_ball_x * 1024) // 39
-    norm_ball_y = (tile_ball_y * 1024) // 27
-    norm_ball_vx = ((ball_vx + 4) * 1024) >> 3
-    norm_ball_vy = ((ball_vy + 4) * 1024) >> 3
-    norm_ai_y   = (tile_ai_y * 1024) // 27
-    inputs = [norm_ball_x, norm_ball_y, norm_ball_vx, norm_ball_vy, norm_ai_y]
-    hidden = []
-    for h in range(8):
-        s = bias1[h]
-        for i in range(5):
-            s += (inputs[i] * weights1[i][h]) >> 10
-        hidden.append(relu(s))
-    outputs = []
-    for o in range(3):
-        s = bias2[o]
-        for h in range(8):
-            s += (hidden[h] * weights2[h][o]) >> 10
-        outputs.append(s)
-    best_action = np.argmax(outputs)
-    return best_action
 lut_path = "../pong/res/ai_lut.bin"
-buf = bytearray()
-for bx in range(LUT_BALL_X_STEPS):
-    bx_px = (bx << 3)
-    for by in range(LUT_BALL_Y_STEPS):
-        by_px = (by << 3)
-        for vx in range(LUT_VEL_X_STEPS):
-            ball_vx = vx - 4
-            for vy in range(LUT_VEL_Y_STEPS):
-                ball_vy = vy - 4
-                for ay in range(LUT_AI_Y_STEPS):
-                    ay_px = (ay << 3)
-                    action = nn_forward(bx_px, by_px, ball_vx, ball_vy, ay_px)
-                    buf.append(action)
+lut = build_lut(qweights, FULL_LAYOUT, symmetric=args.symmetric_lut)
+buf = lut_to_bytes(lut, FULL_LAYOUT)
 with open(lut_path, "wb") as f:
     f.write(buf)
 print(f"LUT generated and saved to {lut_path} ({len(buf)} bytes)")
-
-# Print weights and biases in C array format for ai.c
-def print_c_array(name, arr):
-    print(f"\n{name} = {{")
-    if isinstance(arr[0], list):
-        for row in arr:
-            print("    {" + ", ".join(str(x) for x in row) + "},")
-    else:
-        print("    " + ", ".join(str(x) for x in arr))
-    print("};")
+print(f"LUT agrees with the trained model's greedy action on {lut_agreement(model) * 100:.2f}% of cells")
+if args.symmetric_lut:
+    print(f"Mirror-symmetric LUT matches the unconstrained table on "
+          f"{(lut == build_lut(qweights, FULL_LAYOUT)).mean() * 100:.2f}% of cells")
 
 print("\nCopy these arrays into ai.c:\n")
-print_c_array("const s32 weights1[INPUT_SIZE][HIDDEN_SIZE]", weights1)
-print_c_array("const s32 bias1[HIDDEN_SIZE]", bias1)
-print_c_array("const s32 weights2[HIDDEN_SIZE][OUTPUT_SIZE]", weights2)
-print_c_array("const s32 bias2[OUTPUT_SIZE]", bias2)
\ No newline at end of file
+print(format_weights_c(qweights, ctype="s32"))
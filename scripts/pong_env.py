@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Pong training environments matching the Genesis game implementation
+
+- PongEnv: scalar environment used by pong_ai_train.py (one game, Python ints)
+- VecPongEnv: NumPy-batched version of the same physics, rewards and scripted
+  opponent, stepping N independent games per call
+
+Both use the game's coordinates: walls at y=16/208, paddles at x=24/296,
+PADDLE_SPEED 3, PADDLE_HEIGHT 48, ball speed 2, 8px tiles for state inputs.
+Actions: 0=stay, 1=up, 2=down.
+
+States come in two forms:
+- float: get_state(), the normalized network inputs (tile / 39 or 27, (v + 4) / 8)
+- code: get_state_code() / get_state_codes(), the same state as five small
+  integers (ball_x tile, ball_y tile, ball_vx, ball_vy, ai_y tile), stored as
+  int8 by the replay buffer. decode_states() turns a batch of codes into the
+  float inputs through a per-axis lookup table, bit-identical to get_state()
+  in float32.
+"""
+
+import numpy as np
+
+# Scripted opponent (left paddle) skill: aim error chance/range and skipped-reaction chance
+OPPONENT_AIM_ERROR_PROB = 0.15
+OPPONENT_AIM_ERROR_RANGE = 20
+OPPONENT_SKIP_PROB = 0.1
+# Chance that a wall bounce nudges vy by +/-1
+BOUNCE_NOISE_PROB = 0.1
+
+# State code normalization: input = (code + offset) / divisor, tabulated for every int8 code
+STATE_DIVISORS = (39.0, 27.0, 8.0, 8.0, 27.0)
+STATE_OFFSETS = (0, 0, 4, 4, 0)
+_CODE_VALUES = np.arange(256, dtype=np.uint8).view(np.int8).astype(np.float64)
+STATE_DECODE = np.stack([(_CODE_VALUES + offset) / divisor
+                         for offset, divisor in zip(STATE_OFFSETS, STATE_DIVISORS)]).astype(np.float32)
+_STATE_DECODE_FLAT = STATE_DECODE.ravel()
+_STATE_AXIS_OFFSETS = np.arange(len(STATE_DIVISORS)) * 256
+
+
+# Vertical mirror about the court's centre line (walls at y=16/208): ball_y -> 224 - ball_y,
+# ai_y -> 176 - ai_y (48px paddle), vy -> -vy, and UP <-> DOWN. In tiles that is 27 - tile for the
+# ball and 21 - tile for the paddle, exact for 7 of every 8 pixels. The physics and hit/score
+# rewards are symmetric; the paddle travel limits (8/160) and the 50 < ai_y < 150 shaping bonus
+# are slightly off-centre.
+MIRROR_BALL_TILES = 27
+MIRROR_PADDLE_TILES = 21
+MIRRORED_ACTIONS = np.array([0, 2, 1], dtype=np.int8)
+
+
+def mirror_codes(codes):
+    """Vertically mirrored state codes (..., 5), as a new array"""
+    mirrored = np.array(codes, dtype=np.int8)
+    mirrored[..., 1] = MIRROR_BALL_TILES - mirrored[..., 1]
+    mirrored[..., 3] = -mirrored[..., 3]
+    mirrored[..., 4] = MIRROR_PADDLE_TILES - mirrored[..., 4]
+    return mirrored
+
+
+def encode_states(ball_x, ball_y, ball_vx, ball_vy, ai_y):
+    """Pixel positions and velocities -> int8 state codes (..., 5)"""
+    return np.stack([np.asarray(ball_x) >> 3, np.asarray(ball_y) >> 3, np.asarray(ball_vx), np.asarray(ball_vy),
+                     np.asarray(ai_y) >> 3], axis=-1).astype(np.int8)
+
+
+def decode_states(codes):
+    """int8 state codes (..., 5) -> float32 network inputs, normalized like get_state"""
+    return _STATE_DECODE_FLAT.take(np.asarray(codes, dtype=np.int8).view(np.uint8) + _STATE_AXIS_OFFSETS)
+
+
+def codes_from_states(states):
+    """Inverse of decode_states for float inputs (e.g. replay buffers saved before state codes)"""
+    offsets = np.asarray(STATE_OFFSETS, dtype=np.float64)
+    return np.rint(np.asarray(states, dtype=np.float64) * STATE_DIVISORS - offsets).astype(np.int8)
+
+
+# Simple Pong environment simulation for training
+class PongEnv:
+    def __init__(self, encoded=False):
+        # encoded: reset() and step() return get_state_code() instead of get_state()
+        self.observe = self.get_state_code if encoded else self.get_state
+        self.last_ai_y = 88  # Track previous position to detect camping
+        self.stationary_steps = 0  # Count steps without movement
+        self.reset()
+
+    def reset(self):
+        # Randomize ball starting position and direction to prevent camping
+        import random
+        self.ball_x = 160  # Always start at center X
+        self.ball_y = random.randint(50, 170)  # Random Y position
+        
+        # Random direction: 50% chance left, 50% chance right
+        direction = random.choice([-1, 1])
+        self.ball_vx = 2 * direction
+        
+        # Random Y velocity to add variety
+        self.ball_vy = random.choice([-2, -1, 1, 2])
+        
+        # CRITICAL: Randomize starting positions to prevent positional bias
+        self.player_y = random.randint(20, 150)  # Random player start
+        self.ai_y = random.randint(20, 150)      # Random AI start
+        self.last_ai_y = self.ai_y
+        self.stationary_steps = 0
+        self.player_score = 0
+        self.ai_score = 0
+        self.steps = 0
+        return self.observe()
+
+    def get_state(self):
+        # Normalize all inputs using tile coordinates, matching ai.c and pong_ai_train.py
+        tile_ball_x = self.ball_x // 8
+        tile_ball_y = self.ball_y // 8
+        tile_ai_y   = self.ai_y // 8
+        norm_ball_x = tile_ball_x / 39.0
+        norm_ball_y = tile_ball_y / 27.0
+        norm_ball_vx = (self.ball_vx + 4) / 8.0
+        norm_ball_vy = (self.ball_vy + 4) / 8.0
+        norm_ai_y   = tile_ai_y / 27.0
+        return np.array([
+            norm_ball_x,
+            norm_ball_y,
+            norm_ball_vx,
+            norm_ball_vy,
+            norm_ai_y
+        ])
+
+    def get_state_code(self):
+        """(ball_x tile, ball_y tile, ball_vx, ball_vy, ai_y tile): get_state without the float array"""
+        return (self.ball_x >> 3, self.ball_y >> 3, self.ball_vx, self.ball_vy, self.ai_y >> 3)
+
+    def step(self, action, opponent_action=None):
+        """One frame; opponent_action (0/1/2) moves the left paddle instead of the scripted follower"""
+        self.steps += 1
+        
+        # Track AI movement to discourage camping
+        prev_ai_y = self.ai_y
+        
+        # AI action (0=stay, 1=up, 2=down) - using real game PADDLE_SPEED=3
+        if action == 1 and self.ai_y > 8:
+            self.ai_y -= 3  # PADDLE_SPEED from real game
+        elif action == 2 and self.ai_y < 160:  # 26 tiles of 8 pixels = 208; 208 - 48 (PADDLE_HEIGHT) = 160
+            self.ai_y += 3  # PADDLE_SPEED from real game
+
+        # Track stationary behavior for anti-camping
+        if abs(self.ai_y - self.last_ai_y) < 1:  # Essentially not moving
+            self.stationary_steps += 1
+        else:
+            self.stationary_steps = 0
+        self.last_ai_y = self.ai_y
+
+        import random
+        if opponent_action is not None and opponent_action >= 0:
+            # League opponent (left side) moves like the AI paddle
+            if opponent_action == 1:
+                self.player_y = max(8, self.player_y - 3)
+            elif opponent_action == 2:
+                self.player_y = min(160, self.player_y + 3)
+        else:
+            # Simple player AI (follows ball) - using real game PADDLE_SPEED=3
+            # IMPROVEMENT: Make player AI less skilled so AI can score more often
+            player_target = self.ball_y
+        
+            # Make player AI balanced - 15% chance of positioning errors (reduced from 40%)
+            if random.random() < OPPONENT_AIM_ERROR_PROB:
+                player_target += random.randint(-OPPONENT_AIM_ERROR_RANGE, OPPONENT_AIM_ERROR_RANGE)  # Smaller positioning errors
+        
+            # Add slight reaction delay - player sometimes doesn't move at all
+            if random.random() < OPPONENT_SKIP_PROB:  # 10% chance player doesn't react this frame (reduced from 20%)
+                pass  # Skip movement entirely
+            else:
+                # Normal movement speed for player (3, same as AI)
+                move_speed = 3  # Restored to 3 to match AI speed
+            
+                if player_target < self.player_y + 24:  # Half of PADDLE_HEIGHT (48/2 = 24)
+                    self.player_y = max(8, self.player_y - move_speed)
+                elif player_target > self.player_y + 24:  # Half of PADDLE_HEIGHT (48/2 = 24)
+                    self.player_y = min(160, self.player_y + move_speed)  # 208 - 48 = 160
+
+        # Ball movement - using real game BALL_SPEED=2
+        self.ball_x += self.ball_vx
+        self.ball_y += self.ball_vy
+
+        # Ball collision with top/bottom walls (match real game with horizontal borders at y=16 and y=208)
+        if self.ball_y <= 16 or self.ball_y >= 208:
+            self.ball_vy = -self.ball_vy
+            # Add slight randomness to bounces to prevent predictable patterns
+            if random.random() < BOUNCE_NOISE_PROB:  # 10% chance
+                self.ball_vy += random.choice([-1, 1])  # Slight velocity change
+                self.ball_vy = max(-4, min(4, self.ball_vy))  # Keep within bounds
+
+        # Ball collision with paddles (using real PADDLE_HEIGHT=48)
+        done = False
+        reward = 0
+
+        # Player paddle collision (left side, match real game coordinates)
+        if (self.ball_x <= 24 and self.ball_vx < 0 and 
+            self.player_y <= self.ball_y <= self.player_y + 48):  # Real PADDLE_HEIGHT
+            self.ball_vx = -self.ball_vx
+            self.ball_x = 24
+
+        # AI paddle collision (right side, match real game coordinates)
+        elif (self.ball_x >= 296 and self.ball_vx > 0 and 
+              self.ai_y <= self.ball_y <= self.ai_y + 48):  # Real PADDLE_HEIGHT
+            self.ball_vx = -self.ball_vx
+            self.ball_x = 296
+            reward = 1.0  # Reduced reward for hitting the ball (was 2.0)
+
+        # Scoring
+        if self.ball_x <= 0:
+            self.ai_score += 1
+            reward = 1.0  # Reduced reward for scoring (was 2.0)
+            done = True
+        elif self.ball_x >= 320:
+            self.player_score += 1
+            reward = -1.0  # Reduced penalty for getting scored on (was -2.0)
+            done = True
+
+        # Additional reward shaping for better AI behavior (additive, not overwriting hit/score rewards)
+        if not done:
+            # small per-step time penalty to discourage camping
+            timestep_penalty = -0.001  # Reduced penalty for stability
+
+            # Calculate distance from AI paddle to ball (using real paddle center)
+            paddle_center = self.ai_y + 24  # Half of real PADDLE_HEIGHT (48/2 = 24)
+            ball_distance = abs(paddle_center - self.ball_y)
+
+            shaping_reward = 0.0
+            if self.ball_vx > 0:  # Ball moving toward AI
+                # Closer -> larger bonus (scaled to ~0..0.5)
+                proximity_reward = max(0.0, (50.0 - ball_distance) / 50.0) * 0.5
+                shaping_reward += proximity_reward
+            else:
+                # small negative when ball moving away to encourage tracking when relevant
+                shaping_reward += -0.02
+
+            # Bonus for staying in reasonable position (not at edges)
+            if 50 < self.ai_y < 150:
+                shaping_reward += 0.01
+
+            # Strong anti-camping penalty - discourage staying in same spot
+            if self.stationary_steps > 5:  # Been stationary for more than 5 steps
+                camping_penalty = -0.2 * (self.stationary_steps - 5)  # Harsh penalty
+                shaping_reward += camping_penalty
+
+            # CRITICAL: Add movement reward to encourage any action
+            if action != 0:  # Any movement (up or down)
+                movement_reward = 0.05  # Small but consistent movement reward
+                shaping_reward += movement_reward
+
+            # Apply timestep penalty + shaping to the base reward
+            reward += timestep_penalty + shaping_reward
+
+        return self.observe(), reward, done
+
+
+class VecPongEnv:
+    """N independent PongEnv games stepped together with NumPy
+
+    Same physics, scripted opponent and reward shaping as PongEnv. Finished games
+    are not reset automatically: call reset(dones) after step() to restart them.
+    """
+
+    def __init__(self, num_envs, seed=None):
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+        n = num_envs
+        self.ball_x = np.zeros(n, dtype=np.int32)
+        self.ball_y = np.zeros(n, dtype=np.int32)
+        self.ball_vx = np.zeros(n, dtype=np.int32)
+        self.ball_vy = np.zeros(n, dtype=np.int32)
+        self.player_y = np.zeros(n, dtype=np.int32)
+        self.ai_y = np.zeros(n, dtype=np.int32)
+        self.last_ai_y = np.zeros(n, dtype=np.int32)
+        self.stationary_steps = np.zeros(n, dtype=np.int32)
+        self.player_score = np.zeros(n, dtype=np.int32)
+        self.ai_score = np.zeros(n, dtype=np.int32)
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Reset all games, or only those where mask is True"""
+        if mask is None:
+            idx = np.arange(self.num_envs)
+        else:
+            idx = np.flatnonzero(mask)
+        k = len(idx)
+        if k:
+            rng = self.rng
+            self.ball_x[idx] = 160
+            self.ball_y[idx] = rng.integers(50, 171, size=k)
+            self.ball_vx[idx] = 2 * rng.choice(np.array([-1, 1]), size=k)
+            self.ball_vy[idx] = rng.choice(np.array([-2, -1, 1, 2]), size=k)
+            self.player_y[idx] = rng.integers(20, 151, size=k)
+            self.ai_y[idx] = rng.integers(20, 151, size=k)
+            self.last_ai_y[idx] = self.ai_y[idx]
+            self.stationary_steps[idx] = 0
+            self.player_score[idx] = 0
+            self.ai_score[idx] = 0
+            self.steps[idx] = 0
+        return self.get_state()
+
+    def get_state(self):
+        # Same tile-based normalization as PongEnv.get_state
+        state = np.empty((self.num_envs, 5), dtype=np.float64)
+        state[:, 0] = (self.ball_x // 8) / 39.0
+        state[:, 1] = (self.ball_y // 8) / 27.0
+        state[:, 2] = (self.ball_vx + 4) / 8.0
+        state[:, 3] = (self.ball_vy + 4) / 8.0
+        state[:, 4] = (self.ai_y // 8) / 27.0
+        return state
+
+    def get_state_codes(self):
+        """int8 state codes (num_envs, 5), see encode_states"""
+        return encode_states(self.ball_x, self.ball_y, self.ball_vx, self.ball_vy, self.ai_y)
+
+    def step(self, actions, opponent_actions=None):
+        """Advance every game one frame
+
+        opponent_actions (0=stay, 1=up, 2=down), when given, drive the left
+        paddle instead of the scripted opponent (AI-vs-AI play); games whose
+        entry is negative keep the scripted opponent.
+        """
+        rng = self.rng
+        n = self.num_envs
+        actions = np.asarray(actions)
+        self.steps += 1
+
+        # AI paddle (right side)
+        up = (actions == 1) & (self.ai_y > 8)
+        down = (actions == 2) & (self.ai_y < 160)
+        self.ai_y[up] -= 3
+        self.ai_y[down] += 3
+
+        # Anti-camping bookkeeping
+        still = self.ai_y == self.last_ai_y
+        self.stationary_steps = np.where(still, self.stationary_steps + 1, 0)
+        self.last_ai_y[:] = self.ai_y
+
+        # Scripted opponent (left side) follows the ball with aim error and missed reactions
+        target = self.ball_y.copy()
+        aim_error = rng.random(n) < OPPONENT_AIM_ERROR_PROB
+        target[aim_error] += rng.integers(-OPPONENT_AIM_ERROR_RANGE, OPPONENT_AIM_ERROR_RANGE + 1,
+                                          size=int(aim_error.sum()))
+        react = rng.random(n) >= OPPONENT_SKIP_PROB
+        centre = self.player_y + 24
+        move_up = react & (target < centre)
+        move_down = react & (target > centre)
+        if opponent_actions is not None:
+            # Games with an opponent action (>= 0) move the left paddle by it instead
+            opponent_actions = np.asarray(opponent_actions)
+            driven = opponent_actions >= 0
+            move_up = np.where(driven, opponent_actions == 1, move_up)
+            move_down = np.where(driven, opponent_actions == 2, move_down)
+        self.player_y = np.where(move_up, np.maximum(8, self.player_y - 3), self.player_y)
+        self.player_y = np.where(move_down, np.minimum(160, self.player_y + 3), self.player_y)
+
+        # Ball movement
+        self.ball_x += self.ball_vx
+        self.ball_y += self.ball_vy
+
+        # Walls at y=16 / y=208 with occasional bounce noise
+        wall = (self.ball_y <= 16) | (self.ball_y >= 208)
+        self.ball_vy[wall] = -self.ball_vy[wall]
+        noisy = wall & (rng.random(n) < BOUNCE_NOISE_PROB)
+        k = int(noisy.sum())
+        if k:
+            nudged = self.ball_vy[noisy] + rng.choice(np.array([-1, 1]), size=k)
+            self.ball_vy[noisy] = np.clip(nudged, -4, 4)
+
+        reward = np.zeros(n, dtype=np.float64)
+
+        # Paddle collisions (player first, matching the scalar if/elif)
+        player_hit = ((self.ball_x <= 24) & (self.ball_vx < 0) &
+                      (self.player_y <= self.ball_y) & (self.ball_y <= self.player_y + 48))
+        ai_hit = (~player_hit & (self.ball_x >= 296) & (self.ball_vx > 0) &
+                  (self.ai_y <= self.ball_y) & (self.ball_y <= self.ai_y + 48))
+        self.ball_vx[player_hit] = -self.ball_vx[player_hit]
+        self.ball_x[player_hit] = 24
+        self.ball_vx[ai_hit] = -self.ball_vx[ai_hit]
+        self.ball_x[ai_hit] = 296
+        reward[ai_hit] = 1.0
+
+        # Scoring
+        ai_scored = self.ball_x <= 0
+        player_scored = ~ai_scored & (self.ball_x >= 320)
+        self.ai_score += ai_scored
+        self.player_score += player_scored
+        reward[ai_scored] = 1.0
+        reward[player_scored] = -1.0
+        done = ai_scored | player_scored
+
+        # Reward shaping (only while the rally continues), same terms as PongEnv
+        ball_distance = np.abs(self.ai_y + 24 - self.ball_y)
+        shaping = np.where(self.ball_vx > 0,
+                           np.maximum(0.0, (50.0 - ball_distance) / 50.0) * 0.5,
+                           -0.02)
+        shaping += np.where((self.ai_y > 50) & (self.ai_y < 150), 0.01, 0.0)
+        shaping += np.where(self.stationary_steps > 5, -0.2 * (self.stationary_steps - 5), 0.0)
+        shaping += np.where(actions != 0, 0.05, 0.0)
+        reward += np.where(done, 0.0, -0.001 + shaping)
+
+        return self.get_state(), reward, done
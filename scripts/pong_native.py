@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Native batched Pong step (optional C extension)
+
+pong_step.c is VecPongEnv.step in C: the same physics, scripted opponent and
+reward shaping, one loop over N games. It is compiled with the system C
+compiler ($CC, default cc) on first use into scripts/__pycache__, keyed by the
+source hash, and loaded with ctypes. Without a compiler make_vec_env() falls
+back to the NumPy VecPongEnv.
+
+NativeVecPongEnv is a drop-in VecPongEnv: the same int32 state arrays (the C
+step updates them in place), reset(mask) and get_state(). Only the random
+streams differ: each game draws opponent and bounce noise from its own
+xorshift64* state, so with the noise probabilities at 0 both backends step
+identically (--check verifies this). opponent_actions (AI-vs-AI play) are
+stepped in C as well.
+
+Every VecPongEnv rollout (evaluator, tournament, the LUT tools, distillation
+sets, fleet actors) is built with make_vec_env, so it uses the native step
+whenever it compiles.
+
+Usage:
+    python pong_native.py --check
+    python pong_native.py --bench --envs 65536 --steps 200
+"""
+
+import argparse
+import ctypes
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import pong_env
+from pong_env import VecPongEnv
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(SCRIPT_DIR, 'pong_step.c')
+CACHE_DIR = os.path.join(SCRIPT_DIR, '__pycache__')
+
+_i32 = np.ctypeslib.ndpointer(dtype=np.int32, flags='C_CONTIGUOUS')
+_lib = None
+
+
+def _compile():
+    """Build pong_step.c into the cache (once per source version) -> library path, or None"""
+    with open(SOURCE, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    path = os.path.join(CACHE_DIR, f'pong_step_{digest}.so')
+    if os.path.exists(path):
+        return path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    cmd = [os.environ.get('CC', 'cc'), '-O3', '-shared', '-fPIC', SOURCE, '-o', tmp]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    os.replace(tmp, path)
+    return path
+
+
+def load_library():
+    """The compiled pong_step library, or None when it cannot be built"""
+    global _lib
+    if _lib is None:
+        path = _compile()
+        if path is None:
+            _lib = False
+        else:
+            lib = ctypes.CDLL(path)
+            lib.pong_step.restype = None
+            lib.pong_step.argtypes = ([ctypes.c_int, _i32, _i32] + [_i32] * 11 +
+                                      [np.ctypeslib.ndpointer(dtype=np.float64, flags='C_CONTIGUOUS'),
+                                       np.ctypeslib.ndpointer(dtype=np.uint8, flags='C_CONTIGUOUS'),
+                                       np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS'),
+                                       ctypes.c_double, ctypes.c_int32, ctypes.c_double, ctypes.c_double])
+            _lib = lib
+    return _lib or None
+
+
+def available():
+    return load_library() is not None
+
+
+class NativeVecPongEnv(VecPongEnv):
+    """VecPongEnv with step() in C (reset and get_state are inherited)"""
+
+    def __init__(self, num_envs, seed=None):
+        self.lib = load_library()
+        if self.lib is None:
+            raise RuntimeError("pong_step.c could not be compiled (set CC or use VecPongEnv)")
+        super().__init__(num_envs, seed=seed)
+        # xorshift64* needs non-zero states
+        self.rng_state = self.rng.integers(1, 2**63, size=num_envs, dtype=np.uint64)
+        self._reward = np.zeros(num_envs, dtype=np.float64)
+        self._done = np.zeros(num_envs, dtype=np.uint8)
+        self._scripted = np.full(num_envs, -1, dtype=np.int32)  # every game keeps the scripted opponent
+
+    def step(self, actions, opponent_actions=None):
+        actions = np.ascontiguousarray(actions, dtype=np.int32)
+        if opponent_actions is None:
+            opponent_actions = self._scripted
+        else:
+            opponent_actions = np.ascontiguousarray(opponent_actions, dtype=np.int32)
+        self.lib.pong_step(self.num_envs, actions, opponent_actions,
+                           self.ball_x, self.ball_y, self.ball_vx, self.ball_vy,
+                           self.player_y, self.ai_y, self.last_ai_y, self.stationary_steps,
+                           self.player_score, self.ai_score, self.steps,
+                           self._reward, self._done, self.rng_state,
+                           pong_env.OPPONENT_AIM_ERROR_PROB, pong_env.OPPONENT_AIM_ERROR_RANGE,
+                           pong_env.OPPONENT_SKIP_PROB, pong_env.BOUNCE_NOISE_PROB)
+        return self.get_state(), self._reward.copy(), self._done.astype(bool)
+
+
+def make_vec_env(num_envs, seed=None, backend='auto'):
+    """VecPongEnv-compatible env: 'native', 'numpy', or 'auto' (native when it compiles)"""
+    if backend == 'native' or (backend == 'auto' and available()):
+        return NativeVecPongEnv(num_envs, seed=seed)
+    return VecPongEnv(num_envs, seed=seed)
+
+
+STATE_FIELDS = ('ball_x', 'ball_y', 'ball_vx', 'ball_vy', 'player_y', 'ai_y', 'last_ai_y',
+                'stationary_steps', 'player_score', 'ai_score', 'steps')
+
+
+def check(num_envs=4096, steps=3000, seed=0):
+    """Step both backends from the same states with noise disabled -> number of mismatching steps"""
+    saved = {name: getattr(pong_env, name) for name in
+             ('OPPONENT_AIM_ERROR_PROB', 'OPPONENT_SKIP_PROB', 'BOUNCE_NOISE_PROB')}
+    for name in saved:
+        setattr(pong_env, name, 0.0)
+    try:
+        reference = VecPongEnv(num_envs, seed=seed)
+        native = NativeVecPongEnv(num_envs, seed=seed)
+        rng = np.random.default_rng(seed + 1)
+        mismatches = 0
+        for t in range(steps):
+            actions = rng.integers(0, 3, size=num_envs)
+            # Every other step drives the left paddle for a random subset of games (-1: scripted)
+            opponent = rng.integers(-1, 3, size=num_envs) if t % 2 else None
+            ref_state, ref_reward, ref_done = reference.step(actions, opponent)
+            nat_state, nat_reward, nat_done = native.step(actions, opponent)
+            same = (np.array_equal(ref_state, nat_state) and np.array_equal(ref_reward, nat_reward) and
+                    np.array_equal(ref_done, nat_done) and
+                    all(np.array_equal(getattr(reference, f), getattr(native, f)) for f in STATE_FIELDS))
+            mismatches += not same
+            reference.reset(ref_done)
+            for f in STATE_FIELDS:
+                getattr(native, f)[:] = getattr(reference, f)
+    finally:
+        for name, value in saved.items():
+            setattr(pong_env, name, value)
+    return mismatches
+
+
+def bench(env, steps, seed=0):
+    """Env steps per second with random actions and auto-reset"""
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, 3, size=(steps, env.num_envs))
+    start = time.perf_counter()
+    for t in range(steps):
+        _, _, done = env.step(actions[t])
+        env.reset(done)
+    return env.num_envs * steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and check the native batched Pong step")
+    parser.add_argument('--check', action='store_true', help="Compare with VecPongEnv (noise off)")
+    parser.add_argument('--bench', action='store_true', help="Steps/s of both backends")
+    parser.add_argument('--envs', type=int, default=65536)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+
+    if not available():
+        print("⚠️  pong_step.c could not be compiled; make_vec_env() will use the NumPy VecPongEnv")
+        return 1
+    print(f"✅ Native step built ({load_library()._name})")
+
+    if args.check:
+        mismatches = check()
+        status = '✅' if mismatches == 0 else '❌'
+        print(f"{status} Native vs NumPy with noise off: {mismatches} mismatching steps")
+        if mismatches:
+            return 1
+    if args.bench:
+        numpy_rate = bench(VecPongEnv(args.envs, seed=0), args.steps)
+        native_rate = bench(NativeVecPongEnv(args.envs, seed=0), args.steps)
+        print(f"⚡ {args.envs:,} envs: NumPy {numpy_rate:,.0f} steps/s, native {native_rate:,.0f} steps/s "
+              f"({native_rate / numpy_rate:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
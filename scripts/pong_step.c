@@ -0,0 +1,141 @@
+/*
+ * Batched Pong step for training (loaded by pong_native.py through ctypes)
+ *
+ * Same physics, scripted opponent and reward shaping as VecPongEnv.step in
+ * pong_env.py, one loop over N games. State arrays are the VecPongEnv int32
+ * arrays, updated in place. Each game has its own xorshift64* stream for the
+ * opponent and bounce noise. opponent_actions (0=stay, 1=up, 2=down) drive
+ * the left paddle for AI-vs-AI play; games whose entry is negative keep the
+ * scripted opponent.
+ */
+
+#include <stdint.h>
+
+static inline uint64_t next_u64(uint64_t *s)
+{
+    uint64_t x = *s;
+    x ^= x >> 12;
+    x ^= x << 25;
+    x ^= x >> 27;
+    *s = x;
+    return x * 0x2545F4914F6CDD1DULL;
+}
+
+static inline double next_double(uint64_t *s)
+{
+    return (next_u64(s) >> 11) * (1.0 / 9007199254740992.0);
+}
+
+void pong_step(int n, const int32_t *actions, const int32_t *opponent_actions,
+               int32_t *ball_x, int32_t *ball_y, int32_t *ball_vx, int32_t *ball_vy,
+               int32_t *player_y, int32_t *ai_y, int32_t *last_ai_y, int32_t *stationary_steps,
+               int32_t *player_score, int32_t *ai_score, int32_t *steps,
+               double *reward, uint8_t *done, uint64_t *rng,
+               double aim_error_prob, int32_t aim_error_range, double skip_prob, double bounce_noise_prob)
+{
+    for (int i = 0; i < n; i++)
+    {
+        uint64_t *s = &rng[i];
+        int32_t action = actions[i];
+        steps[i]++;
+
+        // AI paddle (right side)
+        if (action == 1 && ai_y[i] > 8)
+            ai_y[i] -= 3;
+        else if (action == 2 && ai_y[i] < 160)
+            ai_y[i] += 3;
+
+        // Anti-camping bookkeeping
+        stationary_steps[i] = ai_y[i] == last_ai_y[i] ? stationary_steps[i] + 1 : 0;
+        last_ai_y[i] = ai_y[i];
+
+        // Scripted opponent (left side) follows the ball with aim error and missed reactions
+        int32_t target = ball_y[i];
+        if (next_double(s) < aim_error_prob)
+            target += (int32_t)(next_u64(s) % (uint64_t)(2 * aim_error_range + 1)) - aim_error_range;
+        int32_t move = 0; // -1 up, 1 down
+        if (next_double(s) >= skip_prob)
+        {
+            int32_t centre = player_y[i] + 24;
+            move = target < centre ? -1 : target > centre ? 1 : 0;
+        }
+        // Games with an opponent action (>= 0) move the left paddle by it instead
+        if (opponent_actions[i] >= 0)
+            move = opponent_actions[i] == 1 ? -1 : opponent_actions[i] == 2 ? 1 : 0;
+        if (move < 0)
+            player_y[i] = player_y[i] - 3 > 8 ? player_y[i] - 3 : 8;
+        else if (move > 0)
+            player_y[i] = player_y[i] + 3 < 160 ? player_y[i] + 3 : 160;
+
+        // Ball movement
+        ball_x[i] += ball_vx[i];
+        ball_y[i] += ball_vy[i];
+
+        // Walls at y=16 / y=208 with occasional bounce noise
+        if (ball_y[i] <= 16 || ball_y[i] >= 208)
+        {
+            ball_vy[i] = -ball_vy[i];
+            if (next_double(s) < bounce_noise_prob)
+            {
+                int32_t vy = ball_vy[i] + ((next_u64(s) >> 63) ? 1 : -1);
+                ball_vy[i] = vy < -4 ? -4 : vy > 4 ? 4 : vy;
+            }
+        }
+
+        double r = 0.0;
+
+        // Paddle collisions (player first, matching the scalar if/elif)
+        if (ball_x[i] <= 24 && ball_vx[i] < 0 && player_y[i] <= ball_y[i] && ball_y[i] <= player_y[i] + 48)
+        {
+            ball_vx[i] = -ball_vx[i];
+            ball_x[i] = 24;
+        }
+        else if (ball_x[i] >= 296 && ball_vx[i] > 0 && ai_y[i] <= ball_y[i] && ball_y[i] <= ai_y[i] + 48)
+        {
+            ball_vx[i] = -ball_vx[i];
+            ball_x[i] = 296;
+            r = 1.0;
+        }
+
+        // Scoring
+        uint8_t finished = 1;
+        if (ball_x[i] <= 0)
+        {
+            ai_score[i]++;
+            r = 1.0;
+        }
+        else if (ball_x[i] >= 320)
+        {
+            player_score[i]++;
+            r = -1.0;
+        }
+        else
+        {
+            finished = 0;
+        }
+
+        // Reward shaping (only while the rally continues), same terms and order as VecPongEnv
+        if (!finished)
+        {
+            int32_t distance = ai_y[i] + 24 - ball_y[i];
+            if (distance < 0)
+                distance = -distance;
+            double shaping;
+            if (ball_vx[i] > 0)
+            {
+                double proximity = (50.0 - distance) / 50.0;
+                shaping = (proximity > 0.0 ? proximity : 0.0) * 0.5;
+            }
+            else
+            {
+                shaping = -0.02;
+            }
+            shaping += (ai_y[i] > 50 && ai_y[i] < 150) ? 0.01 : 0.0;
+            shaping += stationary_steps[i] > 5 ? -0.2 * (stationary_steps[i] - 5) : 0.0;
+            shaping += action != 0 ? 0.05 : 0.0;
+            r += -0.001 + shaping;
+        }
+        reward[i] = r;
+        done[i] = finished;
+    }
+}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Quantization-aware training layers for the Genesis Pong network
+
+The ROM runs the 5->8->3 network in fixed point: inputs are 8px tiles scaled
+to x1024 integers, weights are int(w * 1024) and every product is shifted
+>>10. A float-trained model only meets that path when its LUT is built, so
+the shipped policy can differ from the trained one.
+
+These layers run the integer path in the forward pass (values stay in float
+units, i.e. integer / 1024) and pass gradients straight through every
+rounding step (straight-through estimator):
+- TileQuantize: inputs snapped to the x1024 grid, like (tile * 1024) // div
+- FixedPointDense: weights and biases truncated like quantize_weights(),
+  each input*weight product floored like >>10, optional ReLU. The sums are
+  not clamped, like build_lut (the table pong_ai_lookup reads); clamp_s16=True
+  saturates them to s16 instead, closer to pong_ai_NN's s16 hidden sums
+
+The layers keep Dense's kernel/bias variables, so saved models still read
+with keras_weights.load_weights and go through the usual LUT pipeline.
+Importing this module registers the layers, which keras.models.load_model
+needs for QAT files.
+
+Imports TensorFlow at module level, like dqn_agent.py.
+
+Usage:
+    python qat.py ../models/pong_ai_model.h5      # LUT agreement of the float and fixed-point forward passes
+
+It also clones, saves and reloads the fixed-point model the way training
+checkpoints do and fails if the weights or actions change on the way.
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from lut_builder import FULL_LAYOUT, SCALE_FACTOR, build_lut, quantize_weights
+from keras_weights import load_weights
+
+S16_MIN, S16_MAX = -32768, 32767
+
+
+def straight_through(x, quantized):
+    """quantized in the forward pass, identity gradient to x"""
+    return x + tf.stop_gradient(quantized - x)
+
+
+def truncate_x1024(x):
+    """int(x * 1024) / 1024, rounding toward zero like quantize_weights"""
+    scaled = x * SCALE_FACTOR
+    return tf.sign(scaled) * tf.floor(tf.abs(scaled)) / SCALE_FACTOR
+
+
+@keras.saving.register_keras_serializable(package='pong')
+class TileQuantize(keras.layers.Layer):
+    """Snap normalized inputs to the x1024 integer grid (floor, like the C integer division)"""
+
+    def call(self, inputs):
+        # The epsilon keeps exact grid points (e.g. 27/27) from flooring one step low
+        return straight_through(inputs, tf.floor(inputs * SCALE_FACTOR + 1e-4) / SCALE_FACTOR)
+
+
+@keras.saving.register_keras_serializable(package='pong')
+class FixedPointDense(keras.layers.Layer):
+    """Dense layer evaluated like the LUT builder: truncated x1024 weights, per-product >>10"""
+
+    def __init__(self, units, relu=False, clamp_s16=False, **kwargs):
+        super().__init__(**kwargs)
+        self.units = units
+        self.relu = relu
+        self.clamp_s16 = clamp_s16
+
+    def build(self, input_shape):
+        self.kernel = self.add_weight(name='kernel', shape=(int(input_shape[-1]), self.units),
+                                      initializer='glorot_uniform')
+        self.bias = self.add_weight(name='bias', shape=(self.units,), initializer='zeros')
+
+    def call(self, inputs):
+        kernel = straight_through(self.kernel, truncate_x1024(self.kernel))
+        bias = straight_through(self.bias, truncate_x1024(self.bias))
+        # (inputs[i] * weights[i][h]) >> 10 for every term, in float units; both factors are
+        # multiples of 1/1024, so the product is exact and the floor is the arithmetic shift
+        products = inputs[:, :, None] * kernel[None, :, :]
+        products = straight_through(products, tf.floor(products * SCALE_FACTOR) / SCALE_FACTOR)
+        outputs = tf.reduce_sum(products, axis=1) + bias
+        if self.relu:
+            outputs = tf.nn.relu(outputs)
+        if self.clamp_s16:
+            outputs = tf.clip_by_value(outputs, S16_MIN / SCALE_FACTOR, S16_MAX / SCALE_FACTOR)
+        return outputs
+
+    def get_config(self):
+        config = super().get_config()
+        config.update(units=self.units, relu=self.relu, clamp_s16=self.clamp_s16)
+        return config
+
+
+def build_qat_model(state_size=5, hidden_size=8, action_size=3):
+    """5 -> 8 (relu) -> 3 network with the fixed-point forward pass of build_lut"""
+    return keras.Sequential([
+        keras.layers.Input(shape=(state_size,)),
+        TileQuantize(),
+        FixedPointDense(hidden_size, relu=True),
+        FixedPointDense(action_size),
+    ])
+
+
+def grid_states(layout=FULL_LAYOUT):
+    """Float network inputs (PongEnv.get_state normalization) for every cell of the layout"""
+    axes = np.meshgrid(layout.bx_tiles / layout.bx_div, layout.by_tiles / layout.by_div,
+                       (layout.vx_values + 4) / 8.0, (layout.vy_values + 4) / 8.0,
+                       layout.ay_tiles / layout.ay_div, indexing='ij')
+    return np.stack([a.ravel() for a in axes], axis=1).astype(np.float32)
+
+
+def lut_agreement(model, layout=FULL_LAYOUT, batch_size=65536):
+    """Share of LUT cells where the model's greedy action equals the LUT built from its weights"""
+    lut = build_lut(quantize_weights(model.get_weights()), layout).ravel()
+    states = grid_states(layout)
+    actions = np.concatenate([np.argmax(model(states[i:i + batch_size], training=False).numpy(), axis=1)
+                              for i in range(0, len(states), batch_size)])
+    return float(np.mean(actions == lut))
+
+
+def check_round_trip(model, layout=FULL_LAYOUT):
+    """Clone and .h5-save the model like CheckpointManager, read it back -> list of problems (empty if none)"""
+    clone = keras.models.clone_model(model)
+    clone.set_weights(model.get_weights())
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'qat_check.h5')
+        clone.save(path)
+        saved = load_weights(path)
+        reloaded = keras.models.load_model(path, compile=False)
+    expected = model.get_weights()
+    if len(saved) != len(expected) or any(not np.array_equal(a, b) for a, b in zip(saved, expected)):
+        problems.append("keras_weights.load_weights does not return the model's weights")
+    states = grid_states(layout)[::97]
+    if not np.array_equal(np.argmax(model(states).numpy(), axis=1), np.argmax(reloaded(states).numpy(), axis=1)):
+        problems.append("the reloaded model picks different actions")
+    return problems
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        return 1
+    weights = load_weights(sys.argv[1])
+    float_model = keras.Sequential([keras.layers.Input(shape=(5,)), keras.layers.Dense(8, activation='relu'),
+                                    keras.layers.Dense(3)])
+    float_model.set_weights(weights)
+    qat_model = build_qat_model()
+    qat_model.set_weights(weights)
+    qat_agreement = lut_agreement(qat_model)
+    print(f"📐 {sys.argv[1]}: LUT agreement {lut_agreement(float_model) * 100:.2f}% (float forward), "
+          f"{qat_agreement * 100:.2f}% (fixed-point forward)")
+    problems = check_round_trip(qat_model)
+    for problem in problems:
+        print(f"❌ Checkpoint round trip: {problem}")
+    if not problems:
+        print("✅ Checkpoint round trip: clone, .h5 save, keras_weights read-back and load_model all match")
+    return 0 if qat_agreement == 1.0 and not problems else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Experience replay for the Pong DQN (kept free of TensorFlow imports)
+
+ReplayBuffer is a fixed-capacity NumPy ring buffer. It samples whole batches
+with one fancy-index per field, and it can be saved as one .npy file per field.
+When loaded back with mmap=True the files are memory-mapped copy-on-write:
+pages are read lazily and new transitions never modify the saved checkpoint.
+
+States are stored as pong_env int8 state codes (5 bytes instead of 20 for
+float32 inputs), so a transition takes 16 bytes. sample() normalizes the
+batch to float32 network inputs with pong_env.decode_states. Buffers saved
+with float states are converted to codes on load.
+
+sample(mirror=True) appends the vertical mirror of every sampled transition
+(pong_env.mirror_codes, UP and DOWN swapped), computed on the batch rather
+than stored, so each sample carries twice the transitions.
+
+sample(n_step=n) turns each sampled transition into an n-step one: the
+discounted rewards of up to n consecutive transitions, the next state after
+the last of them, and gamma ** steps to bootstrap with. A chain stops early
+at a terminal transition, at the newest transition, or where the next stored
+state is not the previous next_state (an episode cut off without done).
+All samples advance together, one vectorized step per n.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from pong_env import MIRRORED_ACTIONS, codes_from_states, decode_states, mirror_codes
+
+FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+
+class ReplayBuffer:
+    def __init__(self, capacity, state_size=5, seed=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.states = np.zeros((capacity, state_size), dtype=np.int8)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.int8)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.size = 0
+        self.pos = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition; state and next_state are state codes (PongEnv.get_state_code)"""
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store transitions in order with one write per field (only the newest capacity are kept)"""
+        n = min(len(actions), self.capacity)
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states[-n:]
+        self.actions[idx] = actions[-n:]
+        self.rewards[idx] = rewards[-n:]
+        self.next_states[idx] = next_states[-n:]
+        self.dones[idx] = dones[-n:]
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size, mirror=False, n_step=1, gamma=0.95):
+        """Uniform sample without replacement -> (states, actions, rewards, next_states, dones, discounts)
+
+        States are float32. rewards are n-step discounted returns and discounts gamma ** steps,
+        the factor for the bootstrapped value of next_states. With mirror=True the batch is
+        followed by its vertical mirror (2 * batch_size transitions).
+        """
+        idx = self.rng.choice(self.size, size=batch_size, replace=False)
+        if n_step > 1:
+            rewards, last, dones, steps = self._n_step(idx, n_step, gamma)
+            discounts = (gamma ** steps).astype(np.float32)
+        else:
+            rewards, last, dones = self.rewards[idx], idx, self.dones[idx]
+            discounts = np.full(batch_size, gamma, dtype=np.float32)
+        states, actions, next_states = self.states[idx], self.actions[idx], self.next_states[last]
+        if mirror:
+            states = np.concatenate([states, mirror_codes(states)])
+            next_states = np.concatenate([next_states, mirror_codes(next_states)])
+            actions = np.concatenate([actions, MIRRORED_ACTIONS[actions]])
+            rewards, dones, discounts = np.tile(rewards, 2), np.tile(dones, 2), np.tile(discounts, 2)
+        return (decode_states(states), actions.astype(np.int64), rewards, decode_states(next_states), dones,
+                discounts)
+
+    def _n_step(self, idx, n_step, gamma):
+        """n-step returns from idx -> (rewards, index of the last transition, dones, steps)"""
+        rewards = self.rewards[idx].astype(np.float32)
+        last = np.array(idx)
+        dones = self.dones[idx].copy()
+        steps = np.ones(len(idx), dtype=np.int64)
+        active = ~dones
+        newest = (self.pos - 1) % self.capacity
+        for j in range(1, n_step):
+            following = (last + 1) % self.capacity
+            active &= (last != newest) & (self.states[following] == self.next_states[last]).all(axis=1)
+            if not active.any():
+                break
+            rewards += np.where(active, np.float32(gamma ** j) * self.rewards[following], np.float32(0))
+            last = np.where(active, following, last)
+            steps += active
+            dones |= active & self.dones[following]
+            active &= ~self.dones[following]
+        return rewards, last, dones, steps
+
+    def copy(self):
+        """Independent in-memory copy (also materializes a memory-mapped buffer)"""
+        buffer = self.__class__.__new__(self.__class__)
+        buffer.capacity = self.capacity
+        buffer.state_size = self.state_size
+        buffer.size = self.size
+        buffer.pos = self.pos
+        buffer.rng = np.random.default_rng()
+        buffer.rng.bit_generator.state = self.rng.bit_generator.state
+        for field in FIELDS:
+            setattr(buffer, field, np.array(getattr(self, field)))
+        return buffer
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for field in FIELDS:
+            np.save(os.path.join(directory, f'replay_{field}.npy'), getattr(self, field))
+        meta = {
+            'capacity': self.capacity,
+            'state_size': self.state_size,
+            'size': self.size,
+            'pos': self.pos,
+            'rng': self.rng.bit_generator.state,
+        }
+        with open(os.path.join(directory, 'replay_meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        with open(os.path.join(directory, 'replay_meta.json')) as f:
+            meta = json.load(f)
+        buffer = cls.__new__(cls)
+        buffer.capacity = meta['capacity']
+        buffer.state_size = meta['state_size']
+        buffer.size = meta['size']
+        buffer.pos = meta['pos']
+        buffer.rng = np.random.default_rng()
+        buffer.rng.bit_generator.state = meta['rng']
+        for field in FIELDS:
+            path = os.path.join(directory, f'replay_{field}.npy')
+            data = np.load(path, mmap_mode='c' if mmap else None)
+            if field in ('states', 'next_states') and data.dtype.kind == 'f':
+                data = codes_from_states(data)
+            setattr(buffer, field, data)
+        return buffer
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Compact episode replay recorder for Genesis Pong training
+
+Records an episode as per-frame state deltas instead of rendered video:
+- Header holds the absolute starting state (ball, both paddles) plus episode metadata
+- Each frame is 5 bytes: action byte + ball dx/dy + player dy + ai dy (all s8)
+- Frames where the ball velocity changes (wall/paddle bounce) carry 2 extra bytes (dvx, dvy)
+- A typical 1000-frame episode is ~5 KB, versus hundreds of KB for an .mp4
+
+Files are written on a background thread (temp file + rename) so the training
+loop never pays any encode or disk cost.
+
+File layout (little-endian, version 1):
+    magic       4s   b'PGRP'
+    version     u8
+    flags       u8   (reserved, 0)
+    header_size u16
+    n_frames    u32
+    ball_x      s16
+    ball_y      s16
+    ball_vx     s8
+    ball_vy     s8
+    player_y    s16
+    ai_y        s16
+    episode     u32
+    reward      f32
+    frames...   n_frames x (u8 action|flags, s8 dbx, s8 dby, s8 dpy, s8 day[, s8 dvx, s8 dvy])
+
+Usage:
+    python replay_recorder.py ../models/best_replays/<file>.pgr   # print a summary
+"""
+
+import os
+import queue
+import struct
+import sys
+import threading
+
+REPLAY_MAGIC = b'PGRP'
+REPLAY_VERSION = 1
+REPLAY_EXT = '.pgr'
+
+HEADER_STRUCT = struct.Struct('<4sBBHIhhbbhhIf')
+
+FRAME_ACTION_MASK = 0x03
+FRAME_VEL_CHANGED = 0x80
+
+
+def _s8(value):
+    if value < -128 or value > 127:
+        raise ValueError(f"Replay delta {value} does not fit in s8")
+    return value & 0xFF
+
+
+def _from_s8(byte):
+    return byte - 256 if byte > 127 else byte
+
+
+class EpisodeRecorder:
+    """Accumulates one episode as delta-encoded frames (a few bytes per step)"""
+
+    def __init__(self):
+        self.frames = bytearray()
+        self.n_frames = 0
+        self.episode = 0
+        self.start_state = None
+        self.last = None
+
+    def start(self, env, episode=0):
+        state = (int(env.ball_x), int(env.ball_y), int(env.ball_vx), int(env.ball_vy),
+                 int(env.player_y), int(env.ai_y))
+        self.frames = bytearray()
+        self.n_frames = 0
+        self.episode = episode
+        self.start_state = state
+        self.last = state
+
+    def record(self, env, action):
+        bx, by, bvx, bvy = int(env.ball_x), int(env.ball_y), int(env.ball_vx), int(env.ball_vy)
+        py, ay = int(env.player_y), int(env.ai_y)
+        lbx, lby, lbvx, lbvy, lpy, lay = self.last
+
+        head = int(action) & FRAME_ACTION_MASK
+        vel_changed = bvx != lbvx or bvy != lbvy
+        if vel_changed:
+            head |= FRAME_VEL_CHANGED
+        self.frames.append(head)
+        self.frames.append(_s8(bx - lbx))
+        self.frames.append(_s8(by - lby))
+        self.frames.append(_s8(py - lpy))
+        self.frames.append(_s8(ay - lay))
+        if vel_changed:
+            self.frames.append(_s8(bvx - lbvx))
+            self.frames.append(_s8(bvy - lbvy))
+
+        self.last = (bx, by, bvx, bvy, py, ay)
+        self.n_frames += 1
+
+    def finish(self, reward=0.0):
+        """Return the encoded replay as bytes"""
+        bx, by, bvx, bvy, py, ay = self.start_state
+        header = HEADER_STRUCT.pack(REPLAY_MAGIC, REPLAY_VERSION, 0, HEADER_STRUCT.size,
+                                    self.n_frames, bx, by, bvx, bvy, py, ay,
+                                    self.episode & 0xFFFFFFFF, float(reward))
+        return header + bytes(self.frames)
+
+
+def decode_replay(data):
+    """Decode replay bytes into (metadata dict, list of absolute frame states)
+
+    Each frame is a tuple (ball_x, ball_y, ball_vx, ball_vy, player_y, ai_y, action).
+    The first entry is the starting state with action None.
+    """
+    (magic, version, flags, header_size, n_frames, bx, by, bvx, bvy, py, ay,
+     episode, reward) = HEADER_STRUCT.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC:
+        raise ValueError("Not a Pong replay file (bad magic)")
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {version} (expected {REPLAY_VERSION})")
+
+    frames = [(bx, by, bvx, bvy, py, ay, None)]
+    pos = header_size
+    for _ in range(n_frames):
+        head = data[pos]
+        bx += _from_s8(data[pos + 1])
+        by += _from_s8(data[pos + 2])
+        py += _from_s8(data[pos + 3])
+        ay += _from_s8(data[pos + 4])
+        pos += 5
+        if head & FRAME_VEL_CHANGED:
+            bvx += _from_s8(data[pos])
+            bvy += _from_s8(data[pos + 1])
+            pos += 2
+        frames.append((bx, by, bvx, bvy, py, ay, head & FRAME_ACTION_MASK))
+
+    meta = {
+        'version': version,
+        'flags': flags,
+        'frames': n_frames,
+        'episode': episode,
+        'reward': reward,
+    }
+    return meta, frames
+
+
+def read_replay(path):
+    with open(path, 'rb') as f:
+        return decode_replay(f.read())
+
+
+class AsyncReplayWriter:
+    """Writes encoded replays on a daemon thread via temp-file-then-rename"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='replay-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, filename, data):
+        path = os.path.join(self.out_dir, filename)
+        self._queue.put((path, data))
+        return path
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, data = item
+            tmp_path = path + '.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"[Replay] Error writing {path}: {e}", flush=True)
+
+    def close(self, timeout=10.0):
+        """Flush pending replays and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: python {sys.argv[0]} <replay{REPLAY_EXT}>")
+        sys.exit(1)
+    meta, frames = read_replay(sys.argv[1])
+    size = os.path.getsize(sys.argv[1])
+    print(f"🎬 Replay v{meta['version']}: episode {meta['episode']}, reward {meta['reward']:.2f}")
+    print(f"   Frames: {meta['frames']} | File size: {size} bytes ({size / max(1, meta['frames']):.2f} bytes/frame)")
+    bx, by, bvx, bvy, py, ay, _ = frames[-1]
+    print(f"   Final state: ball=({bx},{by}) v=({bvx},{bvy}) player_y={py} ai_y={ay}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Teacher policy for imitation pretraining: a NumPy port of pong_ai_predict (ai.c)
+
+pong_ai_predict projects the ball to the paddle line and reflects it off the
+walls in a while loop. Here the reflection is closed form (fold modulo 448),
+so millions of states are labeled in one vectorized call; the scalar port
+keeps the original loop as the reference.
+
+The dataset is collected on-policy: VecPongEnv games driven by the teacher
+(with some random actions for coverage), each state labeled with the teacher
+action and normalized exactly like PongEnv.get_state.
+
+Usage:
+    python teacher_policy.py --samples 2000000 --out ../models/teacher_dataset.npz
+    python teacher_policy.py --check
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from pong_native import make_vec_env
+
+PADDLE_LINE_X = 290   # pong_ai_predict projects the ball to x=290
+FIELD_HEIGHT = 224    # reflection bounds used by pong_ai_predict (0..224)
+DEAD_ZONE = 8
+ACTION_STAY, ACTION_UP, ACTION_DOWN = 0, 1, 2
+
+
+def predict_future_y_scalar(ball_x, ball_y, ball_vx, ball_vy):
+    """Line-by-line port of the ball_future_y computation in pong_ai_predict, including the bounce loop"""
+    ball_future_y = ball_y
+    if ball_vx > 0:
+        time_to_paddle = int((PADDLE_LINE_X - ball_x) / ball_vx)  # C division truncates toward zero
+        ball_future_y = ball_y + ball_vy * time_to_paddle
+        while ball_future_y < 0 or ball_future_y > FIELD_HEIGHT:
+            if ball_future_y < 0:
+                ball_future_y = -ball_future_y
+            if ball_future_y > FIELD_HEIGHT:
+                ball_future_y = FIELD_HEIGHT - (ball_future_y - FIELD_HEIGHT)
+    return ball_future_y
+
+
+def pong_ai_predict_scalar(ball_x, ball_y, ball_vx, ball_vy, ai_y):
+    """Line-by-line port of pong_ai_predict"""
+    diff = predict_future_y_scalar(ball_x, ball_y, ball_vx, ball_vy) - (ai_y + 24)
+    if diff < -DEAD_ZONE:
+        return ACTION_UP
+    if diff > DEAD_ZONE:
+        return ACTION_DOWN
+    return ACTION_STAY
+
+
+def time_to_paddle(ball_x, ball_vx):
+    """(290 - ball_x) / ball_vx with C truncation, for ball_vx > 0"""
+    distance = PADDLE_LINE_X - np.asarray(ball_x, dtype=np.int64)
+    return np.sign(distance) * (np.abs(distance) // np.asarray(ball_vx, dtype=np.int64))
+
+
+def reflect_y(projected):
+    """Closed form of the wall-bounce loop: reflecting between 0 and 224 is periodic in 448"""
+    folded = np.mod(projected, 2 * FIELD_HEIGHT)
+    return np.where(folded > FIELD_HEIGHT, 2 * FIELD_HEIGHT - folded, folded)
+
+
+def predict_future_y(ball_x, ball_y, ball_vx, ball_vy):
+    """ball_future_y of pong_ai_predict for arrays of pixel states (int64)"""
+    ball_x = np.asarray(ball_x, dtype=np.int64)
+    ball_y = np.asarray(ball_y, dtype=np.int64)
+    ball_vx = np.asarray(ball_vx, dtype=np.int64)
+    ball_vy = np.asarray(ball_vy, dtype=np.int64)
+    toward = ball_vx > 0
+    projected = ball_y + ball_vy * time_to_paddle(ball_x, np.where(toward, ball_vx, 1))
+    return np.where(toward, reflect_y(projected), ball_y)
+
+
+def teacher_actions(ball_x, ball_y, ball_vx, ball_vy, ai_y):
+    """pong_ai_predict for arrays of pixel states -> uint8 actions (0=stay, 1=up, 2=down)"""
+    diff = predict_future_y(ball_x, ball_y, ball_vx, ball_vy) - (np.asarray(ai_y, dtype=np.int64) + 24)
+    return np.where(diff < -DEAD_ZONE, ACTION_UP,
+                    np.where(diff > DEAD_ZONE, ACTION_DOWN, ACTION_STAY)).astype(np.uint8)
+
+
+def generate_dataset(num_samples, num_envs=4096, random_action_prob=0.2, seed=0):
+    """Teacher-labeled states from teacher-driven VecPongEnv games -> (states float32 (N, 5), actions uint8)"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    steps = -(-num_samples // num_envs)
+    states = np.empty((steps * num_envs, 5), dtype=np.float32)
+    actions = np.empty(steps * num_envs, dtype=np.uint8)
+    for step in range(steps):
+        labels = teacher_actions(env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        block = slice(step * num_envs, (step + 1) * num_envs)
+        states[block] = env.get_state()
+        actions[block] = labels
+        explore = rng.random(num_envs) < random_action_prob
+        played = np.where(explore, rng.integers(0, 3, num_envs), labels)
+        _, _, dones = env.step(played)
+        env.reset(dones)
+    return states[:num_samples], actions[:num_samples]
+
+
+def check_against_scalar(num_samples=200000, seed=0):
+    """Compare the vectorized port with the loop port on random in-range states; returns mismatches"""
+    rng = np.random.default_rng(seed)
+    bx = rng.integers(0, 320, num_samples)
+    by = rng.integers(0, 224, num_samples)
+    vx = rng.integers(-4, 5, num_samples)
+    vy = rng.integers(-4, 5, num_samples)
+    ay = rng.integers(0, 176, num_samples)
+    fast = teacher_actions(bx, by, vx, vy, ay)
+    slow = np.array([pong_ai_predict_scalar(*map(int, s)) for s in zip(bx, by, vx, vy, ay)])
+    return int(np.count_nonzero(fast != slow))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pong_ai_predict teacher dataset generator")
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--random-action-prob', type=float, default=0.2,
+                        help="Chance of a random action while collecting states (default: 0.2)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Save the dataset as .npz (states, actions)")
+    parser.add_argument('--check', action='store_true', help="Verify the vectorized port against the scalar loop")
+    args = parser.parse_args()
+
+    if args.check:
+        mismatches = check_against_scalar(seed=args.seed)
+        print(f"{'✅' if mismatches == 0 else '❌'} vectorized vs scalar pong_ai_predict: {mismatches} mismatches")
+        return 0 if mismatches == 0 else 1
+
+    start = time.time()
+    states, actions = generate_dataset(args.samples, random_action_prob=args.random_action_prob, seed=args.seed)
+    counts = np.bincount(actions, minlength=3)
+    print(f"🎓 {len(actions):,} teacher-labeled states in {time.time() - start:.1f}s "
+          f"(stay {counts[0]:,}, up {counts[1]:,}, down {counts[2]:,})")
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        np.savez_compressed(args.out, states=states, actions=actions)
+        print(f"💾 Saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Round-robin AI-vs-AI tournament with Elo ratings for Genesis Pong
+
+Every policy (Keras model or LUT binary) plays every other one in VecPongEnv,
+one on each paddle. The left paddle sees the mirrored state described at the
+bottom of ai.c (SCREEN_WIDTH - ball.x, -ball.dx, its own y), so both sides use
+their table exactly as the right paddle would. Models play through their full
+layout LUT (the integer network the ROM runs), LUT files through their own
+layout with pong_ai_lookup's centering fallback. Each pairing is played on
+both sides for the same number of frames, in batches of parallel games, and
+the pairings are spread over a process pool.
+
+Results are cached per pairing, keyed by content hashes of both policies (the
+quantized weights of a model, the bytes of a LUT) and the match settings, so a
+re-run only plays the pairings of new or changed policies. Files with the
+same content are merged into one entry.
+
+Ratings are a Bradley-Terry fit of the points won (Elo scale, mean 1500) with
+bootstrap confidence intervals.
+
+Usage:
+    python tournament.py                                  # models/*.h5, models/saved/*.h5, pong/res/ai_lut*.bin
+    python tournament.py --policy ../models/new.h5 --policy ../pong/res/ai_lut.bin --report standings.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from pong_native import make_vec_env
+from lut_builder import LAYOUTS, FULL_LAYOUT, build_luts, lut_from_bytes, quantize_weights
+from lut_budget import fallback_actions
+from lut_visitation import redraw_serve_speed
+from keras_weights import load_weights
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(SCRIPT_DIR, '..')
+DEFAULT_POLICIES = [os.path.join(ROOT_DIR, 'models', '*.h5'), os.path.join(ROOT_DIR, 'models', 'saved', '*.h5'),
+                    os.path.join(ROOT_DIR, 'pong', 'res', 'ai_lut*.bin')]
+DEFAULT_CACHE = os.path.join(ROOT_DIR, 'models', 'tournament', 'results.json')
+SCREEN_WIDTH = 320
+MODEL_EXTENSIONS = ('.h5', '.keras')
+
+
+def lut_layout_for(path):
+    """LUT layout of a .bin from its size"""
+    size = os.path.getsize(path)
+    for layout in LAYOUTS.values():
+        if layout.num_bytes == size:
+            return layout
+    raise ValueError(f"{path}: {size} bytes matches no LUT layout")
+
+
+def discover_policies(patterns):
+    """Policy files matched by patterns (models and LUT binaries), sorted and unique"""
+    paths, seen = [], set()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            real = os.path.realpath(path)
+            if real not in seen and path.endswith(MODEL_EXTENSIONS + ('.bin',)):
+                seen.add(real)
+                paths.append(path)
+    return paths
+
+
+def load_policies(paths):
+    """{key: {'names', 'layout', 'qweights' | 'data'}} with files of identical content merged"""
+    policies = {}
+    for path in paths:
+        name = os.path.basename(path)
+        if path.endswith(MODEL_EXTENSIONS):
+            qweights = quantize_weights(load_weights(path))
+            digest = hashlib.sha1(b''.join(np.asarray(w, dtype=np.int64).tobytes() for w in qweights))
+            entry = {'layout': FULL_LAYOUT.name, 'qweights': qweights}
+        else:
+            layout = lut_layout_for(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha1(layout.name.encode() + data)
+            entry = {'layout': layout.name, 'data': data}
+        key = digest.hexdigest()[:16]
+        policies.setdefault(key, entry).setdefault('names', []).append(name)
+    return policies
+
+
+def build_policy_luts(policies, keys):
+    """{key: (lut, layout name)} for the given policies; all model LUTs are built in one batched pass"""
+    luts = {}
+    models = [k for k in keys if 'qweights' in policies[k]]
+    if models:
+        for key, lut in zip(models, build_luts([policies[k]['qweights'] for k in models], FULL_LAYOUT)):
+            luts[key] = (lut, FULL_LAYOUT.name)
+    for key in keys:
+        if 'data' in policies[key]:
+            layout = LAYOUTS[policies[key]['layout']]
+            luts[key] = (lut_from_bytes(policies[key]['data'], layout), layout.name)
+    return luts
+
+
+def policy_actions(lut, layout, ball_x, ball_y, ball_vx, ball_vy, paddle_y):
+    """pong_ai_lookup on a batch of states: the table where the layout covers them, centering otherwise"""
+    index, active = layout.cell_indices(ball_x, ball_y, ball_vx, ball_vy, paddle_y)
+    return np.where(active, lut.ravel()[index], fallback_actions(paddle_y))
+
+
+def play_match(right, left, num_envs, frames, seed, serve_speeds=(2, 3, 4)):
+    """Points scored by the right and left policies, each a (lut, layout name) pair"""
+    env = make_vec_env(num_envs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    redraw_serve_speed(env, np.ones(num_envs, dtype=bool), serve_speeds, rng)
+    (right_lut, right_layout), (left_lut, left_layout) = right, left
+    right_layout, left_layout = LAYOUTS[right_layout], LAYOUTS[left_layout]
+    right_points = left_points = 0
+    for _ in range(frames):
+        actions = policy_actions(right_lut, right_layout, env.ball_x, env.ball_y, env.ball_vx, env.ball_vy, env.ai_y)
+        # ai.c notes: the left paddle looks up the mirrored state
+        opponent = policy_actions(left_lut, left_layout, SCREEN_WIDTH - env.ball_x, env.ball_y, -env.ball_vx,
+                                  env.ball_vy, env.player_y)
+        _, _, dones = env.step(actions, opponent)
+        right_points += int((dones & (env.ball_x <= 0)).sum())
+        left_points += int((dones & (env.ball_x > 0)).sum())
+        env.reset(dones)
+        redraw_serve_speed(env, dones, serve_speeds, rng)
+    return right_points, left_points
+
+
+def pairing_seed(key_a, key_b, seed):
+    return (int(hashlib.sha1(f"{key_a}|{key_b}".encode()).hexdigest()[:8], 16) + seed) % 2**31
+
+
+_shared = {}
+
+
+def _init_worker(luts):
+    _shared['luts'] = luts
+
+
+def _play_pairing(args):
+    """Both sides of one pairing -> (key_a, key_b, points of a, points of b)"""
+    key_a, key_b, num_envs, frames, seed = args
+    luts = _shared['luts']
+    pseed = pairing_seed(key_a, key_b, seed)
+    a_right, b_left = play_match(luts[key_a], luts[key_b], num_envs // 2, frames, pseed)
+    b_right, a_left = play_match(luts[key_b], luts[key_a], num_envs // 2, frames, pseed + 1)
+    return key_a, key_b, a_right + a_left, b_right + b_left
+
+
+def load_cache(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'results': {}}
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+
+def cache_key(key_a, key_b, settings):
+    return f"{key_a}|{key_b}|{settings}"
+
+
+def fit_elo(wins, iterations=2000, prior=0.5):
+    """Bradley-Terry ratings on the Elo scale (mean 1500) from a (K, K) matrix of points i won against j
+
+    prior points are added to both sides of every pairing that was played, so
+    a policy that never lost still gets a finite rating.
+    """
+    wins = np.asarray(wins, dtype=np.float64)
+    games = wins + wins.T
+    wins = wins + prior * (games > 0)
+    games = wins + wins.T
+    strength = np.ones(len(wins))
+    total = wins.sum(axis=1)
+    for _ in range(iterations):
+        denom = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        updated = np.where(denom > 0, total / np.maximum(denom, 1e-12), strength)
+        updated /= np.exp(np.log(updated).mean())
+        if np.allclose(updated, strength, rtol=1e-10):
+            strength = updated
+            break
+        strength = updated
+    return 1500 + 400 * np.log10(strength)
+
+
+def elo_intervals(wins, samples=200, seed=0):
+    """95% bootstrap intervals (low, high) per policy, resampling each pairing's points"""
+    rng = np.random.default_rng(seed)
+    wins = np.asarray(wins, dtype=np.int64)
+    games = wins + wins.T
+    upper = np.triu(games > 0, 1)
+    ratings = []
+    for _ in range(samples):
+        sample = np.zeros_like(wins)
+        i, j = np.nonzero(upper)
+        won = rng.binomial(games[i, j], wins[i, j] / games[i, j])
+        sample[i, j] = won
+        sample[j, i] = games[i, j] - won
+        ratings.append(fit_elo(sample))
+    return np.percentile(ratings, 2.5, axis=0), np.percentile(ratings, 97.5, axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin AI-vs-AI tournament with Elo ratings")
+    parser.add_argument('--policy', action='append', help="Model or LUT file/glob (repeatable; default: all)")
+    parser.add_argument('--envs', type=int, default=1024, help="Parallel games per pairing (split between sides)")
+    parser.add_argument('--frames', type=int, default=3000, help="Frames played per side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="Pairing result cache (JSON)")
+    parser.add_argument('--bootstrap', type=int, default=200, help="Bootstrap samples for the intervals")
+    parser.add_argument('--report', help="Also save the standings as JSON")
+    args = parser.parse_args()
+
+    paths = discover_policies(args.policy or DEFAULT_POLICIES)
+    policies = load_policies(paths)
+    keys = sorted(policies, key=lambda k: policies[k]['names'][0])
+    print(f"📂 {len(keys)} policies from {len(paths)} files")
+    if len(keys) < 2:
+        print("Need at least two distinct policies")
+        return 1
+
+    settings = f"e{args.envs}-f{args.frames}-s{args.seed}"
+    cache = load_cache(args.cache)
+    results = cache['results']
+    pairings = [(a, b) for i, a in enumerate(keys) for b in keys[i + 1:]]
+    pending = [(a, b) for a, b in pairings if cache_key(a, b, settings) not in results]
+    print(f"🗂️  {len(pairings) - len(pending)} of {len(pairings)} pairings cached, {len(pending)} to play")
+
+    if pending:
+        start = time.time()
+        needed = sorted({k for pair in pending for k in pair})
+        luts = build_policy_luts(policies, needed)
+        tasks = [(a, b, args.envs, args.frames, args.seed) for a, b in pending]
+        workers = max(1, min(args.workers, len(tasks)))
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(luts,)) as pool:
+            for done, (a, b, points_a, points_b) in enumerate(pool.imap_unordered(_play_pairing, tasks), 1):
+                results[cache_key(a, b, settings)] = [points_a, points_b]
+                save_cache(args.cache, cache)
+                print(f"   [{done}/{len(tasks)}] {policies[a]['names'][0]} {points_a} - {points_b} "
+                      f"{policies[b]['names'][0]}")
+        print(f"⏱️  Played {len(tasks)} pairings in {time.time() - start:.1f}s on {workers} workers")
+
+    index = {k: i for i, k in enumerate(keys)}
+    wins = np.zeros((len(keys), len(keys)), dtype=np.int64)
+    for a, b in pairings:
+        points_a, points_b = results[cache_key(a, b, settings)]
+        wins[index[a], index[b]] = points_a
+        wins[index[b], index[a]] = points_b
+    elo = fit_elo(wins)
+    low, high = elo_intervals(wins, args.bootstrap, args.seed)
+    points = wins.sum(axis=1)
+    played = (wins + wins.T).sum(axis=1)
+
+    print(f"\n🏆 Standings ({settings})")
+    print(f"   {'#':>2}  {'Elo':>6}  {'95% CI':>13}  {'points':>7}  policy")
+    standings = []
+    for rank, i in enumerate(np.argsort(-elo), 1):
+        names = policies[keys[i]]['names']
+        share = points[i] / max(played[i], 1)
+        print(f"   {rank:>2}  {elo[i]:6.0f}  [{low[i]:5.0f},{high[i]:5.0f}]  {share * 100:6.1f}%  {' = '.join(names)}")
+        standings.append({'rank': rank, 'names': names, 'key': keys[i], 'elo': round(float(elo[i]), 1),
+                          'ci': [round(float(low[i]), 1), round(float(high[i]), 1)],
+                          'points': int(points[i]), 'played': int(played[i])})
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'settings': settings, 'standings': standings}, f, indent=2)
+        print(f"💾 Report saved to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
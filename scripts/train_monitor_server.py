@@ -30,6 +30,17 @@ def handle_stats(data):
 def index():
     return render_template('index.html')
 
+# API endpoint to list compact training replays (.pgr) in public/best_replays
+@app.route('/api/best_replays')
+def list_best_replays():
+    replay_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../pong-ai-web/public/best_replays'))
+    if not os.path.isdir(replay_dir):
+        return jsonify([])
+    files = [fname for fname in os.listdir(replay_dir) if fname.endswith('.pgr')]
+    # Sort newest first
+    files.sort(reverse=True)
+    return jsonify(files)
+
 
 # Background thread: copy new best videos and HTML replays to public folder
 def sync_best_videos():
@@ -60,5 +71,29 @@ def sync_best_videos():
 video_sync_thread = threading.Thread(target=sync_best_videos, daemon=True)
 video_sync_thread.start()
 
+# Background thread: copy new best-episode replays (written by replay_recorder.py) to public folder
+def sync_best_replays():
+    src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/best_replays'))
+    dst_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../pong-ai-web/public/best_replays'))
+    os.makedirs(dst_dir, exist_ok=True)
+    while True:
+        if os.path.isdir(src_dir):
+            for fname in os.listdir(src_dir):
+                if not fname.endswith('.pgr'):
+                    continue
+                src_path = os.path.join(src_dir, fname)
+                dst_path = os.path.join(dst_dir, fname)
+                try:
+                    # Replays are immutable once written, so only copy new files
+                    if not os.path.exists(dst_path):
+                        shutil.copy2(src_path, dst_path)
+                        print(f"[Replay Sync] Copied: {fname}")
+                except Exception as e:
+                    print(f"[Replay Sync] Error copying {fname}: {e}")
+        time.sleep(10)  # Check every 10 seconds
+
+replay_sync_thread = threading.Thread(target=sync_best_replays, daemon=True)
+replay_sync_thread.start()
+
 if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', port=5000)
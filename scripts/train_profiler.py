@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Low-overhead per-phase timing for the Pong DQN training loop
+
+PhaseProfiler keeps, per named phase (env_step, act_predict, replay_sample, ...):
+- call count and total time
+- a log2 histogram of call durations (1us buckets upward) for rough percentiles
+and reports steps/sec plus each phase's share of wall time for the current window.
+
+ProfileWindow wraps cProfile (or pyinstrument when installed) around a window of
+episodes and dumps the result next to the phase reports.
+
+Usage in the training loop:
+    profiler = PhaseProfiler()
+    with profiler.phase('env_step'):
+        next_state, reward, done = env.step(action)
+    profiler.count_steps(1)
+    report = profiler.report()   # dict, JSON-serializable
+    profiler.reset()             # start a new window
+"""
+
+import json
+import os
+import time
+
+HISTOGRAM_BUCKETS = 32  # 2^0 us .. 2^31 us
+
+
+class _PhaseTimer:
+    """Reusable context manager for one phase (avoids per-call allocation)"""
+
+    __slots__ = ('stats', 'start')
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.add(time.perf_counter() - self.start)
+        return False
+
+
+class PhaseStats:
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = int(seconds * 1e6)
+        bucket = micros.bit_length()
+        if bucket >= HISTOGRAM_BUCKETS:
+            bucket = HISTOGRAM_BUCKETS - 1
+        self.histogram[bucket] += 1
+
+    def percentile(self, q):
+        """Approximate percentile in seconds (upper edge of the histogram bucket)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bucket, n in enumerate(self.histogram):
+            seen += n
+            if seen >= target:
+                return min(self.max, (1 << bucket) / 1e6)
+        return self.max
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.phases = {}
+        self._timers = {}
+        self.steps = 0
+        self.episodes = 0
+        self.window_start = time.perf_counter()
+
+    def _stats(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return stats
+
+    def phase(self, name):
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self._stats(name))
+        return timer
+
+    def add(self, name, seconds):
+        self._stats(name).add(seconds)
+
+    def count_steps(self, n=1):
+        self.steps += n
+
+    def count_episode(self):
+        self.episodes += 1
+
+    def report(self):
+        elapsed = max(1e-9, time.perf_counter() - self.window_start)
+        phases = {}
+        for name, stats in sorted(self.phases.items(), key=lambda kv: -kv[1].total):
+            phases[name] = {
+                'count': stats.count,
+                'total_s': round(stats.total, 6),
+                'share': round(stats.total / elapsed, 4),
+                'mean_ms': round(1e3 * stats.total / stats.count, 4) if stats.count else 0.0,
+                'p50_ms': round(1e3 * stats.percentile(0.50), 4),
+                'p90_ms': round(1e3 * stats.percentile(0.90), 4),
+                'p99_ms': round(1e3 * stats.percentile(0.99), 4),
+                'max_ms': round(1e3 * stats.max, 4),
+            }
+        accounted = sum(p['total_s'] for p in phases.values())
+        return {
+            'window_s': round(elapsed, 3),
+            'episodes': self.episodes,
+            'steps': self.steps,
+            'steps_per_sec': round(self.steps / elapsed, 2),
+            'other_share': round(max(0.0, 1.0 - accounted / elapsed), 4),
+            'phases': phases,
+        }
+
+    def reset(self):
+        """Start a new reporting window (timers stay bound to fresh stats)"""
+        self.phases = {}
+        self._timers = {}
+        self.steps = 0
+        self.episodes = 0
+        self.window_start = time.perf_counter()
+
+
+def format_report(report):
+    lines = [f"[Profile] {report['steps_per_sec']:.1f} steps/s over {report['window_s']:.1f}s "
+             f"({report['episodes']} episodes, {report['steps']} steps)"]
+    for name, p in report['phases'].items():
+        lines.append(f"[Profile]   {name:<14} {p['share'] * 100:5.1f}% | n={p['count']:<7d} "
+                     f"mean={p['mean_ms']:.3f}ms p90={p['p90_ms']:.3f}ms max={p['max_ms']:.3f}ms")
+    lines.append(f"[Profile]   {'(other)':<14} {report['other_share'] * 100:5.1f}%")
+    return "\n".join(lines)
+
+
+def append_report(path, report, **extra):
+    """Append one report as a JSON line"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    record = dict(extra)
+    record.update(report)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+class ProfileWindow:
+    """cProfile/pyinstrument capture over episodes [start, start + count)
+
+    The window opens at the first episode >= start, so a run that begins past
+    it (e.g. after --resume) still gets its profile.
+    """
+
+    def __init__(self, out_dir, start_episode=10, num_episodes=20, backend='cprofile'):
+        self.out_dir = out_dir
+        self.start_episode = start_episode
+        self.num_episodes = num_episodes
+        self.end_episode = start_episode + num_episodes
+        self.backend = backend
+        self._profiler = None
+        self.done = False
+
+    def on_episode_start(self, episode):
+        if self.done or self._profiler is not None or episode < self.start_episode:
+            return
+        self.start_episode = episode
+        self.end_episode = episode + self.num_episodes
+        if self.backend == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+            except ImportError:
+                print("[Profile] pyinstrument not installed, falling back to cProfile", flush=True)
+                self.backend = 'cprofile'
+        if self.backend == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+        print(f"[Profile] Capturing {self.backend} profile for episodes "
+              f"{self.start_episode}..{self.end_episode - 1}", flush=True)
+        if self.backend == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def on_episode_end(self, episode):
+        if self._profiler is not None and episode + 1 >= self.end_episode:
+            self.stop()
+
+    def stop(self):
+        if self._profiler is None:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.backend == 'pyinstrument':
+            self._profiler.stop()
+            path = os.path.join(self.out_dir, f'train_profile_ep{self.start_episode}_{stamp}.html')
+            with open(path, 'w') as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            import pstats
+            path = os.path.join(self.out_dir, f'train_profile_ep{self.start_episode}_{stamp}.prof')
+            self._profiler.dump_stats(path)
+            pstats.Stats(path).sort_stats('cumulative').print_stats(25)
+        print(f"[Profile] Profile dump saved: {path}", flush=True)
+        self._profiler = None
+        self.done = True
+        return path
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print(f"Usage: python {sys.argv[0]} <train_profile.jsonl>")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        for line in f:
+            record = json.loads(line)
+            print(f"--- episode {record.get('episode', '?')} ---")
+            print(format_report(record))
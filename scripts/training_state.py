@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Resumable training state for the Pong DQN
+
+A training state holds everything needed to continue a run exactly where it
+stopped, not just the model weights:
+- online and target network weights, and the Adam optimizer slots (moments, iteration count)
+- the replay buffer (one .npy per field, memory-mapped lazily on load)
+- Python, NumPy and agent RNG states
+- step/episode counters, epsilon, and the training metric history
+
+Layout on disk:
+    <root>/LATEST                  name of the newest complete snapshot
+    <root>/<YYYYmmdd_HHMMSS>_ep<N>/
+        state.json                 counters, metrics, RNG states
+        networks.npz               model_*, target_*, optimizer_* arrays
+        replay_*.npy, replay_meta.json
+
+Snapshots are written to a hidden temp directory and renamed into place before
+LATEST is updated, so an interrupted write never replaces the last good state.
+"""
+
+import json
+import os
+import random
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from replay_buffer import ReplayBuffer
+
+STATE_VERSION = 1
+DEFAULT_STATE_DIR = '../models/training_state'
+
+
+def _optimizer_variables(optimizer):
+    variables = optimizer.variables
+    return variables() if callable(variables) else variables
+
+
+def capture_training_state(agent, metrics):
+    """Copy everything needed to resume (cheap: small nets + one replay copy)
+
+    Runs on the training thread; the returned dict is safe to write from another thread.
+    """
+    optimizer = agent.model.optimizer
+    return {
+        'model': agent.model.get_weights(),
+        'target': agent.target_model.get_weights(),
+        'optimizer': [np.array(v) for v in _optimizer_variables(optimizer)] if optimizer is not None else [],
+        'replay': agent.memory.copy(),
+        'state': {
+            'version': STATE_VERSION,
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'counters': {
+                'step_count': agent.step_count,
+                'episode_count': agent.episode_count,
+                'epsilon': agent.epsilon,
+                'epsilon_start': agent.epsilon_start,
+                'first_replay_done': agent.first_replay_done,
+                'last_loss': float(getattr(agent, 'last_loss', 0.0)),
+            },
+            'rng': {
+                'python': random.getstate(),
+                'numpy_global': np.random.get_state(legacy=False),
+                'agent': agent.rng.bit_generator.state,
+            },
+            'metrics': metrics,
+        },
+    }
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def write_training_state(snapshot, root=DEFAULT_STATE_DIR, keep=2):
+    """Write a captured snapshot atomically and point LATEST at it; returns its directory"""
+    os.makedirs(root, exist_ok=True)
+    episode = snapshot['state']['counters']['episode_count']
+    name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_ep{episode}"
+    tmp_dir = os.path.join(root, f'.{name}.tmp')
+    final_dir = os.path.join(root, name)
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    arrays = {}
+    for prefix in ('model', 'target', 'optimizer'):
+        for i, array in enumerate(snapshot[prefix]):
+            arrays[f'{prefix}_{i}'] = array
+    np.savez(os.path.join(tmp_dir, 'networks.npz'), **arrays)
+    snapshot['replay'].save(tmp_dir)
+    state = dict(snapshot['state'])
+    state['num_weights'] = {prefix: len(snapshot[prefix]) for prefix in ('model', 'target', 'optimizer')}
+    with open(os.path.join(tmp_dir, 'state.json'), 'w') as f:
+        json.dump(_jsonable(state), f)
+
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.replace(tmp_dir, final_dir)
+    latest_tmp = os.path.join(root, 'LATEST.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(name)
+    os.replace(latest_tmp, os.path.join(root, 'LATEST'))
+
+    # Retention: keep the newest `keep` snapshots
+    snapshots = sorted(d for d in os.listdir(root)
+                       if os.path.isdir(os.path.join(root, d)) and not d.startswith('.'))
+    for old in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return final_dir
+
+
+def latest_state_dir(root=DEFAULT_STATE_DIR):
+    pointer = os.path.join(root, 'LATEST')
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        name = f.read().strip()
+    path = os.path.join(root, name)
+    return path if os.path.isdir(path) else None
+
+
+def load_training_state(path, mmap=True):
+    """Load a snapshot directory (replay memory-mapped copy-on-write by default)"""
+    with open(os.path.join(path, 'state.json')) as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"Unsupported training state version {state.get('version')}")
+    with np.load(os.path.join(path, 'networks.npz')) as npz:
+        networks = {prefix: [npz[f'{prefix}_{i}'] for i in range(count)]
+                    for prefix, count in state['num_weights'].items()}
+    return {
+        'model': networks['model'],
+        'target': networks['target'],
+        'optimizer': networks['optimizer'],
+        'replay': ReplayBuffer.load(path, mmap=mmap),
+        'state': state,
+    }
+
+
+def restore_training_state(agent, snapshot):
+    """Apply a loaded snapshot to a freshly built agent; returns the saved metrics dict"""
+    agent.model.set_weights(snapshot['model'])
+    agent.target_model.set_weights(snapshot['target'])
+
+    optimizer = agent.model.optimizer
+    if snapshot['optimizer'] and optimizer is not None:
+        optimizer.build(agent.model.trainable_variables)
+        variables = _optimizer_variables(optimizer)
+        if len(variables) == len(snapshot['optimizer']):
+            for variable, value in zip(variables, snapshot['optimizer']):
+                variable.assign(value)
+        else:
+            print(f"⚠️  Optimizer state mismatch ({len(snapshot['optimizer'])} saved vs "
+                  f"{len(variables)} expected), starting with fresh Adam moments")
+
+    agent.memory = snapshot['replay']
+
+    state = snapshot['state']
+    counters = state['counters']
+    agent.step_count = counters['step_count']
+    agent.episode_count = counters['episode_count']
+    agent.epsilon = counters['epsilon']
+    agent.epsilon_start = counters.get('epsilon_start', 1.0)
+    agent.first_replay_done = counters['first_replay_done']
+    agent.last_loss = counters['last_loss']
+
+    rng = state['rng']
+    version, internal, gauss = rng['python']
+    random.setstate((version, tuple(internal), gauss))
+    np.random.set_state(rng['numpy_global'])
+    agent.rng.bit_generator.state = rng['agent']
+    return state['metrics']